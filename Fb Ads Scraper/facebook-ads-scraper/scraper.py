@@ -9,12 +9,27 @@ import pandas as pd
 import json
 import time
 import os
+import sys
 from datetime import datetime
+from functools import partial
+
+# Shared helpers are bootstrapped by repo_root.py in the parent scraper folder
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import repo_root  # noqa: F401
+from checkpoint_journal import CrawlJournal
+from crawl_coordinator import crawl, report_progress
+from jsonl_sink import JsonlSink, reconstruct_documents
 
 class FacebookAdsScraper:
-    def __init__(self):
+    def __init__(self, stream_results=True):
         self.setup_chrome_options()
-        self.results = []
+        # Ads are streamed to disk as they are extracted instead of held in memory.
+        # Crawl workers don't stream; they hand each domain's ads back to the coordinating process.
+        # The stream is shared by resumed runs, so results.json covers every domain the journal marks done.
+        self.results_file = 'results.json'
+        self.sink = JsonlSink('results.jsonl', resume=True) if stream_results else None
+        self.journal_file = 'crawl_journal.jsonl'
+        self.scraped_domains_file = 'scraped_domains.txt'
         
     def setup_chrome_options(self):
         """Set up Chrome options for the scraper"""
@@ -100,19 +115,23 @@ class FacebookAdsScraper:
         """Scroll the page to load more content"""
         last_height = driver.execute_script("return document.body.scrollHeight")
         
-        for _ in range(5):  # Scroll 5 times
+        for scrolls in range(1, 6):  # Scroll 5 times
             driver.execute_script("window.scrollTo(0, document.body.scrollHeight);")
             time.sleep(scroll_pause)
+            report_progress({"scrolls": scrolls})
             
             new_height = driver.execute_script("return document.body.scrollHeight")
             if new_height == last_height:
                 break
             last_height = new_height
 
-    def scrape_domain(self, domain):
-        """Scrape ads for a specific domain"""
+    def scrape_domain(self, domain, driver=None):
+        """Scrape ads for a specific domain on `driver` if given (left open), and return them"""
         print(f"Starting to scrape ads for {domain}")
-        driver = self.create_driver()
+        own_driver = driver is None
+        if own_driver:
+            driver = self.create_driver()
+        ads = []
         
         try:
             # Construct and load URL
@@ -127,7 +146,7 @@ class FacebookAdsScraper:
             ads_container = self.wait_for_element(driver, 'div[role="main"]')
             if not ads_container:
                 print(f"No ads container found for {domain}")
-                return
+                return ads
 
             # Find all ad elements
             ad_elements = driver.find_elements(By.CSS_SELECTOR, 'div[role="article"]')
@@ -137,40 +156,77 @@ class FacebookAdsScraper:
             for ad_element in ad_elements:
                 ad_data = self.extract_ad_data(ad_element)
                 ad_data['domain'] = domain
-                self.results.append(ad_data)
+                ads.append(ad_data)
+                if self.sink is not None:
+                    self.sink.append(self.results_file, [domain], ad_data)
                 print(f"Extracted data for ad from {domain}")
 
         except Exception as e:
             print(f"Error scraping {domain}: {str(e)}")
+            # Let the crawl journal record the domain as failed so a resumed run retries it
+            raise
         finally:
-            driver.quit()
+            if own_driver:
+                driver.quit()
+
+        return ads
+
+    def write_domain(self, outcome):
+        """Stream a finished domain's ads to the results file.
+
+        All of a domain's ads go in one record that replaces any earlier one,
+        so writing a domain again after a crash (before the journal marked
+        it done) does not duplicate its ads"""
+        if outcome.status != "done":
+            print(f"Error scraping {outcome.domain}: {outcome.error}")
+            return
+        self.sink.set(self.results_file, [outcome.domain], outcome.result)
+        # The journal marks the domain done next; its ads must be on disk first
+        self.sink.flush()
+        print(f"Saved {len(outcome.result)} ads for {outcome.domain}")
 
     def save_results(self):
-        """Save results to JSON file"""
+        """Rebuild results.json from the streamed records"""
         try:
-            with open('results.json', 'w', encoding='utf-8') as f:
-                json.dump(self.results, f, ensure_ascii=False, indent=4)
-            print(f"Results saved to results.json - Total ads scraped: {len(self.results)}")
+            self.sink.close()
+            ads_by_domain = reconstruct_documents(self.sink.path).get(self.results_file, {})
+            results = [ad for ads in ads_by_domain.values() for ad in ads]
+            with open(self.results_file, 'w', encoding='utf-8') as f:
+                json.dump(results, f, indent=4, ensure_ascii=False)
+            print(f"Results saved to {self.results_file} - Total ads scraped: {len(results)}")
         except Exception as e:
             print(f"Error saving results: {str(e)}")
 
-    def run(self, domains_file):
-        """Run the scraper for all domains"""
+    def run(self, domains_file, workers=4, rate_per_minute=12):
+        """Run the scraper for all domains over `workers` long-lived browsers,
+        starting at most `rate_per_minute` domains per minute between them.
+        Domains listed in scraped_domains.txt or journaled as done are skipped,
+        so an interrupted run picks up where it stopped"""
+        journal = CrawlJournal(self.journal_file, done_list=self.scraped_domains_file)
         try:
             # Read domains from CSV
             df = pd.read_csv(domains_file)
             domains = df['shop_domain'].tolist()
 
-            # Scrape each domain
-            for domain in domains:
-                self.scrape_domain(domain)
-                time.sleep(5)  # Delay between domains
+            # Scrape the domains in parallel; each is written as soon as it finishes
+            stats = crawl(
+                domains,
+                partial(FacebookAdsScraper, stream_results=False),
+                workers=workers,
+                rate_per_minute=rate_per_minute,
+                on_result=self.write_domain,
+                driver_method="create_driver",
+                journal=journal
+            )
+            print(f"Scraped {stats['done']} domains, {stats['failed']} failed, {stats['skipped']} already done")
 
             # Save all results
             self.save_results()
 
         except Exception as e:
             print(f"Error in main execution: {str(e)}")
+        finally:
+            journal.close()
 
 if __name__ == "__main__":
     scraper = FacebookAdsScraper()
@@ -16,11 +16,16 @@ import os
 import random
 import urllib.parse
 
+import repo_root  # noqa: F401
+from near_duplicates import AdCardFilter
+from session_store import SessionStore
+
 class FacebookAdScraper:
     def __init__(self, email: str, password: str):
         self.email = email
         self.password = password
         self.base_url = "https://www.facebook.com/ads/library/"
+        self.session_store = SessionStore('fb_session.bin')
         self.setup_logging()
         self.setup_driver()
 
@@ -212,8 +217,10 @@ class FacebookAdScraper:
     def scrape_ads(self, company_name: str, num_ads: int = 10) -> List[Dict]:
         """Main method to scrape ads"""
         ads_data = []
+        # The same ad is found again on every scroll and reruns vary slightly
+        new_cards = AdCardFilter()
         try:
-            if not self.login():
+            if not self.session_store.ensure(self.driver, lambda driver: self.login(), self.email, verify=True):
                 raise Exception("Failed to login")
 
             self.search_company(company_name)
@@ -230,9 +237,10 @@ class FacebookAdScraper:
                         break
                         
                     ad_data = self.extract_ad_data(ad_element)
-                    if ad_data and ad_data not in ads_data:  # Avoid duplicates
-                        ads_data.append(ad_data)
-                        self.logger.info(f"Scraped ad {len(ads_data)} of {num_ads}")
+                    if not ad_data or not new_cards.accept(ad_data["text_content"], ad_data["ad_id"]):
+                        continue
+                    ads_data.append(ad_data)
+                    self.logger.info(f"Scraped ad {len(ads_data)} of {num_ads}")
                 
                 if len(ads_data) >= num_ads:
                     break
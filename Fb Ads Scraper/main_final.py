@@ -1,7 +1,6 @@
 import os
 import json
 from datetime import datetime
-import time
 from selenium import webdriver
 from selenium.webdriver.chrome.service import Service
 from webdriver_manager.chrome import ChromeDriverManager
@@ -14,6 +13,20 @@ import logging
 import sys
 import urllib.parse
 
+import repo_root  # noqa: F401
+from ad_card_extractor import extract_ad_cards
+from ad_library_graphql import AdLibraryCollector
+from ads_warehouse import AdsWarehouse
+from feed_harvester import FeedHarvester
+from instrumentation import ScrapeMetrics, instrument_driver
+from jsonl_sink import JsonlSink
+from near_duplicates import NearDuplicateIndex
+from readiness import Readiness, enable_network_tracking
+from resource_blocking import apply_blocking
+from selector_engine import SelectorEngine
+from selector_registry import SelectorRegistry
+from session_store import SessionStore
+
 
 class FacebookAdsScraper:
     def __init__(self):
@@ -31,6 +44,14 @@ class FacebookAdsScraper:
         
         self.setup_logging()
         self.options = self.configure_chrome_options()
+        self.metrics = ScrapeMetrics("facebook_ads")
+        # Skip creative downloads; image URLs are still read from the src attributes
+        self.blocking = "ad_library"
+        self.session_store = SessionStore(os.path.join(self.base_dir, 'fb_session.bin'))
+        self.warehouse = AdsWarehouse(os.path.join(self.base_dir, 'ads.db'))
+        # Evaluates each field's fallback selectors, :contains/:has included, in one call,
+        # trying the ones that worked on earlier runs first
+        self.selectors = SelectorEngine(SelectorRegistry(os.path.join(self.base_dir, 'selector_stats.json')))
 
 
 
@@ -60,7 +81,8 @@ class FacebookAdsScraper:
         options.add_argument('--disable-features=IsolateOrigins,site-per-process')
         options.add_experimental_option("excludeSwitches", ["enable-automation"])
         options.add_experimental_option('useAutomationExtension', False)
-        return options
+        # CDP network events let scrape_ads read the Ad Library's GraphQL responses
+        return enable_network_tracking(options)
 
 
 
@@ -68,7 +90,8 @@ class FacebookAdsScraper:
         try:
             logging.info("Initializing Chrome driver...")
             service = Service(ChromeDriverManager().install())
-            driver = webdriver.Chrome(service=service, options=self.options)
+            driver = instrument_driver(webdriver.Chrome(service=service, options=self.options), self.metrics)
+            apply_blocking(driver, self.blocking)
             # Add these commands for better automation detection bypass
             driver.execute_cdp_cmd('Network.setUserAgentOverride', {
                 "userAgent": 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) Chrome/120.0.0.0 Safari/537.36'
@@ -100,8 +123,9 @@ class FacebookAdsScraper:
             driver.delete_all_cookies()
             
             # Go to Facebook login page
+            readiness = Readiness(driver, timeout=15)
             driver.get("https://www.facebook.com")
-            time.sleep(3)
+            readiness.page_ready("fb_home")
 
             # Handle cookie consent if present
             try:
@@ -109,7 +133,7 @@ class FacebookAdsScraper:
                     "//button[contains(text(), 'Allow') or contains(text(), 'Accept') or contains(text(), 'OK')]")
                 if cookie_buttons:
                     cookie_buttons[0].click()
-                    time.sleep(2)
+                    readiness.dom_quiet(timeout=2)
             except:
                 logging.info("No cookie consent needed")
 
@@ -120,7 +144,7 @@ class FacebookAdsScraper:
             if email_field:
                 email_field.clear()
                 email_field.send_keys(self.email)
-                time.sleep(1)
+                readiness.wait_for("email_typed", lambda d: email_field.get_attribute("value") == self.email, timeout=3)
 
             # Enter password
             password_field = self.wait_for_element(driver, By.ID, "pass")
@@ -129,17 +153,29 @@ class FacebookAdsScraper:
             if password_field:
                 password_field.clear()
                 password_field.send_keys(self.password)
-                time.sleep(1)
+                readiness.wait_for("password_typed",
+                                   lambda d: password_field.get_attribute("value") == self.password, timeout=3)
 
             # Click login button
             try:
                 login_button = driver.find_element(By.NAME, "login")
+                readiness.wait_for("login_enabled", lambda d: login_button.is_enabled(), timeout=3)
                 login_button.click()
             except:
                 password_field.send_keys(Keys.RETURN)
 
-            # Wait for login to complete
-            time.sleep(5)
+            # Wait for login to complete. The home page already satisfies URL and
+            # navigation checks, so wait for the session cookie, or for the login
+            # form to be replaced by a page with the navigation bar.
+            login_form = password_field or email_field
+            form_gone = EC.staleness_of(login_form) if login_form else (lambda d: True)
+            if not readiness.wait_for(
+                "login_complete",
+                lambda d: d.get_cookie("c_user") is not None or
+                          (form_gone(d) and len(d.find_elements(By.XPATH, "//div[@role='navigation']")) > 0)
+            ):
+                logging.error("Timed out waiting for login to complete")
+                return False
 
             # Verify login success by checking multiple indicators
             if self.verify_login(driver):
@@ -159,10 +195,16 @@ class FacebookAdsScraper:
     def verify_login(self, driver):
         """Verify login success using multiple methods"""
         try:
-            # Wait a bit longer for the page to load completely
-            time.sleep(5)
+            # Wait for the page to load completely
+            Readiness(driver, timeout=10).page_ready("document")
             
-            # Check multiple indicators of successful login
+            # Facebook sets c_user for a logged-in session
+            if driver.get_cookie("c_user") is not None:
+                return True
+
+            # The logged-out home page has these too, so the login form must be gone as well
+            if driver.find_elements(By.ID, "pass"):
+                return False
             indicators = [
                 # Check URL is not login page
                 lambda: "login" not in driver.current_url.lower(),
@@ -188,12 +230,13 @@ class FacebookAdsScraper:
             encoded_search = urllib.parse.quote(search_term)
             search_url = f"https://www.facebook.com/ads/library/?active_status=all&ad_type=all&country=ALL&view_all_page_id=all&sort_data[direction]=desc&sort_data[mode]=relevancy_monthly_grouped&search_type=keyword_unordered&media_type=all&q={encoded_search}"
             
+            readiness = Readiness(driver, timeout=15)
             driver.get(search_url)
-            time.sleep(5)
+            readiness.page_ready("fb_ad_library")
 
             # Check if we need to login again
             if self.check_and_handle_login(driver):
-                time.sleep(3)
+                readiness.page_ready("document")
 
             # Wait for page load
             logging.info("Waiting for page to load completely...")
@@ -243,17 +286,19 @@ class FacebookAdsScraper:
     def wait_for_page_load(self, driver):
         """Wait for page to load completely"""
         try:
-            # Wait for page load complete
-            WebDriverWait(driver, 30).until(
-                lambda driver: driver.execute_script('return document.readyState') == 'complete'
-            )
-            
-            # Additional wait for dynamic content
-            time.sleep(5)
-            
-            # Scroll a bit to trigger content load
-            driver.execute_script("window.scrollBy(0, 300);")
-            time.sleep(2)
+            with self.metrics.phase("wait"):
+                # Wait for page load complete
+                WebDriverWait(driver, 30).until(
+                    lambda driver: driver.execute_script('return document.readyState') == 'complete'
+                )
+                
+                # Wait for the ad cards instead of a fixed pause
+                readiness = Readiness(driver, timeout=15)
+                readiness.page_ready("fb_ad_results")
+                
+                # Scroll a bit to trigger content load
+                driver.execute_script("window.scrollBy(0, 300);")
+                readiness.dom_quiet(timeout=5)
         except Exception as e:
             logging.warning(f"Page load wait warning: {str(e)}")
 
@@ -277,8 +322,10 @@ class FacebookAdsScraper:
                 }
                 
                 driver = ad_container.parent
+                readiness = Readiness(driver, timeout=3)
                 driver.execute_script("arguments[0].scrollIntoView(true);", ad_container)
-                time.sleep(1)
+                # Cards render their content lazily once scrolled into view
+                readiness.wait_for("card_content", lambda d: bool(ad_container.text.strip()))
                 
                 # Ad Text Extraction
                 text_selectors = [
@@ -291,19 +338,9 @@ class FacebookAdsScraper:
                     '.xjkvuk6 div[dir="auto"]',
                     '.x1lliihq.xjkvuk6.x1cy8zhl'  # Added for more coverage
                 ]
-                for selector in text_selectors:
-                    try:
-                        elements = ad_container.find_elements(By.CSS_SELECTOR, selector)
-                        texts = set()  # Prevent duplication
-                        for elem in elements:
-                            text = elem.text.strip()
-                            if text and len(text) > 10 and text not in texts:
-                                texts.add(text)
-                        ad_data['ad_text'] = ' '.join(texts)
-                        if ad_data['ad_text']:
-                            break
-                    except:
-                        continue
+                match = self.selectors.query(ad_container, 'ad_text', text_selectors, pattern=r'[\s\S]{11,}')
+                if match:
+                    ad_data['ad_text'] = ' '.join(dict.fromkeys(match.values))  # Prevent duplication
 
                 # Company Name
                 company_selectors = [
@@ -314,14 +351,9 @@ class FacebookAdsScraper:
                     '._8jh2',
                     '.x1i10h78 span'  # Added for more accuracy
                 ]
-                for selector in company_selectors:
-                    try:
-                        element = ad_container.find_element(By.CSS_SELECTOR, selector)
-                        if element and element.text:
-                            ad_data['company_name'] = element.text.strip()
-                            break
-                    except:
-                        continue
+                match = self.selectors.query(ad_container, 'company_name', company_selectors)
+                if match:
+                    ad_data['company_name'] = match.value
 
                 # Image/Video URL
                 media_selectors = [
@@ -333,16 +365,9 @@ class FacebookAdsScraper:
                     '.x1ll5gia.x19kjcj4.xh8yej3',
                     'video.x1lliihq'  # Added for video support
                 ]
-                for selector in media_selectors:
-                    try:
-                        element = ad_container.find_element(By.CSS_SELECTOR, selector)
-                        if element:
-                            url = element.get_attribute('src')
-                            if url:
-                                ad_data['image_url'] = url
-                                break
-                    except:
-                        continue
+                match = self.selectors.query(ad_container, 'image_url', media_selectors, value='src')
+                if match:
+                    ad_data['image_url'] = match.value
 
                 # Platforms
                 platform_selectors = [
@@ -353,24 +378,19 @@ class FacebookAdsScraper:
                     '.x1lliihq span:contains("Platforms")'  # Added for explicit platform text
                 ]
                 platforms = set()
-                for selector in platform_selectors:
-                    try:
-                        elements = ad_container.find_elements(By.CSS_SELECTOR, selector)
-                        for elem in elements:
-                            text = elem.text.lower()
-                            if 'facebook' in text:
-                                platforms.add('Facebook')
-                            if 'instagram' in text:
-                                platforms.add('Instagram')
-                            if 'messenger' in text:
-                                platforms.add('Messenger')
-                            if 'whatsapp' in text:
-                                platforms.add('WhatsApp')
-                        if platforms:
-                            ad_data['platform'] = ', '.join(platforms)
-                            break
-                    except:
-                        continue
+                match = self.selectors.query(ad_container, 'platform', platform_selectors,
+                                             pattern='facebook|instagram|messenger|whatsapp')
+                for text in (match.values if match else []):
+                    text = text.lower()
+                    if 'facebook' in text:
+                        platforms.add('Facebook')
+                    if 'instagram' in text:
+                        platforms.add('Instagram')
+                    if 'messenger' in text:
+                        platforms.add('Messenger')
+                    if 'whatsapp' in text:
+                        platforms.add('WhatsApp')
+                ad_data['platform'] = ', '.join(platforms)
 
                 # Start Date
                 date_selectors = [
@@ -380,18 +400,13 @@ class FacebookAdsScraper:
                     'span:contains("running on")',
                     '.x1lliihq span:contains("Started")'  # Added for more coverage
                 ]
-                for selector in date_selectors:
-                    try:
-                        element = ad_container.find_element(By.CSS_SELECTOR, selector)
-                        if element and element.text:
-                            date_text = element.text.strip()
-                            if 'Started running on' in date_text:
-                                ad_data['start_date'] = date_text.split('Started running on')[-1].strip()
-                            else:
-                                ad_data['start_date'] = date_text
-                            break
-                    except:
-                        continue
+                match = self.selectors.query(ad_container, 'start_date', date_selectors)
+                if match:
+                    date_text = match.value
+                    if 'Started running on' in date_text:
+                        ad_data['start_date'] = date_text.split('Started running on')[-1].strip()
+                    else:
+                        ad_data['start_date'] = date_text
 
                 # Ad ID
                 id_selectors = [
@@ -402,18 +417,13 @@ class FacebookAdsScraper:
                     '.x8t9es0.xw23nyj.xo1l8bm span:contains("ID:")',
                     '.x1cy8zhl.x78zum5 span:contains("ID:")'  # Added for better ID capture
                 ]
-                for selector in id_selectors:
-                    try:
-                        element = ad_container.find_element(By.CSS_SELECTOR, selector)
-                        if element and element.text:
-                            text = element.text.strip()
-                            if 'ID:' in text:
-                                ad_data['id'] = text.split('ID:')[-1].strip()
-                            elif text.isdigit():  # If it's just a number
-                                ad_data['id'] = text
-                            break
-                    except:
-                        continue
+                match = self.selectors.query(ad_container, 'id', id_selectors, pattern=r'ID:|^\d+$')
+                if match:
+                    text = match.value
+                    if 'ID:' in text:
+                        ad_data['id'] = text.split('ID:')[-1].strip()
+                    else:  # If it's just a number
+                        ad_data['id'] = text
 
                 # Metadata
                 metadata_selectors = [
@@ -423,31 +433,24 @@ class FacebookAdsScraper:
                     '.x1lliihq.x1iorvi4',  # Added for more metadata
                     'div[role="row"]:not(:has(span:contains("Started")))'  # Exclude date info
                 ]
-                metadata_parts = []
-                for selector in metadata_selectors:
-                    try:
-                        elements = ad_container.find_elements(By.CSS_SELECTOR, selector)
-                        for elem in elements:
-                            text = elem.text.strip()
-                            if text and text not in ad_data['ad_text'] and 'Started running' not in text:
-                                metadata_parts.append(text)
-                        if metadata_parts:
-                            ad_data['metadata'] = ' | '.join(metadata_parts)
-                            break
-                    except:
-                        continue
+                match = self.selectors.query(ad_container, 'metadata', metadata_selectors,
+                                             pattern=r'^(?![\s\S]*Started running)')
+                if match:
+                    metadata_parts = [text for text in match.values if text not in ad_data['ad_text']]
+                    ad_data['metadata'] = ' | '.join(metadata_parts)
 
                 # Return if we have substantial data
                 if ad_data['ad_text'] or ad_data['id'] or ad_data['start_date']:
                     return ad_data
                 
                 if attempt < max_retries - 1:
-                    time.sleep(2)
+                    # Retry once the card has stopped changing rather than after a fixed pause
+                    readiness.dom_quiet(timeout=2)
                     
             except Exception as e:
                 logging.error(f"Attempt {attempt + 1} failed: {str(e)}")
                 if attempt < max_retries - 1:
-                    time.sleep(2)
+                    Readiness(ad_container.parent, timeout=2).dom_quiet()
         
         return None
     
@@ -456,7 +459,11 @@ class FacebookAdsScraper:
         try:
             if "login" in driver.current_url.lower():
                 logging.info("Detected login redirect, handling login...")
-                return self.login(driver)
+                self.session_store.invalidate()
+                if self.login(driver):
+                    self.session_store.save(driver, self.email)
+                    return True
+                return False
             return False
         except Exception as e:
             logging.error(f"Error checking login status: {str(e)}")
@@ -470,76 +477,50 @@ class FacebookAdsScraper:
                 lambda x: len(x.find_elements(By.CSS_SELECTOR, '[data-testid="ad_library_preview"]')) > 0 or
                          len(x.find_elements(By.XPATH, "//*[contains(text(), 'No Ads Found')]")) > 0
             )
-            time.sleep(3)  # Additional wait for content to load completely
+            Readiness(driver).dom_quiet(timeout=5)  # Let the content settle
         except:
             logging.warning("Timeout waiting for search results")
 
 
-    def scrape_ads(self, search_term):
+    def scrape_ads(self, search_term, mode='network', max_ads=200):
+        """Scrape ads for `search_term`.
+
+        mode='network' reads the Ad Library's own JSON (embedded page data and
+        GraphQL responses) and falls back to the DOM when nothing is captured;
+        mode='dom' walks the rendered ad cards.
+        """
         driver = None
+        # Stream every ad to disk as soon as it is extracted so a crash keeps what was found
+        run_name = f"{search_term}_ads_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
+        # Named after this run, so rerunning a term never touches an earlier run's stream
+        sink = JsonlSink(os.path.join(self.ads_dir, f'{os.path.splitext(run_name)[0]}.jsonl'))
         try:
             driver = self.initialize_driver()
             if not driver:
                 return 0
 
-            if not self.login(driver):
-                raise Exception("Failed to login to Facebook")
+            # Start buffering response bodies before the first GraphQL request goes out
+            collector = AdLibraryCollector(driver) if mode == 'network' else None
 
-            if not self.navigate_to_ad_library(driver, search_term):
-                raise Exception("Failed to navigate to Ad Library")
+            with self.metrics.phase("navigate"):
+                # Only logs in from scratch when the stored session is missing or expired
+                if not self.session_store.ensure(driver, self.login, self.email):
+                    raise Exception("Failed to login to Facebook")
+
+                if not self.navigate_to_ad_library(driver, search_term):
+                    raise Exception("Failed to navigate to Ad Library")
 
-            time.sleep(5)
             ads_data = []
-            seen_texts = set()  # For deduplication
-            
-            scroll_attempts = 0
-            max_scroll_attempts = 15
-            last_height = driver.execute_script("return document.body.scrollHeight")
-
-            while len(ads_data) < 10 and scroll_attempts < max_scroll_attempts:
-                ad_container_selectors = [
-                    '.x1dr75xp.xh8yej3.x16md763',
-                    '[data-testid="ad_container"]',
-                    '[data-testid="ad_library_preview"]',
-                    '._7jyg',
-                    '.x1cy8zhl',
-                    '.x1iorvi4'
-                ]
-                
-                for selector in ad_container_selectors:
-                    containers = driver.find_elements(By.CSS_SELECTOR, selector)
-                    for container in containers[len(ads_data):]:
-                        try:
-                            driver.execute_script("arguments[0].scrollIntoView(true);", container)
-                            time.sleep(1)
-                            
-                            ad_data = self.extract_ad_data(container)
-                            if ad_data and ad_data['ad_text'] and ad_data['ad_text'] not in seen_texts:
-                                seen_texts.add(ad_data['ad_text'])
-                                ads_data.append(ad_data)
-                                logging.info(f"Found ad {len(ads_data)}: ID {ad_data['id']}")
-                                
-                                if len(ads_data) >= 5:
-                                    break
-                        except Exception as e:
-                            logging.debug(f"Error processing container: {str(e)}")
-                            continue
-                    
-                    if len(ads_data) >= 5:
-                        break
-                
-                if len(ads_data) < 5:
-                    driver.execute_script("window.scrollBy(0, 500);")
-                    time.sleep(2)
-                    new_height = driver.execute_script("return document.body.scrollHeight")
-                    if new_height == last_height:
-                        scroll_attempts += 1
-                    else:
-                        last_height = new_height
-                        scroll_attempts = 0
+            if collector is not None:
+                ads_data = self.collect_network_ads(driver, collector, sink, run_name, max_ads)
+                if not ads_data:
+                    logging.warning("No ads captured from network responses, falling back to the DOM")
+            if not ads_data:
+                ads_data = self.collect_dom_ads(driver, sink, run_name)
 
             if ads_data:
-                self.save_data(ads_data, [ad['ad_text'] for ad in ads_data], search_term)
+                with self.metrics.phase("save"):
+                    self.save_data(ads_data, [ad['ad_text'] for ad in ads_data], search_term)
                 return len(ads_data)
             else:
                 logging.error("No unique ads found")
@@ -549,8 +530,81 @@ class FacebookAdsScraper:
             logging.error(f"Error during scraping: {str(e)}")
             return 0
         finally:
+            sink.close()
             if driver:
                 driver.quit()
+            metrics_name = os.path.join(self.base_dir, f'{search_term}_metrics_{self.metrics.run_id}')
+            self.metrics.save(f'{metrics_name}.json', f'{metrics_name}.prom')
+            self.selectors.registry.save()
+
+    def collect_network_ads(self, driver, collector, sink, run_name, max_ads=200, max_idle_scrolls=5):
+        """Scroll the results and map every ad payload the page loads, without touching the cards."""
+        readiness = Readiness(driver, timeout=5)
+        ads_data = []
+
+        def keep(new_ads):
+            for ad_data in new_ads:
+                if ad_data['ad_text'] and len(ads_data) < max_ads:
+                    ads_data.append(ad_data)
+                    sink.append(run_name, [], ad_data)
+
+        with self.metrics.phase("extract_ads"):
+            keep(collector.collect_page_source())
+            keep(collector.poll())
+
+        idle_scrolls = 0
+        while len(ads_data) < max_ads and idle_scrolls < max_idle_scrolls:
+            driver.execute_script("window.scrollTo(0, document.body.scrollHeight);")
+            # network_idle would drain the performance log the collector reads, so wait on the DOM
+            with self.metrics.phase("wait"):
+                readiness.dom_quiet()
+            with self.metrics.phase("extract_ads"):
+                before = len(ads_data)
+                keep(collector.poll())
+            idle_scrolls = idle_scrolls + 1 if len(ads_data) == before else 0
+            logging.info(f"Captured {len(ads_data)} ads from {collector.responses_seen} GraphQL responses")
+
+        return ads_data
+
+    def extract_ad_batch(self, driver, containers):
+        """Extract a batch of cards in one script call, falling back to per-card extraction if the script fails."""
+        try:
+            return extract_ad_cards(driver, containers, engine=self.selectors)
+        except Exception as e:
+            logging.warning(f"Batch extraction failed, extracting {len(containers)} cards one by one: {str(e)}")
+            return [self.extract_ad_data(container) for container in containers]
+
+    def collect_dom_ads(self, driver, sink, run_name, max_ads=10):
+        """Extract ads as the feed inserts them; each scroll step's new cards cost one script call."""
+        ad_container_selectors = [
+            '.x1dr75xp.xh8yej3.x16md763',
+            '[data-testid="ad_container"]',
+            '[data-testid="ad_library_preview"]',
+            '._7jyg'
+        ]
+        harvester = FeedHarvester(driver, selector=', '.join(ad_container_selectors),
+                                  readiness=Readiness(driver, timeout=5))
+        ads_data = []
+        # Collapses reruns of the same ad whose copy differs only by emoji or small edits
+        seen_texts = NearDuplicateIndex()
+
+        for batch in harvester.harvest_batches():
+            with self.metrics.phase("extract_ads"):
+                records = self.extract_ad_batch(driver, [container for _, container in batch])
+            for (card_id, _), ad_data in zip(batch, records):
+                if ad_data and ad_data['ad_text'] and not seen_texts.is_duplicate(card_id, ad_data['ad_text']):
+                    ads_data.append(ad_data)
+                    sink.append(run_name, [], ad_data)
+                    logging.info(f"Found ad {len(ads_data)} (card {card_id}): ID {ad_data['id']}")
+
+                    if len(ads_data) >= max_ads:
+                        break
+            if len(ads_data) >= max_ads:
+                break
+
+        logging.info(f"Visited {harvester.cards_seen} cards over {harvester.scrolls} scrolls")
+        logging.debug(f"Selector stats: {json.dumps(self.selectors.summary())}")
+        return ads_data
 
 
 
@@ -585,6 +639,9 @@ class FacebookAdsScraper:
                 for i, text in enumerate(all_ad_text, 1):
                     f.write(f'Ad {i}:\n{text}\n\n')
             
+            # Upsert into the queryable warehouse alongside the per-run files
+            self.warehouse.upsert(ads_data, search_term=search_term)
+            
             logging.info(f"Saved {len(ads_data)} ads to {ads_filename}")
             logging.info(f"Saved ad text to {text_filename}")
             
@@ -0,0 +1,15 @@
+"""Make the shared helper modules in the repository root importable.
+
+The scrapers in this folder are run as plain scripts, so the repository root
+(where ``ads_warehouse``, ``crawl_coordinator`` and friends live) is not on
+``sys.path``. Import this module before any of those helpers::
+
+    import repo_root  # noqa: F401
+"""
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+if ROOT not in sys.path:
+    sys.path.append(ROOT)
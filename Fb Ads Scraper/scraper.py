@@ -4,20 +4,28 @@ from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.common.exceptions import TimeoutException, NoSuchElementException
 import pandas as pd
-import requests
 import json
 import time
 import os
 from datetime import datetime
+from functools import partial
 import urllib.parse
 import re
 import logging
-from PIL import Image
-from io import BytesIO
+
+import repo_root  # noqa: F401
+from ads_warehouse import AdsWarehouse
+from checkpoint_journal import CrawlJournal
+from crawl_coordinator import crawl, report_progress
+from creative_store import CreativeDownloader, CreativeStore
 
 class FacebookAdsDetailedScraper:
+    BASE_DIR = 'facebook_ads_data'
+    JOURNAL_FILE = os.path.join(BASE_DIR, 'crawl_journal.jsonl')
+
     def __init__(self, headless=False):
         """Initialize the scraper with browser options and setup directories."""
+        self.headless = headless
         self.options = webdriver.ChromeOptions()
         if headless:
             self.options.add_argument('--headless')
@@ -27,12 +35,22 @@ class FacebookAdsDetailedScraper:
         self.options.add_argument('--window-size=1920,1080')
         
         # Setup directories
-        self.base_dir = 'facebook_ads_data'
+        self.base_dir = self.BASE_DIR
         self.images_dir = os.path.join(self.base_dir, 'images')
         self.data_dir = os.path.join(self.base_dir, 'data')
+        self.journal_file = self.JOURNAL_FILE
+        self.warehouse = AdsWarehouse(os.path.join(self.base_dir, 'ads.db'))
         self.setup_directories()
         
-        # Setup logging
+        # Creatives download in the background into a content-addressed store under images/,
+        # with resized copies of known creatives flagged as variants
+        self.creatives = CreativeDownloader(CreativeStore(self.images_dir, perceptual=True))
+        self.pending_creatives = []
+        
+        self.setup_logging()
+
+    @staticmethod
+    def setup_logging():
         logging.basicConfig(
             filename='fb_ads_scraper.log',
             level=logging.INFO,
@@ -45,6 +63,11 @@ class FacebookAdsDetailedScraper:
             if not os.path.exists(directory):
                 os.makedirs(directory)
 
+    def close(self):
+        """Shut down the background image downloader and the warehouse connection."""
+        self.creatives.close()
+        self.warehouse.close()
+
     def setup_driver(self):
         """Set up and return a new webdriver instance."""
         return webdriver.Chrome(options=self.options)
@@ -55,19 +78,22 @@ class FacebookAdsDetailedScraper:
             EC.presence_of_element_located((by, selector))
         )
 
-    def download_image(self, url, domain, ad_id):
-        """Download and save image with error handling."""
-        try:
-            response = requests.get(url, timeout=10)
-            if response.status_code == 200:
-                img = Image.open(BytesIO(response.content))
-                filename = f"{domain}_{ad_id}_{int(time.time())}.jpg"
-                filepath = os.path.join(self.images_dir, filename)
-                img.save(filepath)
-                return filepath
-        except Exception as e:
-            logging.error(f"Error downloading image: {str(e)}")
-            return None
+    def queue_image(self, url, domain, ad_data):
+        """Hand an image to the background downloader without blocking extraction."""
+        future = self.creatives.submit(url, ad_data['ad_id'], domain)
+        self.pending_creatives.append((ad_data, future))
+
+    def resolve_images(self):
+        """Wait for queued images and fill in each ad's stored image paths."""
+        for ad_data, future in self.pending_creatives:
+            try:
+                path = future.result()
+            except Exception as e:
+                logging.error(f"Error downloading image: {str(e)}")
+                continue
+            if path:
+                ad_data['image_paths'].append(os.path.join(self.images_dir, path))
+        self.pending_creatives = []
 
     def extract_ad_details(self, ad_element, domain):
         """Extract all available details from an ad element."""
@@ -123,9 +149,7 @@ class FacebookAdsDetailedScraper:
                 for img in image_elements:
                     img_url = img.get_attribute('src')
                     if img_url:
-                        image_path = self.download_image(img_url, domain, ad_data['ad_id'])
-                        if image_path:
-                            ad_data['image_paths'].append(image_path)
+                        self.queue_image(img_url, domain, ad_data)
             except:
                 logging.warning("Could not extract images")
 
@@ -171,6 +195,7 @@ class FacebookAdsDetailedScraper:
                 
             last_height = new_height
             scrolls += 1
+            report_progress({"scrolls": scrolls})
 
     def save_ad_data(self, ads_data, domain):
         """Save the collected ad data to CSV and JSON formats."""
@@ -184,10 +209,14 @@ class FacebookAdsDetailedScraper:
         json_filename = os.path.join(self.data_dir, f'{domain}_ads_{timestamp}.json')
         with open(json_filename, 'w', encoding='utf-8') as f:
             json.dump(ads_data, f, ensure_ascii=False, indent=4)
+        
+        self.warehouse.upsert(ads_data, search_term=domain)
 
-    def scrape_domain(self, domain):
-        """Scrape all ads for a specific domain."""
-        driver = self.setup_driver()
+    def scrape_domain(self, domain, driver=None):
+        """Scrape all ads for a specific domain, on `driver` if given (left open) or a new one."""
+        own_driver = driver is None
+        if own_driver:
+            driver = self.setup_driver()
         ads_data = []
         
         try:
@@ -207,39 +236,68 @@ class FacebookAdsDetailedScraper:
                     ads_data.append(ad_data)
                     logging.info(f"Successfully scraped ad {ad_data['ad_id']} for {domain}")
             
-            # Save the collected data
+            # Save the collected data once its images have landed
+            self.resolve_images()
             if ads_data:
                 self.save_ad_data(ads_data, domain)
                 logging.info(f"Successfully saved {len(ads_data)} ads for {domain}")
             
         except Exception as e:
             logging.error(f"Error scraping domain {domain}: {str(e)}")
+            # Let the crawl journal record the domain as failed so a resumed run retries it
+            raise
         finally:
-            driver.quit()
+            self.pending_creatives = []
+            if own_driver:
+                driver.quit()
         
         return len(ads_data)
 
-    def run(self, input_file, delay_between_domains=10):
-        """Main method to run the scraper."""
+    @staticmethod
+    def report_domain(outcome):
+        """Print each domain's result as soon as its worker finishes it."""
+        if outcome.status == "done":
+            print(f"Scraped {outcome.result} ads for {outcome.domain}")
+        else:
+            print(f"Failed to scrape {outcome.domain}: {outcome.error}")
+
+    @classmethod
+    def run(cls, input_file, delay_between_domains=10, workers=4, headless=False):
+        """Main method to run the scraper.
+
+        Domains are spread over `workers` long-lived browsers. Together they
+        start at most one domain every `delay_between_domains` seconds.
+        Progress is checkpointed to the crawl journal, so a rerun after a
+        crash skips the domains already done. Only the workers build
+        scrapers; this process just coordinates them.
+        """
+        cls.setup_logging()
+        os.makedirs(cls.BASE_DIR, exist_ok=True)
+        journal = CrawlJournal(cls.JOURNAL_FILE)
         try:
             domains = pd.read_csv(input_file)['shop_domain'].tolist()
+            print(f"Scraping ads for {len(domains)} domains with {workers} workers...")
             
-            for domain in domains:
-                logging.info(f"Starting scrape for {domain}")
-                print(f"Scraping ads for {domain}...")
-                
-                num_ads = self.scrape_domain(domain)
-                print(f"Scraped {num_ads} ads for {domain}")
-                
-                time.sleep(delay_between_domains)
+            stats = crawl(
+                domains,
+                partial(cls, headless=headless),
+                workers=workers,
+                rate_per_minute=60 / delay_between_domains if delay_between_domains else None,
+                on_result=cls.report_domain,
+                journal=journal
+            )
+            logging.info(f"Crawl finished: {stats}")
+            if stats['skipped']:
+                print(f"Skipped {stats['skipped']} domains already scraped")
                 
             print("Scraping completed! Check the facebook_ads_data directory for results.")
             
         except Exception as e:
             logging.error(f"Error in main scraper execution: {str(e)}")
             print(f"An error occurred. Check fb_ads_scraper.log for details.")
+        finally:
+            journal.close()
 
 # Usage example
 if __name__ == "__main__":
-    scraper = FacebookAdsDetailedScraper(headless=False)
-    scraper.run("shop_domain.csv", delay_between_domains=10)
\ No newline at end of file
+    FacebookAdsDetailedScraper.run("shop_domain.csv", delay_between_domains=10, workers=4, headless=False)
\ No newline at end of file
@@ -4,13 +4,19 @@ from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.common.exceptions import TimeoutException, NoSuchElementException
 import pandas as pd
-import time
 import os
 from datetime import datetime
+from functools import partial
+
+import repo_root  # noqa: F401
+from checkpoint_journal import CrawlJournal
+from crawl_coordinator import crawl
+from readiness import Readiness
 
 class FacebookAdsLibraryScraper:
     def __init__(self, headless=False):  # Changed default to False for better debugging
         """Initialize the scraper with browser options."""
+        self.headless = headless
         self.options = webdriver.ChromeOptions()
         if headless:
             self.options.add_argument('--headless=new')  # Updated headless mode
@@ -25,14 +31,17 @@ class FacebookAdsLibraryScraper:
         # Files setup
         self.output_file = 'fb_ads_data.csv'
         self.log_file = 'scraping_log.txt'
+        self.journal_file = 'fb_ads_crawl_journal.jsonl'
         
     def setup_driver(self):
         """Set up and return a new webdriver instance."""
         return webdriver.Chrome(options=self.options)
     
-    def scrape_ads_data(self, domain):
-        """Scrape ads data for a specific domain."""
-        driver = self.setup_driver()
+    def scrape_ads_data(self, domain, driver=None):
+        """Scrape ads data for a specific domain, on `driver` if given (left open) or a new one."""
+        own_driver = driver is None
+        if own_driver:
+            driver = self.setup_driver()
         data = {'domain': domain, 'ads_count': 0, 'timestamp': datetime.now().strftime('%Y-%m-%d %H:%M:%S')}
         
         try:
@@ -42,8 +51,8 @@ class FacebookAdsLibraryScraper:
             print(f"\nAccessing {url}")
             driver.get(url)
             
-            # Wait longer for initial load
-            time.sleep(10)
+            # Wait for the library to render instead of a fixed 10 s
+            Readiness(driver, timeout=15).page_ready("fb_ad_library")
             
             # Try multiple selectors for the results count
             selectors = [
@@ -77,10 +86,13 @@ class FacebookAdsLibraryScraper:
         except Exception as e:
             print(f"Error scraping {domain}: {str(e)}")
             self.log_error(f"Error scraping {domain}: {str(e)}")
+            # Let the crawl journal record the domain as failed so a resumed run retries it
+            raise
             
         finally:
             print(f"Scraped {data['ads_count']} ads for {domain}")
-            driver.quit()
+            if own_driver:
+                driver.quit()
             
         return data
     
@@ -103,17 +115,36 @@ class FacebookAdsLibraryScraper:
         except Exception as e:
             print(f"Error writing to log file: {str(e)}")
 
-    def run(self, domains, delay_between_requests=15):  # Increased delay
-        """Main method to run the scraper."""
-        print(f"Starting to scrape {len(domains)} domains")
+    def export_result(self, outcome):
+        """Append each domain's row as soon as its worker finishes it."""
+        if outcome.status == "done":
+            self.export_to_csv(outcome.result)
+        else:
+            print(f"Failed to scrape {outcome.domain}, it will be retried on the next run")
+
+    def run(self, domains, delay_between_requests=15, workers=4):  # Increased delay
+        """Main method to run the scraper.
+
+        Domains are spread over `workers` long-lived browsers. Together they
+        start at most one request every `delay_between_requests` seconds.
+        Domains the crawl journal records as done are skipped, so a rerun
+        after a crash picks up where it stopped.
+        """
+        print(f"Starting to scrape {len(domains)} domains with {workers} workers")
         
-        for domain in domains:
-            print(f"\nScraping ads for {domain}...")
-            data = self.scrape_ads_data(domain)
-            self.export_to_csv(data)
-            time.sleep(delay_between_requests)  # Longer delay between requests
+        with CrawlJournal(self.journal_file) as journal:
+            stats = crawl(
+                domains,
+                partial(FacebookAdsLibraryScraper, headless=self.headless),
+                workers=workers,
+                rate_per_minute=60 / delay_between_requests if delay_between_requests else None,
+                on_result=self.export_result,
+                scrape_method="scrape_ads_data",
+                journal=journal
+            )
             
-        print("\nScraping completed!")
+        print(f"\nScraping completed! {stats['done']} domains scraped, {stats['failed']} failed, "
+              f"{stats['skipped']} already done")
 
 # Usage example
 if __name__ == "__main__":
@@ -125,4 +156,4 @@ if __name__ == "__main__":
     
     # Initialize and run the scraper
     scraper = FacebookAdsLibraryScraper(headless=False)  # Set to False to see the browser
-    scraper.run(test_domains, delay_between_requests=15)
\ No newline at end of file
+    scraper.run(test_domains, delay_between_requests=15, workers=2)
\ No newline at end of file
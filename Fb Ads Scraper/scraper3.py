@@ -10,15 +10,24 @@ import json
 import time
 import os
 from datetime import datetime
+from functools import partial
 import logging
 from PIL import Image
 from io import BytesIO
 
+import repo_root  # noqa: F401
+from feed_harvester import FeedHarvester
+from ads_warehouse import AdsWarehouse
+from checkpoint_journal import CrawlJournal
+from crawl_coordinator import crawl, report_progress
+from session_store import SessionStore
+
 class FacebookAdsDetailedScraper:
     def __init__(self, email, password, headless=False):
         """Initialize the scraper with login credentials and browser options."""
         self.email = email
         self.password = password
+        self.headless = headless
         
         self.options = webdriver.ChromeOptions()
         self.options = webdriver.ChromeOptions()
@@ -39,7 +48,10 @@ class FacebookAdsDetailedScraper:
         self.base_dir = 'facebook_ads_data'
         self.images_dir = os.path.join(self.base_dir, 'images')
         self.data_dir = os.path.join(self.base_dir, 'data')
+        self.journal_file = os.path.join(self.base_dir, 'crawl_journal.jsonl')
+        self.warehouse = AdsWarehouse(os.path.join(self.base_dir, 'ads.db'))
         self.setup_directories()
+        self.session_store = SessionStore(os.path.join(self.base_dir, 'fb_session.bin'))
         
         # Setup logging
         logging.basicConfig(
@@ -48,6 +60,10 @@ class FacebookAdsDetailedScraper:
             format='%(asctime)s - %(levelname)s - %(message)s'
         )
 
+    def close(self):
+        """Close the warehouse connection (crawl workers call this when they exit)."""
+        self.warehouse.close()
+
     def setup_directories(self):
         """Create necessary directories if they don't exist."""
         for directory in [self.base_dir, self.images_dir, self.data_dir]:
@@ -146,46 +162,46 @@ class FacebookAdsDetailedScraper:
             return None
 
     def scroll_and_load_ads(self, driver, max_scrolls=20):
-        """Scroll the page to load more ads."""
-        ad_elements = set()
-        scroll_count = 0
-        while scroll_count < max_scrolls:
-            driver.execute_script("window.scrollTo(0, document.body.scrollHeight);")
-            time.sleep(5)  # Increased wait time for content to load
-            current_ads = driver.find_elements(By.CSS_SELECTOR, 'div[role="article"]')  # Adjusted for dynamic elements
-            new_ads_count = len(set(current_ads) - ad_elements)
-            ad_elements.update(current_ads)
-            scroll_count += 1 if new_ads_count == 0 else 0
-            if scroll_count >= 3:  # No new ads loaded after 3 scrolls
-                break
-        return list(ad_elements)
+        """Scroll the page to load more ads, yielding each ad once as it is inserted."""
+        harvester = FeedHarvester(driver, selector='div[role="article"]', max_scrolls=max_scrolls,
+                                  on_progress=report_progress)
+        for _, ad_element in harvester.harvest():
+            yield ad_element
+        logging.info(f"Loaded {harvester.cards_seen} ads over {harvester.scrolls} scrolls")
 
 
-    def scrape_domain(self, domain):
-        """Scrape all ads for a specific domain."""
+    def setup_driver(self):
+        """Start a browser logged in to Facebook, reusing the stored session when possible."""
         driver = webdriver.Chrome(options=self.options)
+        try:
+            if not self.session_store.ensure(driver, self.login_to_facebook, self.email, verify=True):
+                raise Exception("Failed to login to Facebook")
+        except Exception:
+            driver.quit()
+            raise
+        return driver
+
+    def scrape_domain(self, domain, driver=None):
+        """Scrape all ads for a specific domain, on a logged-in `driver` if given (left open) or a new one."""
+        own_driver = driver is None
         ads_data = []
         
         try:
-            # Login first
-            if not self.login_to_facebook(driver):
-                raise Exception("Failed to login to Facebook")
+            if own_driver:
+                driver = self.setup_driver()
             
             # Navigate to Ad Library
             url = f"https://www.facebook.com/ads/library/?active_status=all&ad_type=all&country=ALL&q={domain}&sort_data[direction]=desc&sort_data[mode]=relevancy_monthly_grouped&search_type=keyword_unordered&media_type=all"
             driver.get(url)
             time.sleep(5)
             
-            # Load ads by scrolling
-            ad_elements = self.scroll_and_load_ads(driver)
-            logging.info(f"Found {len(ad_elements)} ads for {domain}")
-            
-            # Extract data from each ad
-            for ad_element in ad_elements:
+            # Extract each ad while scrolling, before the feed can recycle its element
+            for ad_element in self.scroll_and_load_ads(driver):
                 ad_data = self.extract_ad_details(ad_element)
                 if ad_data:
                     ad_data['domain'] = domain
                     ads_data.append(ad_data)
+            logging.info(f"Found {len(ads_data)} ads for {domain}")
             
             # Save the collected data
             if ads_data:
@@ -193,8 +209,11 @@ class FacebookAdsDetailedScraper:
                 
         except Exception as e:
             logging.error(f"Error scraping domain {domain}: {str(e)}")
+            # Let the crawl journal record the domain as failed so a resumed run retries it
+            raise
         finally:
-            driver.quit()
+            if own_driver and driver is not None:
+                driver.quit()
         
         return len(ads_data)
 
@@ -210,23 +229,44 @@ class FacebookAdsDetailedScraper:
         json_filename = os.path.join(self.data_dir, f'{domain}_ads_{timestamp}.json')
         with open(json_filename, 'w', encoding='utf-8') as f:
             json.dump(ads_data, f, ensure_ascii=False, indent=4)
+        
+        self.warehouse.upsert(ads_data, search_term=domain)
 
-    def run(self, input_file, delay_between_domains=10):
-        """Main method to run the scraper."""
+    def run(self, input_file, delay_between_domains=10, workers=4):
+        """Main method to run the scraper.
+
+        Domains are spread over `workers` long-lived, logged-in browsers.
+        Together they start at most one domain every `delay_between_domains`
+        seconds. Progress is checkpointed to the crawl journal, so a rerun
+        after a crash skips the domains already done.
+        """
+        journal = CrawlJournal(self.journal_file)
         try:
             # Read domains from CSV file
             domains = pd.read_csv(input_file)['shop_domain'].tolist()
+            print(f"Scraping ads for {len(domains)} domains with {workers} workers...")
             
             total_ads = 0
-            for domain in domains:
-                logging.info(f"Starting scrape for {domain}")
-                print(f"Scraping ads for {domain}...")
-                
-                num_ads = self.scrape_domain(domain)
-                total_ads += num_ads
-                print(f"Scraped {num_ads} ads for {domain}")
-                
-                time.sleep(delay_between_domains)
+            
+            def report_domain(outcome):
+                nonlocal total_ads
+                if outcome.status == "done":
+                    total_ads += outcome.result
+                    print(f"Scraped {outcome.result} ads for {outcome.domain}")
+                else:
+                    print(f"Failed to scrape {outcome.domain}: {outcome.error}")
+            
+            stats = crawl(
+                domains,
+                partial(FacebookAdsDetailedScraper, self.email, self.password, headless=self.headless),
+                workers=workers,
+                rate_per_minute=60 / delay_between_domains if delay_between_domains else None,
+                on_result=report_domain,
+                journal=journal
+            )
+            logging.info(f"Crawl finished: {stats}")
+            if stats['skipped']:
+                print(f"Skipped {stats['skipped']} domains already scraped")
             
             print(f"Scraping completed! Total ads scraped: {total_ads}")
             print("Check the facebook_ads_data directory for results.")
@@ -234,6 +274,9 @@ class FacebookAdsDetailedScraper:
         except Exception as e:
             logging.error(f"Error in main scraper execution: {str(e)}")
             print(f"An error occurred. Check fb_ads_scraper.log for details.")
+        finally:
+            journal.close()
+            self.close()
 
 if __name__ == "__main__":
     #credientials 
@@ -245,4 +288,4 @@ if __name__ == "__main__":
         password=FB_PASSWORD,
         headless=False
     )
-    scraper.run("shop_domains.csv", delay_between_domains=10)
\ No newline at end of file
+    scraper.run("shop_domains.csv", delay_between_domains=10, workers=4)
\ No newline at end of file
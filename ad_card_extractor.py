@@ -0,0 +1,204 @@
+import logging
+from datetime import datetime
+from typing import Dict, List, Optional, Sequence
+
+from selenium.webdriver.remote.webelement import WebElement
+
+from selector_engine import MATCHER_JS, SelectorEngine, compile_selector
+
+
+logger = logging.getLogger(__name__)
+
+# Fallback selectors per field, tried in order inside each card; the first one yielding a value wins
+FIELD_SELECTORS: Dict[str, List[str]] = {
+    "ad_text": [
+        '[data-testid="ad_text"]',
+        '[data-testid="ad_primary_text"]',
+        'div[role="article"] div[dir="auto"]',
+        '.x1cy8zhl div[dir="auto"]',
+        '.x1iorvi4 div[dir="auto"]',
+        '._7jyr',
+        '.xjkvuk6 div[dir="auto"]',
+        '.x1lliihq.xjkvuk6.x1cy8zhl',
+    ],
+    "company_name": [
+        'a[role="link"] span[dir="auto"]',
+        'h1[dir="auto"]',
+        '[data-testid="ad_page_name"]',
+        '.x1heor9g',
+        '._8jh2',
+        '.x1i10h78 span',
+    ],
+    "image_url": [
+        'img[data-testid="ad_image"]',
+        'video[data-testid="ad_video"]',
+        'img[role="img"]',
+        '.x1ey2m1c img',
+        '.x1iorvi4 img',
+        '.x1ll5gia.x19kjcj4.xh8yej3',
+        'video.x1lliihq',
+    ],
+    "platform": [
+        '[data-testid="ad_platforms"]',
+        '[aria-label*="Platform"]',
+        'div[role="row"] span',
+        '.x1xmf6yo span',
+        '.x1lliihq span:contains("Platforms")',
+    ],
+    "start_date": [
+        '[data-testid="ad_date"]',
+        'span:contains("Started running on")',
+        '.x1xmf6yo span:contains("Started")',
+        'span:contains("running on")',
+    ],
+    "id": [
+        '[data-testid="ad_id"]',
+        'span:contains("ID:")',
+        '.xt0e3qv:contains("ID:")',
+        'div:contains("ID:"):not(:has(*))',
+    ],
+    "metadata": [
+        '[data-testid="ad_metadata"]',
+        '.x1vh85ih',
+        '.x8bgqxi.x1n2onr6',
+        '.x1lliihq.x1iorvi4',
+        'div[role="row"]:not(:has(span:contains("Started")))',
+    ],
+}
+
+# Runs once per scroll step over every new card. Mirrors the per-field
+# fallback rules of FacebookAdsScraper.extract_ad_data, text-aware selectors
+# included, and reports which fallback won each field. The "Started running
+# on" and "ID:" text scans only run when no selector matched.
+EXTRACT_SCRIPT = MATCHER_JS + """
+var cards = arguments[0], selectors = arguments[1];
+var PLATFORMS = [['facebook', 'Facebook'], ['instagram', 'Instagram'], ['messenger', 'Messenger'], ['whatsapp', 'WhatsApp']];
+var won;
+
+function text(el) { return (el.innerText || el.textContent || '').trim(); }
+function firstValue(card, field, read) {
+    var list = selectors[field];
+    won[field] = -1;
+    for (var i = 0; i < list.length; i++) {
+        var value = read(__select(card, list[i]));
+        if (value) {
+            won[field] = i;
+            return value;
+        }
+    }
+    return '';
+}
+function matchText(card, pattern) {
+    var walker = document.createTreeWalker(card, NodeFilter.SHOW_TEXT);
+    var node, match;
+    while ((node = walker.nextNode())) {
+        if ((match = pattern.exec(node.nodeValue))) return match;
+    }
+    match = pattern.exec(text(card));
+    return match;
+}
+
+return cards.map(function (card) {
+    if (!card || !card.isConnected) return null;
+    var record = {};
+    won = record.won = {};
+
+    record.ad_text = firstValue(card, 'ad_text', function (els) {
+        var seen = [];
+        els.forEach(function (el) {
+            var t = text(el);
+            if (t.length > 10 && seen.indexOf(t) < 0) seen.push(t);
+        });
+        return seen.join(' ');
+    });
+
+    record.company_name = firstValue(card, 'company_name', function (els) {
+        return els.length ? text(els[0]) : '';
+    });
+
+    record.image_url = firstValue(card, 'image_url', function (els) {
+        return els.length ? (els[0].currentSrc || els[0].getAttribute('src') || '') : '';
+    });
+
+    record.platform = firstValue(card, 'platform', function (els) {
+        var found = [];
+        els.forEach(function (el) {
+            var t = (text(el) + ' ' + (el.getAttribute('aria-label') || '')).toLowerCase();
+            PLATFORMS.forEach(function (p) {
+                if (t.indexOf(p[0]) >= 0 && found.indexOf(p[1]) < 0) found.push(p[1]);
+            });
+        });
+        return found.join(', ');
+    });
+
+    record.start_date = firstValue(card, 'start_date', function (els) {
+        if (!els.length) return '';
+        var m = /Started running on\\s*([^\\n·]+)/.exec(text(els[0]));
+        return m ? m[1].trim() : text(els[0]);
+    });
+    if (!record.start_date) {
+        var started = matchText(card, /Started running on\\s*([^\\n·]+)/);
+        record.start_date = started ? started[1].trim() : '';
+    }
+
+    record.id = firstValue(card, 'id', function (els) {
+        if (!els.length) return '';
+        var m = /(?:ID:\\s*|^)(\\d+)/.exec(text(els[0]));
+        return m ? m[1] : '';
+    });
+    if (!record.id) {
+        var id = matchText(card, /(?:Library )?ID:\\s*(\\d+)/);
+        record.id = id ? id[1] : '';
+    }
+
+    record.metadata = firstValue(card, 'metadata', function (els) {
+        var parts = [];
+        els.forEach(function (el) {
+            var t = text(el);
+            if (t && record.ad_text.indexOf(t) < 0 && t.indexOf('Started') < 0) parts.push(t);
+        });
+        return parts.join(' | ');
+    });
+    return record;
+});
+"""
+
+
+def extract_ad_cards(
+    driver,
+    cards: Sequence[WebElement],
+    selectors: Dict[str, List[str]] = None,
+    engine: Optional[SelectorEngine] = None,
+) -> List[Dict]:
+    """Extract every card in `cards` with a single `execute_script` round trip.
+
+    Returns one record per card, shaped like `FacebookAdsScraper.extract_ad_data`
+    output, with None for cards that have left the DOM or yielded nothing usable.
+    With an `engine`, each field's fallbacks are tried in its registry's learned
+    order and every card's hits and misses are recorded back into it.
+    """
+    if not cards:
+        return []
+    engine = engine or SelectorEngine()
+    ordered = {field: engine.ordered(field, fallbacks) for field, fallbacks in (selectors or FIELD_SELECTORS).items()}
+    compiled = {field: [compile_selector(selector) for selector in fallbacks] for field, fallbacks in ordered.items()}
+    raw = driver.execute_script(EXTRACT_SCRIPT, list(cards), compiled) or []
+    scrape_date = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+    records = []
+    for values in raw:
+        for field, index in (values or {}).get("won", {}).items():
+            engine.registry.record_fallbacks(field, ordered[field], index if index >= 0 else None)
+        if not values or not (values["ad_text"] or values["id"] or values["start_date"]):
+            records.append(None)
+            continue
+        records.append({
+            "scrape_date": scrape_date,
+            "ad_text": values["ad_text"],
+            "metadata": values["metadata"],
+            "platform": values["platform"],
+            "start_date": values["start_date"],
+            "id": values["id"],
+            "company_name": values["company_name"],
+            "image_url": values["image_url"],
+        })
+    return records
@@ -0,0 +1,205 @@
+import base64
+import json
+import logging
+import re
+from collections import OrderedDict
+from datetime import datetime
+from typing import Any, Dict, Iterator, List, Optional
+
+from selenium.common.exceptions import WebDriverException
+
+
+logger = logging.getLogger(__name__)
+
+GRAPHQL_URL_MARKER = "/api/graphql"
+JSON_SCRIPT_RE = re.compile(r"<script[^>]*type=\"application/json\"[^>]*>(.*?)</script>", re.S)
+
+PLATFORM_NAMES = {
+    "FACEBOOK": "Facebook",
+    "INSTAGRAM": "Instagram",
+    "MESSENGER": "Messenger",
+    "WHATSAPP": "WhatsApp",
+    "AUDIENCE_NETWORK": "Audience Network",
+    "THREADS": "Threads",
+}
+
+
+def parse_graphql_payload(text: str) -> List[Any]:
+    """Decode a GraphQL response body, which may hold several JSON documents, one per line."""
+    text = text.strip()
+    if text.startswith("for (;;);"):
+        text = text[len("for (;;);"):]
+    documents = []
+    for line in text.splitlines():
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            documents.append(json.loads(line))
+        except ValueError:
+            logger.debug("Skipping undecodable GraphQL chunk")
+    return documents
+
+
+def iter_ad_nodes(value: Any) -> Iterator[Dict]:
+    """Yield every ad object (anything with `ad_archive_id` and a `snapshot`) in a payload."""
+    stack = [value]
+    while stack:
+        node = stack.pop()
+        if isinstance(node, dict):
+            if "ad_archive_id" in node and isinstance(node.get("snapshot"), dict):
+                yield node
+                continue
+            stack.extend(reversed(list(node.values())))
+        elif isinstance(node, list):
+            stack.extend(reversed(node))
+
+
+def _body_text(body: Any) -> str:
+    if isinstance(body, dict):
+        text = body.get("text")
+        if text is None and isinstance(body.get("markup"), dict):
+            text = re.sub(r"<[^>]+>", " ", body["markup"].get("__html", ""))
+        body = text
+    return re.sub(r"\s+", " ", body or "").strip()
+
+
+def _format_date(timestamp: Any) -> str:
+    """Render a unix timestamp the way the Ad Library prints 'Started running on ...'."""
+    if not timestamp:
+        return ""
+    try:
+        date = datetime.fromtimestamp(int(timestamp))
+    except (TypeError, ValueError, OSError):
+        return str(timestamp)
+    return f"{date:%b} {date.day}, {date.year}"
+
+
+def _first_media_url(snapshot: Dict) -> str:
+    for image in snapshot.get("images") or []:
+        url = image.get("original_image_url") or image.get("resized_image_url")
+        if url:
+            return url
+    for video in snapshot.get("videos") or []:
+        url = video.get("video_preview_image_url") or video.get("video_hd_url") or video.get("video_sd_url")
+        if url:
+            return url
+    for card in snapshot.get("cards") or []:
+        url = card.get("original_image_url") or card.get("resized_image_url") or card.get("video_preview_image_url")
+        if url:
+            return url
+    return ""
+
+
+def map_ad(node: Dict, scrape_date: Optional[str] = None) -> Dict[str, str]:
+    """Map one GraphQL ad object onto the record `FacebookAdsScraper.extract_ad_data` produces."""
+    snapshot = node["snapshot"]
+    cards = snapshot.get("cards") or []
+
+    ad_text = _body_text(snapshot.get("body"))
+    if not ad_text and cards:
+        ad_text = _body_text(cards[0].get("body"))
+
+    metadata_parts = []
+    for value in (snapshot.get("title"), snapshot.get("link_description"), snapshot.get("caption"), snapshot.get("cta_text")):
+        value = _body_text(value)
+        if value and value not in ad_text and value.lower() not in (part.lower() for part in metadata_parts):
+            metadata_parts.append(value)
+
+    platforms = [PLATFORM_NAMES.get(p, p.title()) for p in node.get("publisher_platform") or []]
+
+    return {
+        "scrape_date": scrape_date or datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+        "ad_text": ad_text,
+        "metadata": " | ".join(metadata_parts),
+        "platform": ", ".join(platforms),
+        "start_date": _format_date(node.get("start_date")),
+        "id": str(node["ad_archive_id"]),
+        "company_name": snapshot.get("page_name") or node.get("page_name") or "",
+        "image_url": _first_media_url(snapshot),
+    }
+
+
+class AdLibraryCollector:
+    """Collect Ad Library ads from the JSON the page itself loads.
+
+    The first page of results is embedded in the HTML as JSON script tags;
+    every further page arrives as a GraphQL XHR while scrolling. `poll`
+    reads the CDP network events from Chrome's performance log (the driver
+    must be started with `readiness.enable_network_tracking`) and fetches
+    each GraphQL response body with `Network.getResponseBody`. Ads are
+    deduplicated by library ID.
+    """
+
+    def __init__(self, driver, buffer_mb: int = 100):
+        self.driver = driver
+        self.ads: "OrderedDict[str, Dict]" = OrderedDict()
+        self.responses_seen = 0
+        self._pending: Dict[str, str] = {}
+        # Keep response bodies buffered long enough to read them after loadingFinished
+        self.driver.execute_cdp_cmd("Network.enable", {
+            "maxTotalBufferSize": buffer_mb * 1024 * 1024,
+            "maxResourceBufferSize": min(buffer_mb, 20) * 1024 * 1024,
+        })
+
+    def _add(self, documents: List[Any]) -> List[Dict]:
+        new_ads = []
+        scrape_date = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+        for document in documents:
+            for node in iter_ad_nodes(document):
+                ad = map_ad(node, scrape_date)
+                if ad["id"] not in self.ads:
+                    self.ads[ad["id"]] = ad
+                    new_ads.append(ad)
+        return new_ads
+
+    def collect_page_source(self) -> List[Dict]:
+        """Pick up the ads server-rendered into the current page."""
+        documents = []
+        for raw in JSON_SCRIPT_RE.findall(self.driver.page_source):
+            if "ad_archive_id" not in raw:
+                continue
+            try:
+                documents.append(json.loads(raw))
+            except ValueError:
+                continue
+        return self._add(documents)
+
+    def poll(self) -> List[Dict]:
+        """Read GraphQL responses finished since the last poll and return the new ads."""
+        finished = []
+        try:
+            entries = self.driver.get_log("performance")
+        except WebDriverException as e:
+            logger.warning(f"Performance log unavailable: {str(e)}")
+            return []
+
+        for entry in entries:
+            try:
+                message = json.loads(entry["message"])["message"]
+            except (KeyError, ValueError):
+                continue
+            method, params = message.get("method"), message.get("params", {})
+            if method == "Network.responseReceived":
+                url = params.get("response", {}).get("url", "")
+                if GRAPHQL_URL_MARKER in url:
+                    self._pending[params["requestId"]] = url
+            elif method == "Network.loadingFinished" and params.get("requestId") in self._pending:
+                finished.append(params["requestId"])
+            elif method == "Network.loadingFailed":
+                self._pending.pop(params.get("requestId"), None)
+
+        new_ads = []
+        for request_id in finished:
+            self._pending.pop(request_id, None)
+            try:
+                body = self.driver.execute_cdp_cmd("Network.getResponseBody", {"requestId": request_id})
+            except WebDriverException as e:
+                logger.debug(f"Response body for {request_id} no longer available: {str(e)}")
+                continue
+            self.responses_seen += 1
+            text = body.get("body", "")
+            if body.get("base64Encoded"):
+                text = base64.b64decode(text).decode("utf-8", errors="replace")
+            new_ads.extend(self._add(parse_graphql_payload(text)))
+        return new_ads
@@ -0,0 +1,301 @@
+import argparse
+import csv
+import glob
+import hashlib
+import json
+import logging
+import os
+import re
+import sqlite3
+import threading
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional
+
+from near_duplicates import AD_BLOCK_RE, normalize
+
+
+logger = logging.getLogger(__name__)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS ads (
+    ad_key TEXT PRIMARY KEY,
+    ad_id TEXT,
+    content_hash TEXT NOT NULL,
+    advertiser TEXT,
+    ad_text TEXT,
+    start_date TEXT,
+    platform TEXT,
+    image_url TEXT,
+    data TEXT,
+    first_seen TEXT NOT NULL,
+    last_seen TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS sightings (
+    ad_key TEXT NOT NULL REFERENCES ads(ad_key),
+    search_term TEXT NOT NULL,
+    seen_date TEXT NOT NULL,
+    PRIMARY KEY (ad_key, search_term, seen_date)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS ads_advertiser ON ads(advertiser COLLATE NOCASE);
+CREATE INDEX IF NOT EXISTS ads_start_date ON ads(start_date);
+CREATE INDEX IF NOT EXISTS ads_content_hash ON ads(content_hash);
+CREATE INDEX IF NOT EXISTS sightings_term_date ON sightings(search_term COLLATE NOCASE, seen_date);
+"""
+
+UPSERT_AD = """
+INSERT INTO ads (ad_key, ad_id, content_hash, advertiser, ad_text, start_date, platform, image_url, data, first_seen, last_seen)
+VALUES (:ad_key, :ad_id, :content_hash, :advertiser, :ad_text, :start_date, :platform, :image_url, :data, :seen_at, :seen_at)
+ON CONFLICT(ad_key) DO UPDATE SET
+    ad_id = COALESCE(NULLIF(excluded.ad_id, ''), ads.ad_id),
+    advertiser = COALESCE(NULLIF(excluded.advertiser, ''), ads.advertiser),
+    start_date = COALESCE(NULLIF(excluded.start_date, ''), ads.start_date),
+    platform = COALESCE(NULLIF(excluded.platform, ''), ads.platform),
+    image_url = COALESCE(NULLIF(excluded.image_url, ''), ads.image_url),
+    data = excluded.data,
+    first_seen = MIN(ads.first_seen, excluded.first_seen),
+    last_seen = MAX(ads.last_seen, excluded.last_seen)
+"""
+
+INSERT_SIGHTING = "INSERT OR IGNORE INTO sightings (ad_key, search_term, seen_date) VALUES (:ad_key, :search_term, :seen_date)"
+
+# Field names the different scrapers use for the same thing
+TEXT_FIELDS = ("ad_text", "ad_copy", "text_content")
+ADVERTISER_FIELDS = ("company_name", "page_name", "advertiser")
+ID_FIELDS = ("id", "ad_id", "library_id")
+IMAGE_FIELDS = ("image_url", "image_paths", "media_urls")
+
+DATE_FORMATS = ("%b %d, %Y", "%d %b %Y", "%B %d, %Y", "%d %B %Y", "%Y-%m-%d")
+DATE_RE = re.compile(r"([A-Z][a-z]{2,8} \d{1,2}, \d{4}|\d{1,2} [A-Z][a-z]{2,8} \d{4}|\d{4}-\d{2}-\d{2})")
+# Library IDs are long numbers; older DOM scrapes glued the card's other text onto them
+LIBRARY_ID_RE = re.compile(r"\d{6,}")
+FILE_TIMESTAMP_RE = re.compile(r"^(?P<term>.+?)_(?:ads|text)_(?P<ts>\d{8}_\d{6})\.(?:json|txt|csv)$")
+
+
+def parse_start_date(value: str) -> str:
+    """ISO date from the Ad Library's 'Started running on ...' wording, or '' if there is none."""
+    match = DATE_RE.search(value or "")
+    if not match:
+        return ""
+    for date_format in DATE_FORMATS:
+        try:
+            return datetime.strptime(match.group(1), date_format).date().isoformat()
+        except ValueError:
+            continue
+    return ""
+
+
+def _first(record: Dict, fields) -> str:
+    for field in fields:
+        value = record.get(field)
+        if isinstance(value, list):
+            value = value[0] if value else ""
+        if value and str(value).strip() not in ("", "Unknown"):
+            return str(value).strip()
+    return ""
+
+
+def content_hash(ad_text: str, advertiser: str, image_url: str = "") -> str:
+    """Identity of an ad without a library ID; cosmetic text differences don't change it."""
+    image_key = image_url.split("?")[0]
+    payload = "\x1f".join((normalize(ad_text), advertiser.strip().lower(), image_key))
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def to_row(record: Dict, seen_at: str) -> Dict:
+    """Map any scraper's ad record onto an `ads` row."""
+    ad_text = _first(record, TEXT_FIELDS)
+    advertiser = _first(record, ADVERTISER_FIELDS)
+    image_url = _first(record, IMAGE_FIELDS)
+    id_match = LIBRARY_ID_RE.search(_first(record, ID_FIELDS))
+    ad_id = id_match.group(0) if id_match else ""
+    digest = content_hash(ad_text, advertiser, image_url)
+    platform = record.get("platform") or ""
+    return {
+        "ad_key": f"id:{ad_id}" if ad_id else f"sha:{digest}",
+        "ad_id": ad_id,
+        "content_hash": digest,
+        "advertiser": advertiser,
+        "ad_text": ad_text,
+        "start_date": parse_start_date(record.get("start_date", "")),
+        "platform": ", ".join(platform) if isinstance(platform, list) else str(platform),
+        "image_url": image_url,
+        "data": json.dumps(record, ensure_ascii=False, default=str),
+        "seen_at": seen_at,
+    }
+
+
+class AdsWarehouse:
+    """SQLite store of every ad ever scraped, keyed by library ID or content hash.
+
+    Runs in WAL mode so readers never block the scrapers writing, and
+    several crawl processes can share one database. `add` buffers rows and
+    writes them `batch_size` at a time in a single transaction. Re-seeing
+    an ad only widens its `first_seen`/`last_seen` range. Each day an ad
+    shows up for a search term is recorded once in `sightings`, so
+    importing the same files twice changes nothing.
+    """
+
+    def __init__(self, path: str = "ads.db", batch_size: int = 500):
+        self.path = path
+        self.batch_size = batch_size
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        self.connection = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute("PRAGMA synchronous=NORMAL")
+        self.connection.executescript(SCHEMA)
+        self._lock = threading.Lock()
+        self._pending: List[Dict] = []
+
+    def add(self, record: Dict, search_term: str = "", seen_at: Optional[str] = None):
+        """Queue one ad; it is written with the next full batch or `flush`."""
+        row = to_row(record, seen_at or record.get("scrape_date") or datetime.now().strftime('%Y-%m-%d %H:%M:%S'))
+        row["search_term"] = search_term
+        row["seen_date"] = row["seen_at"][:10]
+        with self._lock:
+            self._pending.append(row)
+            if len(self._pending) >= self.batch_size:
+                self._write()
+
+    def upsert(self, records: Iterable[Dict], search_term: str = "", seen_at: Optional[str] = None) -> int:
+        """Write `records` now; returns how many were given."""
+        count = 0
+        for record in records:
+            self.add(record, search_term, seen_at)
+            count += 1
+        self.flush()
+        return count
+
+    def flush(self):
+        with self._lock:
+            self._write()
+
+    def _write(self):
+        if not self._pending:
+            return
+        rows, self._pending = self._pending, []
+        with self.connection:
+            self.connection.executemany(UPSERT_AD, rows)
+            self.connection.executemany(INSERT_SIGHTING, [row for row in rows if row["search_term"]])
+
+    def query(
+        self,
+        advertiser: Optional[str] = None,
+        search_term: Optional[str] = None,
+        since: Optional[str] = None,
+        until: Optional[str] = None,
+    ) -> List[Dict]:
+        """Ads matching every given filter; `since`/`until` bound the days they were seen."""
+        self.flush()
+        clauses, params = [], []
+        if advertiser:
+            clauses.append("ads.advertiser = ? COLLATE NOCASE")
+            params.append(advertiser)
+        if search_term or since or until:
+            sighting = ["sightings.ad_key = ads.ad_key"]
+            if search_term:
+                sighting.append("sightings.search_term = ? COLLATE NOCASE")
+                params.append(search_term)
+            if since:
+                sighting.append("sightings.seen_date >= ?")
+                params.append(since)
+            if until:
+                sighting.append("sightings.seen_date <= ?")
+                params.append(until)
+            clauses.append(f"EXISTS (SELECT 1 FROM sightings WHERE {' AND '.join(sighting)})")
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        cursor = self.connection.execute(
+            f"SELECT ad_key, ad_id, advertiser, ad_text, start_date, platform, image_url, first_seen, last_seen, "
+            f"(SELECT COUNT(DISTINCT seen_date) FROM sightings WHERE sightings.ad_key = ads.ad_key) AS days_seen "
+            f"FROM ads {where} ORDER BY last_seen DESC",
+            params
+        )
+        columns = [column[0] for column in cursor.description]
+        return [dict(zip(columns, row)) for row in cursor.fetchall()]
+
+    def close(self):
+        self.flush()
+        self.connection.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+def _file_context(path: str):
+    """Search term and scrape time encoded in a '{term}_ads_{YYYYmmdd_HHMMSS}' file name."""
+    match = FILE_TIMESTAMP_RE.match(os.path.basename(path))
+    if not match:
+        return os.path.splitext(os.path.basename(path))[0], None
+    seen_at = datetime.strptime(match.group("ts"), "%Y%m%d_%H%M%S").strftime('%Y-%m-%d %H:%M:%S')
+    return match.group("term"), seen_at
+
+
+def import_tree(warehouse: AdsWarehouse, data_dir: str) -> Dict[str, int]:
+    """Load a `facebook_ads_data` tree: ads_info/*.json, data/*.json|csv and ads_text/*.txt.
+
+    Text files are only read for runs whose JSON is missing, since both
+    hold the same ads.
+    """
+    counts = {"files": 0, "ads": 0}
+    runs_with_json = set()
+
+    for path in sorted(glob.glob(os.path.join(data_dir, "ads_info", "*.json")) + glob.glob(os.path.join(data_dir, "data", "*.json"))):
+        term, seen_at = _file_context(path)
+        try:
+            with open(path, encoding="utf-8") as f:
+                ads = json.load(f)
+        except (OSError, ValueError) as e:
+            logger.warning(f"Skipping {path}: {str(e)}")
+            continue
+        ads = [ad for ad in ads if isinstance(ad, dict)] if isinstance(ads, list) else []
+        counts["ads"] += warehouse.upsert(ads, term, seen_at)
+        counts["files"] += 1
+        runs_with_json.add((term, seen_at))
+
+    for path in sorted(glob.glob(os.path.join(data_dir, "data", "*.csv"))):
+        term, seen_at = _file_context(path)
+        if (term, seen_at) in runs_with_json:
+            continue
+        with open(path, encoding="utf-8", newline="") as f:
+            counts["ads"] += warehouse.upsert(csv.DictReader(f), term, seen_at)
+        counts["files"] += 1
+
+    for path in sorted(glob.glob(os.path.join(data_dir, "ads_text", "*.txt"))):
+        term, seen_at = _file_context(path)
+        if (term, seen_at) in runs_with_json:
+            continue
+        with open(path, encoding="utf-8", errors="replace") as f:
+            blocks = [block.strip() for block in AD_BLOCK_RE.split(f.read()) if block.strip()]
+        counts["ads"] += warehouse.upsert(({"ad_text": block} for block in blocks), term, seen_at)
+        counts["files"] += 1
+    return counts
+
+
+def main():
+    parser = argparse.ArgumentParser(description="SQLite warehouse of scraped ads.")
+    parser.add_argument("--db", default=os.path.join("facebook_ads_data", "ads.db"))
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    import_parser = subparsers.add_parser("import", help="load an existing facebook_ads_data tree")
+    import_parser.add_argument("data_dir", nargs="?", default="facebook_ads_data")
+
+    query_parser = subparsers.add_parser("query", help="list stored ads")
+    query_parser.add_argument("--advertiser")
+    query_parser.add_argument("--search-term")
+    query_parser.add_argument("--since", help="YYYY-MM-DD")
+    query_parser.add_argument("--until", help="YYYY-MM-DD")
+    args = parser.parse_args()
+
+    with AdsWarehouse(args.db) as warehouse:
+        if args.command == "import":
+            print(json.dumps(import_tree(warehouse, args.data_dir), indent=4))
+        else:
+            ads = warehouse.query(args.advertiser, args.search_term, args.since, args.until)
+            print(json.dumps(ads, indent=4, ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()
@@ -4,46 +4,73 @@ from selenium.webdriver.common.keys import Keys
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.common.exceptions import TimeoutException, NoSuchElementException
-import json
-import time
+
+from driver_pool import get_default_pool
+from fanout import TaskDrivers, run_concurrently
+from instrumentation import ScrapeMetrics, instrument_driver
+from jsonl_sink import JsonlSink, write_documents
+from readiness import Readiness
+from resource_blocking import apply_blocking
+from serp_cache import SerpCache, cached
+from serp_snapshot import parse_google_serp
 
 class SearchScraper:
-    def __init__(self):
-        self.options = webdriver.ChromeOptions()
-        self.options.add_argument('--headless')  # Run in headless mode
-        self.options.add_argument('--no-sandbox')
-        self.options.add_argument('--disable-dev-shm-usage')
-        self.driver = webdriver.Chrome(options=self.options)
+    def __init__(self, pool=None, cache=None, metrics=None, blocking="serp"):
+        # Lease a warm driver from the pool when one is given
+        self.pool = pool
+        self.cache = cache
+        self.blocking = blocking
+        self.metrics = metrics or ScrapeMetrics("app")
+        if pool is not None:
+            self.driver = pool.acquire()
+        else:
+            self.options = webdriver.ChromeOptions()
+            self.options.add_argument('--headless')  # Run in headless mode
+            self.options.add_argument('--no-sandbox')
+            self.options.add_argument('--disable-dev-shm-usage')
+            self.driver = webdriver.Chrome(options=self.options)
+        instrument_driver(self.driver, self.metrics)
+        # Only text and links are extracted, so skip images, fonts, media and trackers
+        apply_blocking(self.driver, blocking)
         self.wait = WebDriverWait(self.driver, 10)
+        self.readiness = Readiness(self.driver)
 
 
     
-    def google_search(self, query):
+    @cached("google")
+    def google_search(self, query, snapshot=True):
+        """Search Google. With snapshot=True the page is fetched once and parsed offline."""
 
         try: 
 
-            self.driver.get('https://www.google.com')
+            with self.metrics.phase("navigate"):
+                self.driver.get('https://www.google.com')
             
-            # Accept cookies if prompted ...
-            try:
-                cookie_button = self.wait.until(
-                    EC.presence_of_element_located((By.XPATH, "//button[contains(., 'Accept all')]"))
-                )
-                cookie_button.click()
-            except TimeoutException:
-                pass
+                # Accept cookies if prompted ...
+                try:
+                    cookie_button = self.wait.until(
+                        EC.presence_of_element_located((By.XPATH, "//button[contains(., 'Accept all')]"))
+                    )
+                    cookie_button.click()
+                except TimeoutException:
+                    pass
 
             
-            search_box = self.wait.until(
+                search_box = self.wait.until(
+
+                    EC.presence_of_element_located((By.NAME, "q"))
+                )
 
-                EC.presence_of_element_located((By.NAME, "q"))
-            )
+                search_box.send_keys(query)
+                search_box.send_keys(Keys.RETURN)
 
-            search_box.send_keys(query)
-            search_box.send_keys(Keys.RETURN)
 
+            with self.metrics.phase("wait"):
+                self.readiness.page_ready("google_serp")
 
-            time.sleep(5)
+            # One page_source round trip instead of one per field
+            if snapshot:
+                return parse_google_serp(self.driver.page_source, query, phase=self.metrics.phase)
 
             results = {
             "searchParameters": {
@@ -57,104 +84,106 @@ class SearchScraper:
             "organic": []
             }
 
-            try:
-                kg_div = self.driver.find_element(By.ID, "kp-wp-tab-overview")
-
-                #  Extract main knowledge graph info
-                title = kg_div.find_element(By.TAG_NAME, "h2").text
-
-                # Try to get type/category
+            with self.metrics.phase("extract_kg"):
                 try:
-                    type_element = kg_div.find_element(By.CLASS_NAME, "wwUB2c")
-                    entity_type = type_element.text
-                except NoSuchElementException:
-                    entity_type = ""
+                    kg_div = self.driver.find_element(By.ID, "kp-wp-tab-overview")
 
+                    #  Extract main knowledge graph info
+                    title = kg_div.find_element(By.TAG_NAME, "h2").text
 
-                # Try to get image
-                try:
-                    img_element = kg_div.find_element(By.CLASS_NAME, "kc-vh")
-                    image_url = img_element.get_attribute("src")
-                except NoSuchElementException:
-                    image_url = ""
+                    # Try to get type/category
+                    try:
+                        type_element = kg_div.find_element(By.CLASS_NAME, "wwUB2c")
+                        entity_type = type_element.text
+                    except NoSuchElementException:
+                        entity_type = ""
 
 
-                # Try to get description and source
-                try:
-                    desc_element = kg_div.find_element(By.CLASS_NAME, "kno-rdesc")
-                    description = desc_element.find_element(By.TAG_NAME, "span").text
-                    desc_source = desc_element.find_element(By.TAG_NAME, "a").text
-                    desc_link = desc_element.find_element(By.TAG_NAME, "a").get_attribute("href")
-                except NoSuchElementException:
-                    description = ""
-                    desc_source = ""
-                    desc_link = ""
-
-                results["knowledgeGraph"] = {
-                        "title": title,
-                        "type": entity_type,
-                        "imageUrl": image_url,
-                        "description": description,
-                        "descriptionSource": desc_source,
-                        "descriptionLink": desc_link,
-                        "attributes": {}
-                }
-                # Extract website if present
-                try:
-                    website_element = kg_div.find_element(By.CSS_SELECTOR, "a[data-attrid='kc:/common/topic:official website']")
-                    results["knowledgeGraph"]["website"] = website_element.get_attribute("href")
-                except NoSuchElementException:
-                    pass
+                    # Try to get image
+                    try:
+                        img_element = kg_div.find_element(By.CLASS_NAME, "kc-vh")
+                        image_url = img_element.get_attribute("src")
+                    except NoSuchElementException:
+                        image_url = ""
 
 
-                attributes = kg_div.find_elements(By.CLASS_NAME, "rVusze")
-                for attr in attributes:
+                    # Try to get description and source
                     try:
-                        key = attr.find_element(By.CLASS_NAME, "w8qArf").text
-                        value = attr.find_element(By.CLASS_NAME, "LrzXr").text
-                        results["knowledgeGraph"]["attributes"][key] = value
+                        desc_element = kg_div.find_element(By.CLASS_NAME, "kno-rdesc")
+                        description = desc_element.find_element(By.TAG_NAME, "span").text
+                        desc_source = desc_element.find_element(By.TAG_NAME, "a").text
+                        desc_link = desc_element.find_element(By.TAG_NAME, "a").get_attribute("href")
                     except NoSuchElementException:
-                        continue
+                        description = ""
+                        desc_source = ""
+                        desc_link = ""
+
+                    results["knowledgeGraph"] = {
+                            "title": title,
+                            "type": entity_type,
+                            "imageUrl": image_url,
+                            "description": description,
+                            "descriptionSource": desc_source,
+                            "descriptionLink": desc_link,
+                            "attributes": {}
+                    }
+                    # Extract website if present
+                    try:
+                        website_element = kg_div.find_element(By.CSS_SELECTOR, "a[data-attrid='kc:/common/topic:official website']")
+                        results["knowledgeGraph"]["website"] = website_element.get_attribute("href")
+                    except NoSuchElementException:
+                        pass
 
-            except NoSuchElementException:
-                pass
 
+                    attributes = kg_div.find_elements(By.CLASS_NAME, "rVusze")
+                    for attr in attributes:
+                        try:
+                            key = attr.find_element(By.CLASS_NAME, "w8qArf").text
+                            value = attr.find_element(By.CLASS_NAME, "LrzXr").text
+                            results["knowledgeGraph"]["attributes"][key] = value
+                        except NoSuchElementException:
+                            continue
 
+                except NoSuchElementException:
+                    pass
 
-        #Extract the orginc result with sitelinks  
 
-            organic_results = self.driver.find_elements(By.CLASS_NAME, "g")
 
-            for position, result in enumerate(organic_results, 1):
-                try:
-                    title_element = result.find_element(By.TAG_NAME, "h3")
-                    link_element = result.find_element(By.TAG_NAME, "a")
-                    snippet_element = result.find_element(By.CLASS_NAME, "VwiC3b")
-                    
-                    organic_result = {
-                        "title": title_element.text,
-                        "link": link_element.get_attribute("href"),
-                        "snippet": snippet_element.text,
-                        "position": position
-                    }
+        #Extract the orginc result with sitelinks  
 
+            with self.metrics.phase("extract_organic"):
+                organic_results = self.driver.find_elements(By.CLASS_NAME, "g")
+
+                for position, result in enumerate(organic_results, 1):
                     try:
-                        sitelinks_table = result.find_element(By.CLASS_NAME, "PAYrJc")
-                        sitelink_elements = sitelinks_table.find_elements(By.TAG_NAME, "a")
+                        title_element = result.find_element(By.TAG_NAME, "h3")
+                        link_element = result.find_element(By.TAG_NAME, "a")
+                        snippet_element = result.find_element(By.CLASS_NAME, "VwiC3b")
+                    
+                        organic_result = {
+                            "title": title_element.text,
+                            "link": link_element.get_attribute("href"),
+                            "snippet": snippet_element.text,
+                            "position": position
+                        }
+
+                        try:
+                            sitelinks_table = result.find_element(By.CLASS_NAME, "PAYrJc")
+                            sitelink_elements = sitelinks_table.find_elements(By.TAG_NAME, "a")
                         
-                        if sitelink_elements:
-                            organic_result["sitelinks"] = []
-                            for sitelink in sitelink_elements:
-                                organic_result["sitelinks"].append({
-                                    "title": sitelink.text,
-                                    "link": sitelink.get_attribute("href")
-                                })
+                            if sitelink_elements:
+                                organic_result["sitelinks"] = []
+                                for sitelink in sitelink_elements:
+                                    organic_result["sitelinks"].append({
+                                        "title": sitelink.text,
+                                        "link": sitelink.get_attribute("href")
+                                    })
+                        except NoSuchElementException:
+                            pass
+
+                        results["organic"].append(organic_result)
                     except NoSuchElementException:
-                        pass
-
-                    results["organic"].append(organic_result)
-                except NoSuchElementException:
-                    continue
+                        continue
 
             return results
         
@@ -248,28 +277,31 @@ class SearchScraper:
     #     except Exception as e:
     #         return {"error": str(e)}
 
+    @cached("youtube")
     def youtube_search(self, query):
         try:
-            self.driver.get('https://www.youtube.com')
+            with self.metrics.phase("navigate"):
+                self.driver.get('https://www.youtube.com')
             
-            # Accept cookies if prompted
-            try:
-                cookie_button = self.wait.until(
-                    EC.presence_of_element_located((By.XPATH, "//button[contains(., 'Accept all')]"))
-                )
-                cookie_button.click()
-            except TimeoutException:
-                pass
+                # Accept cookies if prompted
+                try:
+                    cookie_button = self.wait.until(
+                        EC.presence_of_element_located((By.XPATH, "//button[contains(., 'Accept all')]"))
+                    )
+                    cookie_button.click()
+                except TimeoutException:
+                    pass
 
-            # Perform search
-            search_box = self.wait.until(
-                EC.presence_of_element_located((By.NAME, "search_query"))
-            )
-            search_box.send_keys(query)
-            search_box.send_keys(Keys.RETURN)
+                # Perform search
+                search_box = self.wait.until(
+                    EC.presence_of_element_located((By.NAME, "search_query"))
+                )
+                search_box.send_keys(query)
+                search_box.send_keys(Keys.RETURN)
 
             # Wait for results
-            time.sleep(2)
+            with self.metrics.phase("wait"):
+                self.readiness.page_ready("youtube_results")
 
             results = {
                 "searchParameters": {
@@ -281,40 +313,44 @@ class SearchScraper:
             }
 
             # Extract video results
-            video_elements = self.driver.find_elements(By.TAG_NAME, "ytd-video-renderer")
-            for position, video in enumerate(video_elements, 1):
-                try:
-                    title_element = video.find_element(By.ID, "video-title")
-                    channel_element = video.find_element(By.CLASS_NAME, "ytd-channel-name")
+            with self.metrics.phase("extract_organic"):
+                video_elements = self.driver.find_elements(By.TAG_NAME, "ytd-video-renderer")
+                for position, video in enumerate(video_elements, 1):
+                    try:
+                        title_element = video.find_element(By.ID, "video-title")
+                        channel_element = video.find_element(By.CLASS_NAME, "ytd-channel-name")
                     
-                    video_data = {
-                        "title": title_element.text,
-                        "link": title_element.get_attribute("href"),
-                        "channel": channel_element.text,
-                        "position": position
-                    }
-                    results["videos"].append(video_data)
-                except NoSuchElementException:
-                    continue
+                        video_data = {
+                            "title": title_element.text,
+                            "link": title_element.get_attribute("href"),
+                            "channel": channel_element.text,
+                            "position": position
+                        }
+                        results["videos"].append(video_data)
+                    except NoSuchElementException:
+                        continue
 
             return results
 
         except Exception as e:
             return {"error": str(e)}
 
+    @cached("bing")
     def bing_search(self, query):
         try:
-            self.driver.get('https://www.bing.com')
+            with self.metrics.phase("navigate"):
+                self.driver.get('https://www.bing.com')
             
-            # Perform search
-            search_box = self.wait.until(
-                EC.presence_of_element_located((By.NAME, "q"))
-            )
-            search_box.send_keys(query)
-            search_box.send_keys(Keys.RETURN)
+                # Perform search
+                search_box = self.wait.until(
+                    EC.presence_of_element_located((By.NAME, "q"))
+                )
+                search_box.send_keys(query)
+                search_box.send_keys(Keys.RETURN)
 
             # Wait for results
-            time.sleep(2)
+            with self.metrics.phase("wait"):
+                self.readiness.page_ready("bing_serp")
 
             results = {
                 "searchParameters": {
@@ -326,22 +362,23 @@ class SearchScraper:
             }
 
             # Extract organic results
-            organic_results = self.driver.find_elements(By.CLASS_NAME, "b_algo")
-            for position, result in enumerate(organic_results, 1):
-                try:
-                    title_element = result.find_element(By.TAG_NAME, "h2")
-                    link_element = title_element.find_element(By.TAG_NAME, "a")
-                    snippet_element = result.find_element(By.CLASS_NAME, "b_caption")
+            with self.metrics.phase("extract_organic"):
+                organic_results = self.driver.find_elements(By.CLASS_NAME, "b_algo")
+                for position, result in enumerate(organic_results, 1):
+                    try:
+                        title_element = result.find_element(By.TAG_NAME, "h2")
+                        link_element = title_element.find_element(By.TAG_NAME, "a")
+                        snippet_element = result.find_element(By.CLASS_NAME, "b_caption")
                     
-                    organic_result = {
-                        "title": title_element.text,
-                        "link": link_element.get_attribute("href"),
-                        "snippet": snippet_element.text,
-                        "position": position
-                    }
-                    results["organic"].append(organic_result)
-                except NoSuchElementException:
-                    continue
+                        organic_result = {
+                            "title": title_element.text,
+                            "link": link_element.get_attribute("href"),
+                            "snippet": snippet_element.text,
+                            "position": position
+                        }
+                        results["organic"].append(organic_result)
+                    except NoSuchElementException:
+                        continue
 
             return results
 
@@ -349,34 +386,72 @@ class SearchScraper:
             return {"error": str(e)}
 
     def close(self):
-        self.driver.quit()
+        if self.pool is not None:
+            self.pool.release(self.driver)
+        else:
+            self.driver.quit()
+
+def search_all(query, pool=None, timeout=60, cache=None, sink=None, document="app.json", metrics=None):
+    """Run the Google, YouTube and Bing searches concurrently, one leased driver each.
+
+    With a sink, each engine's result is streamed to it as soon as it finishes.
+    All engines record into `metrics` when one is given.
+    """
+    pool = pool or get_default_pool(size=3)
+    drivers = TaskDrivers(pool)
+
+    def engine(name, method_name):
+        def task():
+            scraper = SearchScraper(pool=pool, cache=cache, metrics=metrics)
+            drivers.track(name, scraper.driver)
+            try:
+                result = getattr(scraper, method_name)(query)
+            finally:
+                drivers.untrack(name)
+                scraper.close()
+            if drivers.abandoned(name):
+                return result
+            if sink is not None:
+                with scraper.metrics.phase("save"):
+                    sink.set(document, [name], result)
+            return result
+        return task
+
+    def timed_out(name):
+        drivers.abandon(name)
+        return failed(name, f"{name} timed out")
+
+    def failed(name, reason):
+        # Record the failure explicitly so the rebuilt document never shows a stale or missing engine
+        result = {"error": reason}
+        if sink is not None:
+            sink.set(document, [name], result)
+        return result
+
+    return run_concurrently({
+        "google": engine("google", "google_search"),
+        "youtube": engine("youtube", "youtube_search"),
+        "bing": engine("bing", "bing_search")
+    }, timeout=timeout,
+        on_timeout=timed_out,
+        on_error=lambda name, e: failed(name, str(e)))
 
 # Example usage
 def main():
-    scraper = SearchScraper()
     query = "apple inc"
     
-    try:
-        # Perform searches
-        google_results = scraper.google_search(query)
-        youtube_results = scraper.youtube_search(query)
-        bing_results = scraper.bing_search(query)
-        
-        # Combine results
-        all_results = {
-            "google": google_results,
-            "youtube": youtube_results,
-            "bing": bing_results
-        }
-        
-        # Save results to file
-        with open('app.json', 'w', encoding='utf-8') as f:
-            json.dump(all_results, f, ensure_ascii=False, indent=4)
-            
-        print("Search results have been saved to search_results.json")
+    # Perform searches; repeated queries are served from the local cache
+    cache = SerpCache()
+    metrics = ScrapeMetrics("app")
+    with JsonlSink('app.jsonl') as sink:
+        search_all(query, cache=cache, sink=sink, metrics=metrics)
+    print(f"Cache: {cache.stats()}")
+    metrics.save('app_metrics.json', 'app_metrics.prom')
+    
+    # Rebuild app.json from the streamed records
+    write_documents('app.jsonl')
         
-    finally:
-        scraper.close()
+    print("Search results have been saved to search_results.json")
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -0,0 +1,160 @@
+import json
+import logging
+import os
+import threading
+import time
+from typing import Dict, Iterable, List, Optional
+
+
+logger = logging.getLogger(__name__)
+
+PENDING = "pending"
+IN_PROGRESS = "in_progress"
+DONE = "done"
+FAILED = "failed"
+STATES = (PENDING, IN_PROGRESS, DONE, FAILED)
+
+
+def _append_line(path: str, line: str):
+    """Append `line` to a text file, starting a new line if the file lacks a trailing newline."""
+    with open(path, "ab+") as f:
+        f.seek(0, os.SEEK_END)
+        if f.tell():
+            f.seek(-1, os.SEEK_END)
+            if f.read(1) != b"\n":
+                f.write(b"\n")
+        f.write(line.encode("utf-8") + b"\n")
+
+
+def _drop_torn_tail(path: str) -> int:
+    """Truncate a final line left without its newline by a crash; returns the bytes dropped."""
+    if not os.path.exists(path):
+        return 0
+    with open(path, "rb+") as f:
+        size = f.seek(0, os.SEEK_END)
+        end = size
+        while end:
+            step = min(4096, end)
+            f.seek(end - step)
+            newline = f.read(step).rfind(b"\n")
+            if newline != -1:
+                end = end - step + newline + 1
+                break
+            end -= step
+        if end != size:
+            f.truncate(end)
+            f.flush()
+            os.fsync(f.fileno())
+        return size - end
+
+
+class CrawlJournal:
+    """Append-only, fsynced record of per-domain crawl state.
+
+    Every transition is one JSON line, flushed and fsynced before `mark`
+    returns, so after a crash the journal still holds everything up to
+    the last finished write. Replaying it gives each domain's latest
+    state, error and scroll cursor. A torn final line is skipped on load
+    and cut off before new records are appended, so the first record of a
+    resumed run is never glued onto it.
+
+    `done_list` is an optional plain-text file with one completed domain
+    per line (the scrapers' `scraped_domains.txt`). Domains listed there
+    count as done, and each newly finished domain is added to it.
+    """
+
+    def __init__(self, path: str, done_list: Optional[str] = None):
+        self.path = path
+        self.done_list = done_list
+        self._lock = threading.Lock()
+        self.states: Dict[str, Dict] = {}
+        self.cursors: Dict[str, Dict] = {}
+        self._load()
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        dropped = _drop_torn_tail(path)
+        if dropped:
+            logger.warning(f"Dropped a torn {dropped}-byte record from the end of {self.path}")
+        self._file = open(path, "a", encoding="utf-8")
+
+    def _load(self):
+        if self.done_list and os.path.exists(self.done_list):
+            with open(self.done_list, encoding="utf-8") as f:
+                for line in f:
+                    domain = line.strip()
+                    if domain:
+                        self.states[domain] = {"domain": domain, "state": DONE}
+
+        if not os.path.exists(self.path):
+            return
+        with open(self.path, encoding="utf-8") as f:
+            for line_number, line in enumerate(f, 1):
+                if not line.strip():
+                    continue
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    record = None
+                if not isinstance(record, dict) or record.get("state") not in STATES or "domain" not in record:
+                    logger.warning(f"Ignoring unreadable journal line {line_number} in {self.path}")
+                    continue
+                self._apply(record)
+
+    def _apply(self, record: Dict):
+        self.states[record["domain"]] = record
+        if record["state"] == DONE:
+            self.cursors.pop(record["domain"], None)
+        elif record.get("cursor") is not None:
+            self.cursors[record["domain"]] = record["cursor"]
+
+    def mark(self, domain: str, state: str, error: Optional[str] = None, cursor: Optional[Dict] = None):
+        """Durably record `domain` entering `state`."""
+        if state not in STATES:
+            raise ValueError(f"Unknown crawl state: {state}")
+        record = {"ts": time.time(), "domain": domain, "state": state}
+        if error is not None:
+            record["error"] = error
+        if cursor is not None:
+            record["cursor"] = cursor
+        with self._lock:
+            self._file.write(json.dumps(record, ensure_ascii=False) + "\n")
+            self._file.flush()
+            os.fsync(self._file.fileno())
+            self._apply(record)
+            if state == DONE and self.done_list:
+                _append_line(self.done_list, domain)
+
+    def state(self, domain: str) -> str:
+        return self.states.get(domain, {}).get("state", PENDING)
+
+    def cursor(self, domain: str) -> Optional[Dict]:
+        """The last scroll cursor recorded for `domain`, if any."""
+        return self.cursors.get(domain)
+
+    def remaining(self, domains: Iterable[str]) -> List[str]:
+        """`domains` minus those already done, in their original order, without repeats."""
+        seen = set()
+        remaining = []
+        for domain in domains:
+            if domain in seen or self.state(domain) == DONE:
+                continue
+            seen.add(domain)
+            remaining.append(domain)
+        return remaining
+
+    def summary(self) -> Dict[str, int]:
+        counts = {state: 0 for state in STATES}
+        for record in self.states.values():
+            counts[record["state"]] += 1
+        return counts
+
+    def close(self):
+        with self._lock:
+            if not self._file.closed:
+                self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
@@ -0,0 +1,209 @@
+import logging
+import multiprocessing
+import queue
+import time
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Iterable, Optional
+
+from checkpoint_journal import CrawlJournal, DONE, FAILED, IN_PROGRESS
+
+
+logger = logging.getLogger(__name__)
+
+# Set inside worker processes while a domain is being scraped
+_progress_hook: Optional[Callable[[Dict], None]] = None
+
+
+def report_progress(cursor: Dict):
+    """Record how far the current domain has got (e.g. cards and scrolls so far).
+
+    A no-op outside a `crawl` worker, so scrapers can call it unconditionally.
+    """
+    if _progress_hook is not None:
+        _progress_hook(cursor)
+
+
+class RateBudget:
+    """Request pacing shared by every worker process.
+
+    Hands out evenly spaced start slots, so all workers together make at
+    most `rate_per_minute` requests per minute however many there are.
+    """
+
+    def __init__(self, rate_per_minute: Optional[float], context=None):
+        context = context or multiprocessing.get_context()
+        self.interval = 60.0 / rate_per_minute if rate_per_minute else 0.0
+        self._next_slot = context.Value("d", 0.0, lock=False)
+        self._lock = context.Lock()
+
+    def acquire(self) -> float:
+        """Block until this caller's slot; returns the time waited."""
+        if not self.interval:
+            return 0.0
+        with self._lock:
+            now = time.time()
+            slot = max(now, self._next_slot.value)
+            self._next_slot.value = slot + self.interval
+        wait = slot - now
+        if wait > 0:
+            time.sleep(wait)
+        return wait
+
+
+@dataclass
+class DomainResult:
+    domain: str
+    status: str  # "in_progress", "done" or "failed"
+    result: Any = None
+    error: Optional[str] = None
+    worker: int = 0
+    elapsed_s: float = 0.0
+
+
+def _worker_main(worker_id, scraper_factory, scrape_method, driver_method, tasks, results, budget, startup_lock):
+    """Long-lived worker: one scraper and one browser for every domain it is handed.
+
+    Browsers start one at a time under `startup_lock`, so when starting one
+    means logging in, only the first worker logs in and stores the session;
+    the others then find it and reuse it instead of logging in concurrently.
+    """
+    global _progress_hook
+    scraper = scraper_factory()
+    driver = None
+    try:
+        while True:
+            domain = tasks.get()
+            if domain is None:
+                break
+            budget.acquire()
+            start = time.time()
+            results.put(DomainResult(domain, IN_PROGRESS, worker=worker_id))
+            _progress_hook = lambda cursor, domain=domain: results.put(
+                DomainResult(domain, IN_PROGRESS, cursor, worker=worker_id)
+            )
+            try:
+                if driver is None:
+                    with startup_lock:
+                        driver = getattr(scraper, driver_method)()
+                result = getattr(scraper, scrape_method)(domain, driver=driver)
+                results.put(DomainResult(domain, DONE, result, None, worker_id, time.time() - start))
+            except Exception as e:
+                results.put(DomainResult(domain, FAILED, None, str(e), worker_id, time.time() - start))
+                # Start the next domain on a fresh browser in case this one is wedged
+                if driver is not None:
+                    try:
+                        driver.quit()
+                    except Exception:
+                        pass
+                    driver = None
+            finally:
+                _progress_hook = None
+    finally:
+        if driver is not None:
+            driver.quit()
+        if hasattr(scraper, "close"):
+            scraper.close()
+
+
+def crawl(
+    domains: Iterable[str],
+    scraper_factory: Callable[[], Any],
+    workers: int = 4,
+    rate_per_minute: Optional[float] = 30,
+    on_result: Optional[Callable[[DomainResult], None]] = None,
+    scrape_method: str = "scrape_domain",
+    driver_method: str = "setup_driver",
+    journal: Optional[CrawlJournal] = None,
+) -> Dict[str, Any]:
+    """Scrape `domains` over `workers` browser processes under one global rate budget.
+
+    Each worker builds its scraper with `scraper_factory()` (which must be
+    picklable), starts one browser with `scraper.<driver_method>()` and calls
+    `scraper.<scrape_method>(domain, driver=driver)` for every domain it
+    takes from the shared queue, then calls `scraper.close()` if it exists. `on_result` runs in this process as each
+    domain finishes, in completion order. Returns crawl statistics.
+
+    A domain counts as failed only if `scrape_method` raises, so scrapers
+    must re-raise rather than log and return. Browsers are started one at a
+    time across workers, so a login in `driver_method` happens once and the
+    session it stores is reused by the rest.
+
+    With a `journal`, domains it already records as done are skipped and
+    every state change and progress cursor is checkpointed to it, so an
+    interrupted crawl resumes with the domains it had not finished. A
+    domain is only marked done after `on_result` returns, so a crash in
+    between runs `on_result` for it again on the next run; it must
+    therefore be idempotent per domain (e.g. overwrite, not append).
+    """
+    domains = list(domains)
+    skipped = 0
+    if journal is not None:
+        remaining = journal.remaining(domains)
+        skipped = len(set(domains)) - len(remaining)
+        for domain in remaining:
+            if journal.state(domain) == IN_PROGRESS:
+                logger.info(f"Resuming {domain}, interrupted at {journal.cursor(domain) or 'start'}")
+        domains = remaining
+        if skipped:
+            logger.info(f"Skipping {skipped} domains already done in {journal.path}")
+    if not domains:
+        return {"domains": 0, "skipped": skipped, "done": 0, "failed": 0, "lost": 0, "workers": 0,
+                "elapsed_s": 0.0, "domains_per_minute": 0.0}
+
+    context = multiprocessing.get_context()
+    tasks = context.Queue()
+    results = context.Queue()
+    budget = RateBudget(rate_per_minute, context)
+    startup_lock = context.Lock()
+    workers = max(1, min(workers, len(domains)))
+
+    for domain in domains:
+        tasks.put(domain)
+    for _ in range(workers):
+        tasks.put(None)
+
+    processes = [
+        context.Process(
+            target=_worker_main,
+            args=(i, scraper_factory, scrape_method, driver_method, tasks, results, budget, startup_lock),
+            daemon=True
+        )
+        for i in range(workers)
+    ]
+    start = time.time()
+    for process in processes:
+        process.start()
+    logger.info(f"Crawling {len(domains)} domains with {workers} workers")
+
+    stats = {"domains": len(domains), "skipped": skipped, "done": 0, "failed": 0, "lost": 0, "workers": workers}
+    received = 0
+    while received < len(domains):
+        try:
+            outcome = results.get(timeout=5)
+        except queue.Empty:
+            if not any(process.is_alive() for process in processes):
+                stats["lost"] = len(domains) - received
+                logger.error(f"All workers exited with {stats['lost']} domains unfinished")
+                break
+            continue
+        if outcome.status == IN_PROGRESS:
+            if journal is not None:
+                journal.mark(outcome.domain, IN_PROGRESS, cursor=outcome.result)
+            continue
+        received += 1
+        stats[outcome.status] += 1
+        logger.info(f"[{received}/{len(domains)}] {outcome.domain}: {outcome.status} "
+                    f"in {outcome.elapsed_s:.1f}s on worker {outcome.worker}")
+        if on_result is not None:
+            on_result(outcome)
+        # Only checkpoint a domain as done once its results have been written
+        if journal is not None:
+            journal.mark(outcome.domain, outcome.status, error=outcome.error)
+
+    for process in processes:
+        process.join(timeout=30)
+
+    elapsed = time.time() - start
+    stats["elapsed_s"] = round(elapsed, 3)
+    stats["domains_per_minute"] = round(received / elapsed * 60, 2) if elapsed else 0.0
+    return stats
@@ -0,0 +1,389 @@
+import argparse
+import asyncio
+import concurrent.futures
+import hashlib
+import json
+import logging
+import mimetypes
+import os
+import tempfile
+import threading
+import time
+from collections import defaultdict
+from typing import Dict, Iterable, List, Optional, Tuple
+from urllib.parse import urlparse
+
+import aiohttp
+
+
+logger = logging.getLogger(__name__)
+
+USER_AGENT = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36"
+CHUNK_SIZE = 64 * 1024
+
+EXTENSIONS = {
+    "image/jpeg": ".jpg",
+    "image/png": ".png",
+    "image/webp": ".webp",
+    "image/gif": ".gif",
+    "image/avif": ".avif",
+    "video/mp4": ".mp4",
+}
+
+
+def _image_module():
+    try:
+        from PIL import Image
+    except ImportError:
+        raise ImportError("Re-encoding creatives requires the 'Pillow' package")
+    return Image
+
+
+def _perceptual_hash():
+    try:
+        import perceptual_hash
+    except ImportError:
+        raise ImportError("Perceptual dedupe requires the 'numpy' and 'Pillow' packages")
+    return perceptual_hash
+
+
+def url_key(url: str) -> str:
+    """Identity of a creative URL for dedupe.
+
+    Facebook CDN URLs carry signed, expiring query parameters that change
+    between page loads for the same file, so only their path counts.
+    """
+    parsed = urlparse(url)
+    if parsed.netloc.endswith("fbcdn.net"):
+        return f"{parsed.netloc}{parsed.path}"
+    return url
+
+
+class CreativeStore:
+    """Content-addressed blob store for ad creatives plus an append-only manifest.
+
+    Blobs live at `<root>/blobs/<sha[:2]>/<sha><ext>`, so identical
+    creatives from different ads, URLs or domains are stored once.
+    `manifest.jsonl` gets one line per ad and creative linking the ad id
+    to its blob. Several processes can share a store: blobs are renamed
+    into place atomically and manifest lines are appended in single writes.
+
+    With `perceptual=True` every new image is also pHashed against
+    `phash_index.npz`. A creative within `max_distance` bits of a known one,
+    e.g. the same ad at another size, is recorded as `variant_of` that blob
+    in the manifest, so later processing can skip it.
+    """
+
+    def __init__(
+        self,
+        root: str = "creatives",
+        reencode: Optional[str] = None,
+        perceptual: bool = False,
+        max_distance: int = 6,
+    ):
+        self.root = root
+        self.reencode = reencode
+        self.max_distance = max_distance
+        self.blobs_dir = os.path.join(root, "blobs")
+        self.tmp_dir = os.path.join(root, "tmp")
+        self.manifest_path = os.path.join(root, "manifest.jsonl")
+        self.index_path = os.path.join(root, "phash_index.npz")
+        os.makedirs(self.blobs_dir, exist_ok=True)
+        os.makedirs(self.tmp_dir, exist_ok=True)
+
+        self._lock = threading.Lock()
+        # url_key -> (sha256, relative path, bytes, content type) of creatives already stored
+        self.urls: Dict[str, Tuple[str, str, int, str]] = {}
+        # sha256 of a near-duplicate creative -> sha256 of the first one seen
+        self.variant_of: Dict[str, str] = {}
+        self.blobs_written = 0
+        self.bytes_written = 0
+        self._load_manifest()
+        self.index = _perceptual_hash().HashIndex.load(self.index_path) if perceptual else None
+
+    def _load_manifest(self):
+        if not os.path.exists(self.manifest_path):
+            return
+        with open(self.manifest_path, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    continue
+                if entry.get("variant_of"):
+                    self.variant_of[entry["sha256"]] = entry["variant_of"]
+                if os.path.exists(os.path.join(self.root, entry["path"])):
+                    self.urls[url_key(entry["url"])] = (entry["sha256"], entry["path"], entry["bytes"], entry["content_type"])
+
+    def lookup(self, url: str) -> Optional[Tuple[str, str, int, str]]:
+        return self.urls.get(url_key(url))
+
+    def blob_path(self, sha256: str, content_type: str) -> str:
+        """Path of a blob relative to the store root."""
+        extension = EXTENSIONS.get(content_type) or mimetypes.guess_extension(content_type) or ".bin"
+        return os.path.join("blobs", sha256[:2], f"{sha256}{extension}")
+
+    def new_temp_file(self):
+        """Open a temporary file inside the store, so finishing a blob is a same-filesystem rename."""
+        fd, tmp_path = tempfile.mkstemp(dir=self.tmp_dir, suffix=".part")
+        return os.fdopen(fd, "wb"), tmp_path
+
+    def commit(self, tmp_path: str, sha256: str, size: int, content_type: str, url: str) -> str:
+        """Move a fully written temporary file to its content address; returns the relative path."""
+        relative = self.blob_path(sha256, content_type)
+        final_path = os.path.join(self.root, relative)
+        if os.path.exists(final_path):
+            os.remove(tmp_path)
+        else:
+            os.makedirs(os.path.dirname(final_path), exist_ok=True)
+            os.replace(tmp_path, final_path)
+            with self._lock:
+                self.blobs_written += 1
+                self.bytes_written += size
+            if self.index is not None and content_type.startswith("image/"):
+                self._index_blob(sha256, final_path)
+        if self.reencode:
+            relative = self._reencode(relative, content_type)
+        with self._lock:
+            self.urls[url_key(url)] = (sha256, relative, size, content_type)
+        return relative
+
+    def _index_blob(self, sha256: str, path: str):
+        perceptual_hash = _perceptual_hash()
+        try:
+            value = perceptual_hash.phash(path)
+        except (OSError, ValueError) as e:
+            logger.warning(f"Could not hash creative {sha256}: {str(e)}")
+            return
+        with self._lock:
+            match = self.index.nearest(value, self.max_distance)
+            if match is not None:
+                self.variant_of[sha256] = self.variant_of.get(match[0], match[0])
+            self.index.add(sha256, value)
+
+    def save_index(self):
+        """Merge this store's new hashes into phash_index.npz.
+
+        Re-reading the file first keeps hashes saved meanwhile by other
+        processes sharing the store; the file lock stops two of them from
+        merging at the same time and replacing each other's additions.
+        """
+        if self.index is None:
+            return
+        perceptual_hash = _perceptual_hash()
+        with self._lock, perceptual_hash.index_lock(self.index_path):
+            on_disk = perceptual_hash.HashIndex.load(self.index_path)
+            known = set(on_disk.keys)
+            self.index.build()
+            new = [(key, value) for key, value in zip(self.index.keys, self.index.hashes.tolist()) if key not in known]
+            if new:
+                on_disk.add_many(*zip(*new))
+                on_disk.save(self.index_path)
+
+    def _reencode(self, relative: str, content_type: str) -> str:
+        target_type = f"image/{self.reencode}"
+        if content_type == target_type or not content_type.startswith("image/"):
+            return relative
+        stem = os.path.splitext(relative)[0]
+        converted = f"{stem}{EXTENSIONS.get(target_type, '.' + self.reencode)}"
+        converted_path = os.path.join(self.root, converted)
+        if not os.path.exists(converted_path):
+            with _image_module().open(os.path.join(self.root, relative)) as image:
+                if self.reencode == "jpeg":
+                    image = image.convert("RGB")
+                image.save(converted_path, format=self.reencode.upper())
+        return converted
+
+    def record(self, ad_id: str, domain: str, url: str, sha256: str, path: str, size: int, content_type: str):
+        """Append one manifest line linking `ad_id` to a stored blob."""
+        entry = {
+            "ts": time.time(),
+            "ad_id": ad_id,
+            "domain": domain,
+            "url": url,
+            "sha256": sha256,
+            "path": path,
+            "bytes": size,
+            "content_type": content_type,
+        }
+        if sha256 in self.variant_of:
+            entry["variant_of"] = self.variant_of[sha256]
+        line = json.dumps(entry, ensure_ascii=False) + "\n"
+        with self._lock, open(self.manifest_path, "a", encoding="utf-8") as f:
+            f.write(line)
+
+    def manifest(self) -> List[Dict]:
+        """Every manifest entry, oldest first."""
+        if not os.path.exists(self.manifest_path):
+            return []
+        with open(self.manifest_path, encoding="utf-8") as f:
+            return [json.loads(line) for line in f if line.strip()]
+
+
+async def _download_one(session, store, host_limits, inflight, url, ad_id, domain, timeout) -> Optional[str]:
+    """Stream one creative into the store and return its path relative to the store root."""
+    known = store.lookup(url)
+    if known is None:
+        # Ads sharing a creative wait on the one download already in flight
+        key = url_key(url)
+        task = inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(_fetch_limited(session, store, host_limits, url, timeout))
+            inflight[key] = task
+            task.add_done_callback(lambda _: inflight.pop(key, None))
+        known = await task
+    if known is None:
+        return None
+    sha256, path, size, content_type = known
+    store.record(ad_id, domain, url, sha256, path, size, content_type)
+    return path
+
+
+async def _fetch_limited(session, store, host_limits, url, timeout):
+    async with host_limits[urlparse(url).netloc]:
+        return await _fetch_to_store(session, store, url, timeout)
+
+
+async def _fetch_to_store(session, store, url, timeout):
+    f, tmp_path = store.new_temp_file()
+    digest = hashlib.sha256()
+    size = 0
+    try:
+        with f:
+            async with session.get(url, timeout=aiohttp.ClientTimeout(total=timeout)) as response:
+                if response.status >= 400:
+                    logger.warning(f"Skipping creative {url}: HTTP {response.status}")
+                    os.remove(tmp_path)
+                    return None
+                content_type = response.headers.get("Content-Type", "application/octet-stream").split(";")[0].strip()
+                async for chunk in response.content.iter_chunked(CHUNK_SIZE):
+                    digest.update(chunk)
+                    f.write(chunk)
+                    size += len(chunk)
+    except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+        logger.warning(f"Error downloading creative {url}: {str(e)}")
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        return None
+
+    sha256 = digest.hexdigest()
+    # Renaming, re-encoding and hashing are blocking; keep them off the event loop
+    path = await asyncio.get_running_loop().run_in_executor(
+        None, store.commit, tmp_path, sha256, size, content_type, url
+    )
+    return sha256, path, size, content_type
+
+
+def _session(max_connections: int, per_host: int):
+    connector = aiohttp.TCPConnector(limit=max_connections, limit_per_host=per_host)
+    return aiohttp.ClientSession(connector=connector, headers={"User-Agent": USER_AGENT})
+
+
+async def download_creatives_async(
+    store: CreativeStore,
+    items: Iterable[Tuple[str, str, str]],
+    per_host: int = 4,
+    max_connections: int = 32,
+    timeout: float = 30,
+) -> List[Optional[str]]:
+    """Download `(ad_id, domain, url)` items over one pooled session; returns their blob paths."""
+    host_limits = defaultdict(lambda: asyncio.Semaphore(per_host))
+    inflight = {}
+    async with _session(max_connections, per_host) as session:
+        return await asyncio.gather(*(
+            _download_one(session, store, host_limits, inflight, url, ad_id, domain, timeout)
+            for ad_id, domain, url in items
+        ))
+
+
+def download_creatives(store: CreativeStore, items: Iterable[Tuple[str, str, str]], **kwargs) -> List[Optional[str]]:
+    paths = asyncio.run(download_creatives_async(store, list(items), **kwargs))
+    store.save_index()
+    return paths
+
+
+class CreativeDownloader:
+    """Background download pipeline the scrapers hand creative URLs to.
+
+    Runs an asyncio loop with one pooled HTTP session on its own thread, so
+    `submit` returns immediately and the browser keeps extracting while
+    creatives download. Each submission yields a future resolving to the
+    blob path relative to the store root, or None if the download failed.
+    """
+
+    def __init__(self, store: CreativeStore, per_host: int = 4, max_connections: int = 32, timeout: float = 30):
+        self.store = store
+        self.per_host = per_host
+        self.max_connections = max_connections
+        self.timeout = timeout
+        self._loop = None
+        self._thread = None
+        self._session = None
+        self._host_limits = None
+        self._inflight = {}
+
+    def _start(self):
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._loop.run_forever, name="creative-downloader", daemon=True)
+        self._thread.start()
+
+        async def open_session():
+            self._host_limits = defaultdict(lambda: asyncio.Semaphore(self.per_host))
+            self._session = _session(self.max_connections, self.per_host)
+
+        asyncio.run_coroutine_threadsafe(open_session(), self._loop).result()
+
+    def submit(self, url: str, ad_id: str, domain: str) -> concurrent.futures.Future:
+        if self._loop is None:
+            self._start()
+        return asyncio.run_coroutine_threadsafe(
+            _download_one(self._session, self.store, self._host_limits, self._inflight, url, ad_id, domain, self.timeout),
+            self._loop
+        )
+
+    def close(self):
+        """Finish the session and stop the loop; pending downloads are awaited by their callers first."""
+        if self._loop is None:
+            return
+        asyncio.run_coroutine_threadsafe(self._session.close(), self._loop).result()
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join()
+        self._loop.close()
+        self._loop = None
+        self.store.save_index()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Download the creatives referenced by scraped ads into a content-addressed store.")
+    parser.add_argument("ads_file", help="JSON list of ads with 'id' and 'image_url' (e.g. facebook_ads_data/*_ads.json)")
+    parser.add_argument("--root", default="creatives")
+    parser.add_argument("--domain", default="", help="domain recorded in the manifest")
+    parser.add_argument("--reencode", choices=["jpeg", "png", "webp"])
+    parser.add_argument("--per-host", type=int, default=4)
+    parser.add_argument("--perceptual", action="store_true", help="flag near-duplicate images via perceptual_hash")
+    args = parser.parse_args()
+
+    with open(args.ads_file, encoding="utf-8") as f:
+        ads = json.load(f)
+    items = [(str(ad.get("id", "")), ad.get("domain", args.domain), ad["image_url"]) for ad in ads if ad.get("image_url")]
+
+    store = CreativeStore(args.root, reencode=args.reencode, perceptual=args.perceptual)
+    paths = download_creatives(store, items, per_host=args.per_host)
+    print(json.dumps({
+        "creatives": len(items),
+        "stored": sum(1 for path in paths if path),
+        "unique_blobs": len({path for path in paths if path}),
+        "blobs_written": store.blobs_written,
+        "bytes_written": store.bytes_written,
+        "variants": len(store.variant_of),
+    }, indent=4))
+
+
+if __name__ == "__main__":
+    main()
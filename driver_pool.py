@@ -0,0 +1,280 @@
+import atexit
+import logging
+import queue
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Callable, Dict, Optional, Tuple
+from urllib.parse import urlsplit
+
+from selenium import webdriver
+
+
+logger = logging.getLogger(__name__)
+
+
+def default_chrome_options(headless: bool = True) -> webdriver.ChromeOptions:
+    """Build the Chrome options shared by the search scrapers."""
+    options = webdriver.ChromeOptions()
+    if headless:
+        options.add_argument("--headless")
+    options.add_argument("--no-sandbox")
+    options.add_argument("--disable-dev-shm-usage")
+    options.add_argument("--disable-gpu")
+    options.add_argument("--window-size=1920,1080")
+    return options
+
+
+@dataclass
+class PooledDriver:
+    driver: webdriver.Chrome
+    uses: int = 0
+    created_at: float = field(default_factory=time.monotonic)
+    aborted: bool = False
+
+
+class DriverPool:
+    """Keep a set of warm Chrome instances and hand them out one lease at a time.
+
+    Drivers are reset (cookies, storage, extra tabs) when they come back and
+    are replaced once they have served ``max_uses`` leases or the JS heap of
+    their current page grows past ``max_js_heap_mb``.
+    """
+
+    def __init__(
+        self,
+        size: int = 2,
+        options_factory: Callable[[], webdriver.ChromeOptions] = default_chrome_options,
+        max_uses: int = 50,
+        max_js_heap_mb: Optional[float] = None,
+        prewarm: bool = True,
+        acquire_timeout: float = 60,
+        driver_factory: Optional[Callable[[webdriver.ChromeOptions], webdriver.Chrome]] = None,
+    ):
+        self.size = size
+        self.options_factory = options_factory
+        self.driver_factory = driver_factory or (lambda options: webdriver.Chrome(options=options))
+        self.max_uses = max_uses
+        self.max_js_heap_mb = max_js_heap_mb
+        self.acquire_timeout = acquire_timeout
+
+        self._idle: "queue.Queue[PooledDriver]" = queue.Queue()
+        self._leased: Dict[int, PooledDriver] = {}
+        self._lock = threading.Lock()
+        self._launched = 0
+        self._closed = False
+        self.stats = {"launched": 0, "leases": 0, "recycled": 0}
+
+        if prewarm:
+            for _ in range(size):
+                self._idle.put(self._launch())
+
+    def _launch(self) -> PooledDriver:
+        """Start a new Chrome instance and count it against the pool size."""
+        with self._lock:
+            self._launched += 1
+            self.stats["launched"] += 1
+        return self._start()
+
+    def _start(self) -> PooledDriver:
+        """Start Chrome for a slot already counted in `_launched`, giving the slot back on failure."""
+        try:
+            driver = self.driver_factory(self.options_factory())
+        except Exception:
+            with self._lock:
+                self._launched -= 1
+            raise
+        logger.info("Launched pooled Chrome driver")
+        return PooledDriver(driver=driver)
+
+    def _quit(self, entry: PooledDriver):
+        with self._lock:
+            self._launched -= 1
+        if entry.aborted:
+            return
+        try:
+            entry.driver.quit()
+        except Exception as e:
+            logger.warning(f"Error quitting pooled driver: {str(e)}")
+
+    def acquire(self, timeout: Optional[float] = None) -> webdriver.Chrome:
+        """Take a driver out of the pool, launching one if below capacity."""
+        if self._closed:
+            raise RuntimeError("DriverPool is closed")
+
+        try:
+            entry = self._idle.get_nowait()
+        except queue.Empty:
+            # Check and take the slot together, so concurrent callers cannot overshoot `size`
+            with self._lock:
+                can_launch = self._launched < self.size
+                if can_launch:
+                    self._launched += 1
+                    self.stats["launched"] += 1
+            if can_launch:
+                entry = self._start()
+            else:
+                try:
+                    entry = self._idle.get(timeout=self.acquire_timeout if timeout is None else timeout)
+                except queue.Empty:
+                    raise TimeoutError("Timed out waiting for a pooled driver")
+
+        entry.uses += 1
+        with self._lock:
+            self._leased[id(entry.driver)] = entry
+            self.stats["leases"] += 1
+        return entry.driver
+
+    def release(self, driver: webdriver.Chrome):
+        """Return a leased driver, resetting or recycling it as needed."""
+        with self._lock:
+            entry = self._leased.pop(id(driver), None)
+        if entry is None:
+            logger.warning("Released a driver that was not leased from this pool")
+            return
+
+        if entry.aborted or self._closed or self._should_recycle(entry) or not self._reset(entry.driver):
+            self._quit(entry)
+            if not self._closed:
+                with self._lock:
+                    self.stats["recycled"] += 1
+                try:
+                    self._idle.put(self._launch())
+                except Exception as e:
+                    logger.error(f"Failed to replace recycled driver: {str(e)}")
+            return
+
+        self._idle.put(entry)
+
+    def abort(self, driver: webdriver.Chrome):
+        """Quit a leased driver whose holder has overrun, so its pending commands fail fast.
+
+        The holder still releases it as usual; the pool then launches a replacement.
+        """
+        with self._lock:
+            entry = self._leased.get(id(driver))
+        if entry is None or entry.aborted:
+            return
+        entry.aborted = True
+        try:
+            driver.quit()
+        except Exception as e:
+            logger.warning(f"Error aborting pooled driver: {str(e)}")
+
+    @contextmanager
+    def lease(self, timeout: Optional[float] = None):
+        """Context manager yielding a driver that goes back to the pool on exit."""
+        driver = self.acquire(timeout)
+        try:
+            yield driver
+        finally:
+            self.release(driver)
+
+    def _should_recycle(self, entry: PooledDriver) -> bool:
+        if entry.uses >= self.max_uses:
+            return True
+        if self.max_js_heap_mb is not None:
+            heap_mb = self._js_heap_mb(entry.driver)
+            if heap_mb is not None and heap_mb > self.max_js_heap_mb:
+                logger.info(f"Recycling driver with a {heap_mb:.1f} MB JS heap")
+                return True
+        return False
+
+    def _js_heap_mb(self, driver: webdriver.Chrome) -> Optional[float]:
+        """Read the JS heap size of the current page through CDP (not the browser's total memory)."""
+        try:
+            # getMetrics only reports values once the domain is enabled; enabling it again is a no-op
+            driver.execute_cdp_cmd("Performance.enable", {})
+            metrics = driver.execute_cdp_cmd("Performance.getMetrics", {})["metrics"]
+            for metric in metrics:
+                if metric["name"] == "JSHeapTotalSize":
+                    return metric["value"] / (1024 * 1024)
+        except Exception as e:
+            logger.debug(f"Could not read driver memory: {str(e)}")
+        return None
+
+    @staticmethod
+    def _visited_origins(driver: webdriver.Chrome) -> set:
+        """Origins in the current tab's navigation history."""
+        try:
+            entries = driver.execute_cdp_cmd("Page.getNavigationHistory", {})["entries"]
+        except Exception:
+            entries = [{"url": driver.current_url}]
+        origins = set()
+        for entry in entries:
+            parts = urlsplit(entry.get("url", ""))
+            if parts.scheme in ("http", "https") and parts.netloc:
+                origins.add(f"{parts.scheme}://{parts.netloc}")
+        return origins
+
+    def _reset(self, driver: webdriver.Chrome) -> bool:
+        """Clear per-lease browser state. Returns False if the driver is unusable.
+
+        WebDriver's delete_all_cookies and a localStorage.clear() script only
+        reach the current page's origin, so cookies for every domain and the
+        storage of every origin the lease visited are cleared through CDP.
+        """
+        try:
+            handles = driver.window_handles
+            origins = set()
+            for handle in reversed(handles):
+                driver.switch_to.window(handle)
+                origins |= self._visited_origins(driver)
+                if handle != handles[0]:
+                    driver.close()
+            driver.switch_to.window(handles[0])
+            try:
+                driver.execute_cdp_cmd("Network.clearBrowserCookies", {})
+                # Drop any resource-blocking profile the previous lease applied
+                driver.execute_cdp_cmd("Network.setBlockedURLs", {"urls": []})
+                for origin in origins:
+                    driver.execute_cdp_cmd("Storage.clearDataForOrigin", {"origin": origin, "storageTypes": "all"})
+            except Exception as e:
+                # Not Chrome (or no CDP): fall back to what WebDriver can reach
+                logger.debug(f"CDP reset unavailable: {str(e)}")
+                driver.delete_all_cookies()
+                try:
+                    driver.execute_script("window.localStorage.clear(); window.sessionStorage.clear();")
+                except Exception:
+                    pass
+            driver.get("about:blank")
+            return True
+        except Exception as e:
+            logger.warning(f"Failed to reset pooled driver: {str(e)}")
+            return False
+
+    def close(self):
+        """Quit every idle driver; leased drivers are quit when released."""
+        self._closed = True
+        while True:
+            try:
+                entry = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            self._quit(entry)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+
+_default_pools: Dict[Tuple, DriverPool] = {}
+_default_pool_lock = threading.Lock()
+
+
+def get_default_pool(**kwargs) -> DriverPool:
+    """Return the process-wide pool for this configuration, creating it on first use.
+
+    Pools are keyed by their keyword arguments, so callers asking for a
+    different size or options never silently get a pool built for someone else.
+    """
+    key = tuple(sorted(kwargs.items()))
+    with _default_pool_lock:
+        pool = _default_pools.get(key)
+        if pool is None or pool._closed:
+            pool = _default_pools[key] = DriverPool(**kwargs)
+            atexit.register(pool.close)
+        return pool
@@ -0,0 +1,95 @@
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from typing import Any, Callable, Dict, Optional, Union
+
+
+logger = logging.getLogger(__name__)
+
+
+class TaskDrivers:
+    """Pooled drivers held by running fan-out tasks, by task name.
+
+    A task registers its leased driver with `track`; when the task times
+    out, `abandon` aborts that driver through the pool so the straggler's
+    next browser command fails and its thread finishes and releases the
+    lease instead of holding it indefinitely. Tasks check `abandoned` before
+    publishing results nobody is waiting for any more.
+    """
+
+    def __init__(self, pool):
+        self.pool = pool
+        self._drivers: Dict[str, Any] = {}
+        self._abandoned = set()
+        self._lock = threading.Lock()
+
+    def track(self, name: str, driver):
+        with self._lock:
+            abandoned = name in self._abandoned
+            if not abandoned:
+                self._drivers[name] = driver
+        if abandoned:
+            self.pool.abort(driver)
+
+    def untrack(self, name: str):
+        with self._lock:
+            self._drivers.pop(name, None)
+
+    def abandon(self, name: str):
+        with self._lock:
+            self._abandoned.add(name)
+            driver = self._drivers.pop(name, None)
+        if driver is not None:
+            logger.warning(f"Aborting the browser of timed-out task {name}")
+            self.pool.abort(driver)
+
+    def abandoned(self, name: str) -> bool:
+        with self._lock:
+            return name in self._abandoned
+
+
+def run_concurrently(
+    tasks: Dict[str, Callable[[], Any]],
+    timeout: Union[float, Dict[str, float]] = 60,
+    on_timeout: Optional[Callable[[str], Any]] = None,
+    on_error: Optional[Callable[[str, Exception], Any]] = None,
+) -> Dict[str, Any]:
+    """Run named callables in parallel and collect their results by name.
+
+    `timeout` is either one budget for every task or a per-task mapping,
+    measured from the moment all tasks are submitted. A task that runs over
+    its budget or raises is replaced by `on_timeout(name)` / `on_error(name, e)`
+    (``{"error": ...}`` by default) so one slow engine cannot sink the rest.
+    Tasks that have not started by then are cancelled; ones still running
+    are left behind, so tasks holding a pooled driver should register it
+    with a `TaskDrivers` whose `abandon` is called from `on_timeout`.
+    """
+    if on_timeout is None:
+        on_timeout = lambda name: {"error": f"{name} timed out"}
+    if on_error is None:
+        on_error = lambda name, e: {"error": str(e)}
+
+    executor = ThreadPoolExecutor(max_workers=max(len(tasks), 1))
+    start = time.monotonic()
+    futures = {name: executor.submit(task) for name, task in tasks.items()}
+
+    results = {}
+    try:
+        for name, future in futures.items():
+            budget = timeout.get(name, 60) if isinstance(timeout, dict) else timeout
+            remaining = max(0.0, start + budget - time.monotonic())
+            try:
+                results[name] = future.result(timeout=remaining)
+            except FutureTimeoutError:
+                logger.warning(f"{name} did not finish within {budget}s")
+                results[name] = on_timeout(name)
+            except Exception as e:
+                logger.error(f"{name} failed: {str(e)}")
+                results[name] = on_error(name, e)
+    finally:
+        # Don't block on stragglers; on_timeout is expected to make them finish early
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    logger.info(f"Fan-out of {len(tasks)} tasks took {time.monotonic() - start:.2f}s")
+    return results
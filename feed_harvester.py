@@ -0,0 +1,132 @@
+import logging
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+from selenium.webdriver.remote.webelement import WebElement
+
+from readiness import Readiness
+
+
+logger = logging.getLogger(__name__)
+
+AD_CARD_SELECTOR = ".x1dr75xp.xh8yej3.x16md763, [data-testid='ad_library_preview'], [data-testid='ad_container']"
+
+# Tags every matching card with a sequential data-harvest-id the moment it is
+# inserted and queues it. Cards nested inside an already tagged card are
+# skipped so one ad never yields two cards. Installing twice is a no-op.
+INSTALL_SCRIPT = """
+var selector = arguments[0];
+if (!window.__feedHarvester) {
+    var harvester = {seq: 0, queue: []};
+    var tag = function (el) {
+        if (el.hasAttribute('data-harvest-id')) return;
+        if (el.parentElement && el.parentElement.closest('[data-harvest-id]')) return;
+        el.setAttribute('data-harvest-id', String(++harvester.seq));
+        harvester.queue.push(el);
+    };
+    var scan = function (root) {
+        if (root.nodeType !== 1) return;
+        if (root.matches(selector)) tag(root);
+        root.querySelectorAll(selector).forEach(tag);
+    };
+    scan(document.body);
+    harvester.observer = new MutationObserver(function (mutations) {
+        mutations.forEach(function (m) { m.addedNodes.forEach(scan); });
+    });
+    harvester.observer.observe(document.body, {childList: true, subtree: true});
+    window.__feedHarvester = harvester;
+}
+return window.__feedHarvester.seq;
+"""
+
+# Hands over the cards queued since the last drain, dropping any already
+# recycled out of the DOM by the virtualized list
+DRAIN_SCRIPT = """
+var harvester = window.__feedHarvester;
+if (!harvester) return null;
+var queue = harvester.queue;
+harvester.queue = [];
+return queue.filter(function (el) { return el.isConnected; })
+            .map(function (el) { return [el.getAttribute('data-harvest-id'), el]; });
+"""
+
+SCROLL_SCRIPT = "window.scrollTo(0, document.body.scrollHeight); return document.body.scrollHeight;"
+
+
+class FeedHarvester:
+    """Yield each card of an infinite-scroll feed exactly once, as it is inserted.
+
+    A MutationObserver injected into the page assigns stable IDs to new
+    cards, so each scroll step costs one round trip for the new cards only
+    and total work stays linear in the number of cards loaded. The feed is
+    considered exhausted after `max_idle_scrolls` scrolls that add no cards
+    and do not grow the page. After every scroll, `on_progress` (if given)
+    receives the cards and scrolls so far, e.g. `crawl_coordinator.report_progress`.
+    """
+
+    def __init__(
+        self,
+        driver,
+        selector: str = AD_CARD_SELECTOR,
+        readiness: Optional[Readiness] = None,
+        max_idle_scrolls: int = 3,
+        max_scrolls: int = 200,
+        on_progress: Optional[Callable[[Dict], None]] = None,
+    ):
+        self.driver = driver
+        self.selector = selector
+        self.readiness = readiness or Readiness(driver, timeout=5)
+        self.max_idle_scrolls = max_idle_scrolls
+        self.max_scrolls = max_scrolls
+        self.on_progress = on_progress
+        self.cards_seen = 0
+        self.scrolls = 0
+
+    def install(self) -> int:
+        """Inject the observer if needed; returns the number of cards tagged so far."""
+        return self.driver.execute_script(INSTALL_SCRIPT, self.selector)
+
+    def drain(self):
+        """Return `(card_id, element)` for cards inserted since the last call."""
+        cards = self.driver.execute_script(DRAIN_SCRIPT)
+        if cards is None:
+            # The page navigated and lost the observer
+            self.install()
+            cards = self.driver.execute_script(DRAIN_SCRIPT) or []
+        self.cards_seen += len(cards)
+        return cards
+
+    def harvest(self, target: Optional[int] = None) -> Iterator[Tuple[str, WebElement]]:
+        """Yield new cards, scrolling for more until `target` cards were yielded or the feed ends."""
+        yielded = 0
+        for cards in self.harvest_batches():
+            for card_id, element in cards:
+                yield card_id, element
+                yielded += 1
+                if target is not None and yielded >= target:
+                    return
+
+    def harvest_batches(self) -> Iterator[List[Tuple[str, WebElement]]]:
+        """Yield the cards inserted by each scroll step as one batch, until the feed ends."""
+        self.install()
+        idle_scrolls = 0
+        height = last_height = None
+
+        while True:
+            cards = self.drain()
+            if cards:
+                yield cards
+
+            if cards or height != last_height:
+                idle_scrolls = 0
+            else:
+                idle_scrolls += 1
+            if idle_scrolls >= self.max_idle_scrolls or self.scrolls >= self.max_scrolls:
+                logger.info(f"Feed exhausted after {self.scrolls} scrolls and {self.cards_seen} cards")
+                return
+
+            last_height = height
+            height = self.driver.execute_script(SCROLL_SCRIPT)
+            self.scrolls += 1
+            if self.on_progress is not None:
+                self.on_progress({"cards": self.cards_seen, "scrolls": self.scrolls})
+            self.readiness.dom_quiet()
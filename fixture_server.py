@@ -0,0 +1,129 @@
+import json
+import logging
+import os
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Optional
+from urllib.parse import parse_qs, urlparse
+
+
+logger = logging.getLogger(__name__)
+
+BASE_PLACEHOLDER = "{{BASE}}"
+
+
+class FixtureServer:
+    """Serve recorded pages on localhost so scrapers can run without the network.
+
+    A page recorded for `https://www.google.com/search` is served from
+    `http://127.0.0.1:<port>/www.google.com/search`. `routes.json` in the
+    fixtures directory maps `host/path` to a fixture file, or to a dict
+    keyed by the lower-cased `q`/`search_query` parameter with a `*`
+    fallback. Every request is counted in `hits`.
+    """
+
+    def __init__(self, fixtures_dir: str = "fixtures", host: str = "127.0.0.1", port: int = 0):
+        self.fixtures_dir = fixtures_dir
+        with open(os.path.join(fixtures_dir, "routes.json"), encoding="utf-8") as f:
+            self.routes: Dict[str, object] = json.load(f)
+        self.hits: Dict[str, int] = {}
+        self._cache: Dict[str, bytes] = {}
+        self._lock = threading.Lock()
+        self._httpd = ThreadingHTTPServer((host, port), self._handler())
+        self._httpd.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def rewrite_url(self, url: str) -> str:
+        """Map a live URL onto this server; local URLs pass through unchanged."""
+        parsed = urlparse(url)
+        if parsed.scheme not in ("http", "https") or url.startswith(self.base_url):
+            return url
+        rest = parsed.path or "/"
+        if parsed.query:
+            rest += "?" + parsed.query
+        return f"{self.base_url}/{parsed.netloc}{rest}"
+
+    def resolve(self, path: str, query: str) -> Optional[str]:
+        """Return the fixture file for a request path, or None if nothing is recorded."""
+        route = self.routes.get(path.lstrip("/"))
+        if isinstance(route, dict):
+            params = parse_qs(query)
+            term = (params.get("q") or params.get("search_query") or [""])[0].strip().lower()
+            route = route.get(term, route.get("*"))
+        return route
+
+    def _load(self, name: str) -> bytes:
+        with self._lock:
+            body = self._cache.get(name)
+            if body is None:
+                with open(os.path.join(self.fixtures_dir, name), encoding="utf-8") as f:
+                    body = f.read().replace(BASE_PLACEHOLDER, self.base_url).encode("utf-8")
+                self._cache[name] = body
+            return body
+
+    def _handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                parsed = urlparse(self.path)
+                name = server.resolve(parsed.path, parsed.query)
+                with server._lock:
+                    server.hits[parsed.path] = server.hits.get(parsed.path, 0) + 1
+                if name is None:
+                    self.send_error(404, "No fixture recorded")
+                    return
+                body = server._load(name)
+                self.send_response(200)
+                self.send_header("Content-Type", "text/html; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                logger.debug(format % args)
+
+        return Handler
+
+    def start(self) -> "FixtureServer":
+        self._thread = threading.Thread(target=self._httpd.serve_forever, daemon=True)
+        self._thread.start()
+        logger.info(f"Serving fixtures from {self.fixtures_dir} at {self.base_url}")
+        return self
+
+    def stop(self):
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.stop()
+
+
+def install_replay(driver, server: FixtureServer):
+    """Route a driver's navigations to the fixture server and count its WebDriver commands.
+
+    Patches the instance only: `get` rewrites live URLs and every command sent
+    through `execute` increments `driver.command_count`.
+    """
+    original_get = driver.get
+    original_execute = driver.execute
+    driver.command_count = 0
+
+    def get(url):
+        return original_get(server.rewrite_url(url))
+
+    def execute(driver_command, params=None):
+        driver.command_count += 1
+        return original_execute(driver_command, params)
+
+    driver.get = get
+    driver.execute = execute
+    return driver
@@ -1,16 +1,20 @@
-import json
-import time
 from selenium import webdriver
 from selenium.webdriver.common.by import By
 from selenium.webdriver.common.keys import Keys
-from bs4 import BeautifulSoup
 from selenium.webdriver.common.action_chains import ActionChains
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 
+from driver_pool import get_default_pool
+from html_parsing import page_soup
+from jsonl_sink import JsonlSink, write_documents
+from readiness import Readiness, wait_for_page
+from related_collector import RelatedCollector
+from selector_registry import get_default_registry
 
-def setup_driver():
-    """Sets up the Selenium WebDriver."""
+
+def chrome_options():
+    """Builds the Chrome options used by this scraper."""
     options = webdriver.ChromeOptions()
     options.add_argument("--headless")
     options.add_argument("--no-sandbox")
@@ -18,7 +22,12 @@ def setup_driver():
 
     options.add_argument("--disable-gpu")
     options.add_argument("--window-size=1920,1080")
-    driver = webdriver.Chrome(options=options)
+    return options
+
+
+def setup_driver():
+    """Sets up the Selenium WebDriver."""
+    driver = webdriver.Chrome(options=chrome_options())
     return driver
 
 
@@ -29,14 +38,14 @@ def debug_screenshot(driver, filename):
     driver.save_screenshot(filename)
     print(f"Saved screenshot: {filename}")
 
-def extract_google_related_searches(driver):
-    """Extract related searches from Google."""
-    related_searches = []
+def extract_google_related_searches(driver, soup=None):
+    """Extract related searches from Google, reusing `soup` if the results page is already parsed."""
+    related_searches = RelatedCollector()
     try:
-        # Wait for related searches to load
-        time.sleep(3)
-        
-        soup = BeautifulSoup(driver.page_source, "html.parser")
+        if soup is None:
+            # Wait for related searches to load
+            wait_for_page(driver, "google_serp", timeout=5)
+            soup = page_soup(driver)
         
         # Try different selectors for related searches
         selectors = [
@@ -47,45 +56,34 @@ def extract_google_related_searches(driver):
             "div.PNyWAd a" # Yet another location
         ]
         
-        for selector in selectors:
-            elements = soup.select(selector)
-            for element in elements:
-                query = element.text.strip()
-                if query and not any(r['query'] == query for r in related_searches):
-                    related_searches.append({"query": query})
+        # Every selector is kept (their results are merged) but hit rates are tracked to spot layout changes
+        for selector, elements in get_default_registry().each("google.related_searches", selectors, soup.select):
+            related_searches.extend((element.text for element in elements), selector)
         
         # Also check "People also ask" questions
         # people_also_ask = soup.select("div.related-question-pair")
         # for item in people_also_ask:
-        #     query = item.text.strip()
-        #     if query and not any(r['query'] == query for r in related_searches):
-        #         related_searches.append({"query": query})
+        #     related_searches.add(item.text, "people_also_ask")
         people_also_search = soup.select("div.g-blk")
         for item in people_also_search:
             title = item.text.strip()
-            if title and not any(r['title'] == title for r in related_searches):
-                related_searches.append({
-                    "title": title,
-                    "link": f"https://www.google.com/search?q={title.replace(' ', '+')}"
-                })
+            related_searches.add(title, "people_also_search", field="title",
+                                 link=f"https://www.google.com/search?q={title.replace(' ', '+')}")
         # Try to get suggestions from search box
         try:
             search_box = driver.find_element(By.NAME, "q")
             search_box.clear()
             ActionChains(driver).move_to_element(search_box).click().perform()
-            time.sleep(1)
+            Readiness(driver, timeout=2).element_present("ul[role='listbox'] li")
             suggestions = driver.find_elements(By.CSS_SELECTOR, "ul[role='listbox'] li")
-            for suggestion in suggestions:
-                query = suggestion.text.strip()
-                if query and not any(r['query'] == query for r in related_searches):
-                    related_searches.append({"query": query})
+            related_searches.extend((suggestion.text for suggestion in suggestions), "search_box")
         except Exception as e:
             print(f"Error getting search suggestions: {e}")
             
     except Exception as e:
         print(f"Error extracting Google related searches: {e}")
         
-    return related_searches
+    return related_searches.items()
     
 
 def extract_sub_sitelinks(driver, sitelink_url):
@@ -93,8 +91,8 @@ def extract_sub_sitelinks(driver, sitelink_url):
     sub_sitelinks = []
     try:
         driver.get(sitelink_url)
-        time.sleep(2)  # Allow the page to load
-        soup = BeautifulSoup(driver.page_source, "html.parser")
+        wait_for_page(driver, "document")  # Allow the page to load
+        soup = page_soup(driver)
 
         # Extract links from the page
         for link in soup.select("a[href]"):  # Select all anchor tags with href
@@ -177,15 +175,18 @@ def debug_screenshot(driver, filename):
     print(f"Saved screenshot: {filename}")
 
 
-def google_search(driver, query):
-    """Perform Google search and extract results with related searches."""
+def google_search(driver, query, sink=None, document="google.json"):
+    """Perform Google search and extract results with related searches.
+
+    With a sink, each organic result is streamed to it as soon as it is parsed.
+    """
     driver.get("https://www.google.com")
     search_box = driver.find_element(By.NAME, "q")
     search_box.send_keys(query)
     search_box.send_keys(Keys.RETURN)
-    time.sleep(2)
+    wait_for_page(driver, "google_serp", previous=search_box)
 
-    soup = BeautifulSoup(driver.page_source, "html.parser")
+    soup = page_soup(driver)
     results = []
 
     # Extract organic results
@@ -200,18 +201,21 @@ def google_search(driver, query):
                 link = link_elem["href"]
                 snippet = snippet_elem.text.strip() if snippet_elem else ""
                 
-                results.append({
+                organic_result = {
                     "position": idx,
                     "title": title,
                     "link": link,
                     "snippet": snippet
-                })
+                }
+                results.append(organic_result)
+                if sink is not None:
+                    sink.append(document, ["googleResults"], organic_result)
         except Exception as e:
             print(f"Error extracting result {idx}: {e}")
             continue
 
-    # Get related searches
-    related_searches = extract_google_related_searches(driver)
+    # Get related searches from the same parse
+    related_searches = extract_google_related_searches(driver, soup)
     
     return results, related_searches
 
@@ -244,39 +248,40 @@ def google_search(driver, query):
 
 #     return results, related_searches
 
-def main():
+def main(pool=None):
     query = "Selenium in python"
-    driver = setup_driver()
+    pool = pool or get_default_pool(size=1, options_factory=chrome_options)
+    driver = pool.acquire()
+
+    sink = JsonlSink("google.jsonl")
 
     try:
+        # Stream output as it is produced
+        sink.set("google.json", ["searchParameters"], {
+            "q": query,
+            "gl": "us",
+            "hl": "en",
+            "autocorrect": True,
+            "page": 1,
+            "type": "search"
+        })
+        sink.set("google.json", ["googleResults"], [])  # Reset the list for this run
+
         # Perform searches
-        google_results, google_related = google_search(driver, query)
+        google_results, google_related = google_search(driver, query, sink=sink)
         # youtube_results, youtube_related = youtube_search(driver, query)
 
-        # Construct output
-        output = {
-            "searchParameters": {
-                "q": query,
-                "gl": "us",
-                "hl": "en",
-                "autocorrect": True,
-                "page": 1,
-                "type": "search"
-            },
-            "googleResults": google_results,
-            "relatedSearches": google_related,  # Main related searches
-            # "youtubeResults": youtube_results,
-            # "youtubeRelatedSearches": youtube_related
-        }
-
-        # Save to JSON file
-        with open("google.json", "w", encoding='utf-8') as f:
-            json.dump(output, f, indent=4, ensure_ascii=False)
+        sink.set("google.json", ["relatedSearches"], google_related)  # Main related searches
+        sink.close()
+
+        # Rebuild google.json from the streamed records
+        write_documents("google.jsonl")
 
         print("Search results saved to 'search_results.json'")
 
     finally:
-        driver.quit()
+        sink.close()
+        pool.release(driver)
 
 if __name__ == "__main__":
     main()
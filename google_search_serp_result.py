@@ -1,5 +1,4 @@
 import json
-import time
 import logging
 from dataclasses import dataclass, asdict
 from typing import List, Dict, Optional
@@ -12,6 +11,15 @@ from selenium.webdriver.support import expected_conditions as EC
 from selenium.common.exceptions import TimeoutException, NoSuchElementException
 from bs4 import BeautifulSoup
 
+from html_parsing import page_soup
+from instrumentation import ScrapeMetrics, instrument_driver
+from readiness import Readiness
+from related_collector import RelatedCollector
+from resource_blocking import apply_blocking
+from selector_registry import SelectorRegistry, get_default_registry
+from serp_cache import SerpCache, cached
+from sub_sitelinks import fetch_sub_sitelinks
+
 
 # Configure logging
 logging.basicConfig(
@@ -53,10 +61,26 @@ class SearchResult:
 
 
 class GoogleSearchScraper:
-    def __init__(self, headless: bool = True):
-        """Initialize the scraper with configurable headless mode."""
-        self.driver = self._setup_driver(headless)
+    def __init__(
+        self,
+        headless: bool = True,
+        cache: Optional[SerpCache] = None,
+        metrics: Optional[ScrapeMetrics] = None,
+        blocking: Optional[str] = "serp",
+        selectors: Optional[SelectorRegistry] = None
+    ):
+        """Initialize the scraper with configurable headless mode, optional result cache and metrics.
+
+        `blocking` names a resource_blocking profile applied to the driver. Selector
+        hit rates go to `selectors`, the process-wide registry by default.
+        """
+        self.cache = cache
+        self.metrics = metrics or ScrapeMetrics("google_search_serp_result")
+        self.selectors = selectors or get_default_registry()
+        self.driver = instrument_driver(self._setup_driver(headless), self.metrics)
+        apply_blocking(self.driver, blocking)
         self.wait = WebDriverWait(self.driver, 10)
+        self.readiness = Readiness(self.driver)
 
 
 
@@ -83,7 +107,7 @@ class GoogleSearchScraper:
             self.driver.get(sitelink_url)
             self.wait.until(EC.presence_of_element_located((By.TAG_NAME, "body")))
             
-            soup = BeautifulSoup(self.driver.page_source, "html.parser")
+            soup = page_soup(self.driver)
             links = soup.select("a[href]")
             
             for link in links:
@@ -98,15 +122,15 @@ class GoogleSearchScraper:
             logger.error(f"Error extracting sub-sitelinks from {sitelink_url}: {str(e)}")
         finally:
             self.driver.get(original_url)
-            time.sleep(1)  # Brief pause to ensure page load
+            self.readiness.page_ready("google_serp")
 
         return sub_sitelinks
 
 
 
-    def extract_related_searches(self) -> List[Dict[str, str]]:
-        """Extract related searches with improved selector handling."""
-        related_searches = []
+    def extract_related_searches(self, soup: Optional[BeautifulSoup] = None) -> List[Dict[str, str]]:
+        """Extract related searches with improved selector handling, reusing `soup` if the page is already parsed."""
+        related_searches = RelatedCollector()
         selectors = [
             "div.brs_col p a",
             "div.exp-c a.k8XOCe",
@@ -116,15 +140,13 @@ class GoogleSearchScraper:
         ]
 
         try:
-            self.wait.until(EC.presence_of_element_located((By.CSS_SELECTOR, "body")))
-            soup = BeautifulSoup(self.driver.page_source, "html.parser")
+            if soup is None:
+                self.wait.until(EC.presence_of_element_located((By.CSS_SELECTOR, "body")))
+                soup = page_soup(self.driver)
 
-            # Extract related searches from various selectors
-            for selector in selectors:
-                for element in soup.select(selector):
-                    query = element.text.strip()
-                    if query and not any(r.get('query') == query for r in related_searches):
-                        related_searches.append({"query": query})
+            # Extract related searches from various selectors, tracking each one's hit rate
+            for selector, elements in self.selectors.each("google.related_searches", selectors, soup.select):
+                related_searches.extend((element.text for element in elements), selector)
 
             # Extract "People also search for" suggestions
             self._extract_people_also_search(soup, related_searches)
@@ -135,24 +157,21 @@ class GoogleSearchScraper:
         except Exception as e:
             logger.error(f"Error extracting related searches: {str(e)}")
 
-        return related_searches
+        return related_searches.items()
     
 
 
 
-    def _extract_people_also_search(self, soup: BeautifulSoup, related_searches: List[Dict[str, str]]):
+    def _extract_people_also_search(self, soup: BeautifulSoup, related_searches: RelatedCollector):
         """Extract 'People also search for' suggestions."""
         for item in soup.select("div.g-blk"):
             title = item.text.strip()
-            if title and not any(r.get('title') == title for r in related_searches):
-                related_searches.append({
-                    "title": title,
-                    "link": f"https://www.google.com/search?q={title.replace(' ', '+')}"
-                })
+            related_searches.add(title, "people_also_search", field="title",
+                                 link=f"https://www.google.com/search?q={title.replace(' ', '+')}")
 
                 
 
-    def _extract_search_suggestions(self, related_searches: List[Dict[str, str]]):
+    def _extract_search_suggestions(self, related_searches: RelatedCollector):
         """Extract search box suggestions."""
         try:
             search_box = self.driver.find_element(By.NAME, "q")
@@ -163,23 +182,27 @@ class GoogleSearchScraper:
                 EC.presence_of_all_elements_located((By.CSS_SELECTOR, "ul[role='listbox'] li"))
             )
             
-            for suggestion in suggestions:
-                query = suggestion.text.strip()
-                if query and not any(r.get('query') == query for r in related_searches):
-                    related_searches.append({"query": query})
+            related_searches.extend((suggestion.text for suggestion in suggestions), "search_box")
                     
         except (TimeoutException, NoSuchElementException) as e:
             logger.warning(f"Could not extract search suggestions: {str(e)}")
 
+    @cached("google_serp_result")
     def search(self, parameters: SearchParameters) -> Dict:
         """Perform Google search and return structured results."""
         try:
-            self.driver.get("https://www.google.com")
-            search_box = self.driver.find_element(By.NAME, "q")
-            search_box.send_keys(parameters.query + Keys.RETURN)
+            with self.metrics.phase("navigate"):
+                self.driver.get("https://www.google.com")
+                search_box = self.driver.find_element(By.NAME, "q")
+                search_box.send_keys(parameters.query + Keys.RETURN)
+            with self.metrics.phase("wait"):
+                self.readiness.page_ready("google_serp")
             
-            results = self._extract_search_results()
-            related_searches = self.extract_related_searches()
+            # Parse the results page once for both extractors
+            soup = page_soup(self.driver)
+            results = self._extract_search_results(soup)
+            with self.metrics.phase("extract_related"):
+                related_searches = self.extract_related_searches(soup)
 
             return {
                 "searchParameters": asdict(parameters),
@@ -191,20 +214,34 @@ class GoogleSearchScraper:
             logger.error(f"Error during search: {str(e)}")
             raise
 
-    def _extract_search_results(self) -> List[Dict]:
+    def _extract_search_results(self, soup: Optional[BeautifulSoup] = None) -> List[Dict]:
         """Extract search results with sitelinks."""
-        results = []
-        soup = BeautifulSoup(self.driver.page_source, "html.parser")
-
-        for idx, result in enumerate(soup.select(".g"), start=1):
-            try:
-                search_result = self._parse_search_result(result, idx)
-                if search_result:
-                    results.append(asdict(search_result))
-            except Exception as e:
-                logger.error(f"Error extracting result {idx}: {str(e)}")
-
-        return results
+        search_results = []
+        with self.metrics.phase("extract_organic"):
+            if soup is None:
+                soup = page_soup(self.driver)
+
+            for idx, result in enumerate(soup.select(".g"), start=1):
+                try:
+                    search_result = self._parse_search_result(result, idx)
+                    if search_result:
+                        search_results.append(search_result)
+                except Exception as e:
+                    logger.error(f"Error extracting result {idx}: {str(e)}")
+
+        with self.metrics.phase("sub_sitelinks"):
+            self._fill_sub_sitelinks(search_results)
+        return [asdict(search_result) for search_result in search_results]
+
+    def _fill_sub_sitelinks(self, search_results: List[SearchResult]):
+        """Fetch all sitelink pages concurrently, using the browser only for JS-rendered ones."""
+        sitelinks = [sitelink for result in search_results for sitelink in result.sitelinks]
+        sub_sitelinks = fetch_sub_sitelinks(
+            [sitelink.link for sitelink in sitelinks],
+            browser_fallback=self.extract_sub_sitelinks
+        )
+        for sitelink in sitelinks:
+            sitelink.sub_sitelinks = sub_sitelinks.get(sitelink.link, [])
 
     def _parse_search_result(self, result: BeautifulSoup, position: int) -> Optional[SearchResult]:
         """Parse individual search result."""
@@ -217,11 +254,10 @@ class GoogleSearchScraper:
 
         sitelinks = []
         for sitelink in result.select(".HiHjCd a"):
-            sub_sitelinks = self.extract_sub_sitelinks(sitelink["href"])
             sitelinks.append(Sitelink(
                 title=sitelink.text.strip(),
                 link=sitelink["href"],
-                sub_sitelinks=sub_sitelinks
+                sub_sitelinks=[]
             ))
 
         return SearchResult(
@@ -235,7 +271,7 @@ class GoogleSearchScraper:
     def save_results(self, results: Dict, filename: str):
         """Save search results to a JSON file."""
         try:
-            with open(filename, "w", encoding='utf-8') as f:
+            with self.metrics.phase("save"), open(filename, "w", encoding='utf-8') as f:
                 json.dump(results, f, indent=4, ensure_ascii=False)
             logger.info(f"Results saved to {filename}")
         except Exception as e:
@@ -253,10 +289,11 @@ def main():
     """Main execution function."""
     search_params = SearchParameters(query="Selenium in python")
     
-    with GoogleSearchScraper(headless=True) as scraper:
+    with GoogleSearchScraper(headless=True, cache=SerpCache()) as scraper:
         try:
             results = scraper.search(search_params)
             scraper.save_results(results, "google_search_results.json")
+            scraper.metrics.save("google_search_metrics.json", "google_search_metrics.prom")
         except Exception as e:
             logger.error(f"Search failed: {str(e)}")
 
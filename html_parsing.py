@@ -0,0 +1,106 @@
+import argparse
+import glob
+import json
+import logging
+import os
+import threading
+import time
+import weakref
+from functools import lru_cache
+from typing import Dict, List, Optional
+
+from bs4 import BeautifulSoup, FeatureNotFound
+
+
+logger = logging.getLogger(__name__)
+
+PARSER_ENV = "SCRAPER_HTML_PARSER"
+# Fastest first. lxml is a C parser (and already needed by sub_sitelinks);
+# html.parser is pure Python and always available.
+PARSERS = ("lxml", "html.parser")
+
+_page_cache = weakref.WeakKeyDictionary()
+_page_cache_lock = threading.Lock()
+
+
+def available_parsers() -> List[str]:
+    """Tree builders from PARSERS that BeautifulSoup can load here."""
+    available = []
+    for name in PARSERS:
+        try:
+            BeautifulSoup("", name)
+        except FeatureNotFound:
+            continue
+        available.append(name)
+    return available
+
+
+@lru_cache(maxsize=None)
+def default_parser() -> str:
+    """The parser named by $SCRAPER_HTML_PARSER, else the fastest one installed."""
+    preferred = os.environ.get(PARSER_ENV)
+    if preferred:
+        return preferred
+    return available_parsers()[0]
+
+
+def parse_html(html: str, parser: Optional[str] = None) -> BeautifulSoup:
+    """Parse `html` with `parser` (default: `default_parser()`); every backend yields the same BeautifulSoup API."""
+    return BeautifulSoup(html, parser or default_parser())
+
+
+def page_soup(driver, parser: Optional[str] = None) -> BeautifulSoup:
+    """Parsed tree of the driver's current page, reparsed only when its HTML changed.
+
+    Extractors that run one after another on the same page share one
+    parse. The tree is shared, so callers must not modify it.
+    """
+    parser = parser or default_parser()
+    html = driver.page_source
+    with _page_cache_lock:
+        cached = _page_cache.get(driver)
+    if cached is not None and cached[0] == parser and cached[1] == html:
+        return cached[2]
+    soup = parse_html(html, parser)
+    with _page_cache_lock:
+        _page_cache[driver] = (parser, html, soup)
+    return soup
+
+
+def benchmark(paths: List[str], parsers: Optional[List[str]] = None, repeat: int = 20) -> Dict:
+    """Median parse time per page for each parser, in milliseconds."""
+    parsers = parsers or available_parsers()
+    pages = {}
+    for path in paths:
+        with open(path, encoding="utf-8") as f:
+            html = f.read()
+        timings = {}
+        for parser in parsers:
+            runs = []
+            for _ in range(repeat):
+                start = time.perf_counter()
+                parse_html(html, parser)
+                runs.append((time.perf_counter() - start) * 1000)
+            runs.sort()
+            timings[parser] = round(runs[len(runs) // 2], 3)
+        pages[os.path.basename(path)] = {"bytes": len(html.encode("utf-8")), "median_ms": timings}
+
+    totals = {parser: round(sum(page["median_ms"][parser] for page in pages.values()), 3) for parser in parsers}
+    return {"runs": repeat, "pages": pages, "total_ms": totals}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare HTML parser backends on saved pages.")
+    parser.add_argument("html", nargs="*", help="Saved pages (default: fixtures/*serp*.html)")
+    parser.add_argument("--parser", action="append", dest="parsers", help="Backend to time; repeatable")
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    paths = args.html or sorted(glob.glob(os.path.join("fixtures", "*serp*.html")))
+    if not paths:
+        parser.error("no pages given and no fixtures found; run serp_fixtures.py first")
+    print(json.dumps(benchmark(paths, args.parsers, args.repeat), indent=4))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,148 @@
+import json
+import logging
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Dict, Optional
+
+
+logger = logging.getLogger(__name__)
+
+
+def _label(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n")
+
+
+class ScrapeMetrics:
+    """WebDriver command counts and named phase timings for one scrape run.
+
+    Commands are counted by WebDriver command name and attributed to the
+    innermost phase open on the calling thread, so one instance can be shared
+    by scrapers running in parallel threads. Phases may nest; their times are
+    inclusive. The scrapers share the phase names navigate, wait, extract_kg,
+    extract_organic, extract_related, extract_ads, sub_sitelinks and save.
+    """
+
+    def __init__(self, scraper: str, run_id: Optional[str] = None):
+        self.scraper = scraper
+        self.run_id = run_id or datetime.now().strftime("%Y%m%d_%H%M%S")
+        self.started_at = time.time()
+
+        self.command_counts: Dict[str, int] = defaultdict(int)
+        self.command_seconds: Dict[str, float] = defaultdict(float)
+        self.phase_counts: Dict[str, int] = defaultdict(int)
+        self.phase_seconds: Dict[str, float] = defaultdict(float)
+        self.phase_max_seconds: Dict[str, float] = defaultdict(float)
+        self.phase_commands: Dict[str, int] = defaultdict(int)
+
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    def _stack(self):
+        if not hasattr(self._local, "phases"):
+            self._local.phases = []
+        return self._local.phases
+
+    @contextmanager
+    def phase(self, name: str):
+        """Time the enclosed block as `name`."""
+        stack = self._stack()
+        stack.append(name)
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            stack.pop()
+            with self._lock:
+                self.phase_counts[name] += 1
+                self.phase_seconds[name] += elapsed
+                self.phase_max_seconds[name] = max(self.phase_max_seconds[name], elapsed)
+
+    def record_command(self, command: str, seconds: float):
+        stack = self._stack()
+        with self._lock:
+            self.command_counts[command] += 1
+            self.command_seconds[command] += seconds
+            self.phase_commands[stack[-1] if stack else "unphased"] += 1
+
+    def report(self) -> Dict:
+        """Per-run summary, suitable for json.dump."""
+        with self._lock:
+            return {
+                "scraper": self.scraper,
+                "run_id": self.run_id,
+                "elapsed_s": round(time.time() - self.started_at, 3),
+                "webdriver_commands": sum(self.command_counts.values()),
+                "commands": {
+                    command: {"count": count, "seconds": round(self.command_seconds[command], 4)}
+                    for command, count in sorted(self.command_counts.items(), key=lambda item: -item[1])
+                },
+                "phases": {
+                    name: {
+                        "count": self.phase_counts[name],
+                        "seconds": round(self.phase_seconds[name], 4),
+                        "max_seconds": round(self.phase_max_seconds[name], 4),
+                        "commands": self.phase_commands.get(name, 0),
+                    }
+                    for name in self.phase_counts
+                },
+                "unphased_commands": self.phase_commands.get("unphased", 0),
+            }
+
+    def to_prometheus(self, prefix: str = "scraper") -> str:
+        """Render the counters in the Prometheus text exposition format."""
+        scraper = _label(self.scraper)
+        lines = []
+
+        def metric(name, help_text, samples):
+            lines.append(f"# HELP {prefix}_{name} {help_text}")
+            lines.append(f"# TYPE {prefix}_{name} counter")
+            for labels, value in samples:
+                rendered = ",".join([f"scraper=\"{scraper}\""] + [f"{k}=\"{_label(v)}\"" for k, v in labels])
+                lines.append(f"{prefix}_{name}{{{rendered}}} {value}")
+
+        with self._lock:
+            metric("webdriver_commands_total", "WebDriver commands sent, by command.",
+                   [((("command", c),), n) for c, n in sorted(self.command_counts.items())])
+            metric("webdriver_command_seconds_total", "Time spent waiting on WebDriver commands.",
+                   [((("command", c),), round(s, 6)) for c, s in sorted(self.command_seconds.items())])
+            metric("phase_runs_total", "Times each scrape phase ran.",
+                   [((("phase", p),), n) for p, n in sorted(self.phase_counts.items())])
+            metric("phase_seconds_total", "Wall time spent in each scrape phase.",
+                   [((("phase", p),), round(s, 6)) for p, s in sorted(self.phase_seconds.items())])
+            metric("phase_webdriver_commands_total", "WebDriver commands sent inside each phase.",
+                   [((("phase", p),), n) for p, n in sorted(self.phase_commands.items())])
+        return "\n".join(lines) + "\n"
+
+    def save(self, report_path: str, prometheus_path: Optional[str] = None):
+        """Write the JSON report and, optionally, a Prometheus textfile."""
+        with open(report_path, "w", encoding="utf-8") as f:
+            json.dump(self.report(), f, indent=4)
+        if prometheus_path:
+            with open(prometheus_path, "w", encoding="utf-8") as f:
+                f.write(self.to_prometheus())
+        logger.info(f"Saved {self.scraper} metrics to {report_path}")
+
+
+def instrument_driver(driver, metrics: ScrapeMetrics):
+    """Count and time every WebDriver command `driver` sends.
+
+    Only the instance is patched. Instrumenting a driver again (e.g. a pooled
+    driver handed to a new scraper) just redirects it to the new metrics.
+    """
+    if getattr(driver, "_scrape_metrics", None) is None:
+        original_execute = driver.execute
+
+        def execute(driver_command, params=None):
+            start = time.perf_counter()
+            try:
+                return original_execute(driver_command, params)
+            finally:
+                driver._scrape_metrics.record_command(driver_command, time.perf_counter() - start)
+
+        driver.execute = execute
+    driver._scrape_metrics = metrics
+    return driver
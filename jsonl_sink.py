@@ -0,0 +1,250 @@
+import glob
+import gzip
+import io
+import json
+import logging
+import os
+import re
+import threading
+import time
+from typing import Any, Dict, Iterator, List, Optional
+
+
+logger = logging.getLogger(__name__)
+
+COMPRESSION_EXTENSIONS = {None: "", "gzip": ".gz", "zstd": ".zst"}
+
+
+def _zstandard():
+    try:
+        import zstandard
+    except ImportError:
+        raise ImportError("zstd compression requires the 'zstandard' package")
+    return zstandard
+
+
+def segment_paths(path: str) -> List[str]:
+    """All segments written for `path`, oldest first."""
+    stem, suffix = os.path.splitext(path)
+    pattern = re.compile(re.escape(os.path.basename(stem)) + r"\.(\d{5})" + re.escape(suffix) + r"(\.gz|\.zst)?$")
+    segments = []
+    for candidate in glob.glob(f"{glob.escape(stem)}.*{suffix}*"):
+        match = pattern.match(os.path.basename(candidate))
+        if match:
+            segments.append((int(match.group(1)), candidate))
+    return [candidate for _, candidate in sorted(segments)]
+
+
+class JsonlSink:
+    """Append-only JSON Lines writer shared by the scrapers.
+
+    Every record is written as one compact line as soon as it is produced.
+    Lines are flushed to the OS immediately and fsynced every `fsync_every`
+    records or `fsync_interval` seconds. Output is split into numbered
+    segments once a segment reaches `rotate_bytes`, optionally compressed
+    with gzip or zstd. Safe to share between threads.
+
+    A new sink never replays or destroys a previous run: segments already
+    at `path` are moved aside to `<stem>.<timestamp><suffix>` (rebuild them
+    with `write_documents` on that path). Pass `resume=True` to keep
+    appending to them instead (e.g. when a crawl journal resumes the run),
+    or `overwrite=True` to delete them. Writes after `close` are dropped
+    with a warning, so late threads cannot crash on a closed file.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        compression: Optional[str] = None,
+        rotate_bytes: Optional[int] = 64 * 1024 * 1024,
+        fsync_every: int = 50,
+        fsync_interval: float = 5.0,
+        resume: bool = False,
+        overwrite: bool = False,
+    ):
+        if resume and overwrite:
+            raise ValueError("resume and overwrite are mutually exclusive")
+        if compression not in COMPRESSION_EXTENSIONS:
+            raise ValueError(f"Unsupported compression: {compression}")
+        self.path = path
+        self.compression = compression
+        self.rotate_bytes = rotate_bytes
+        self.fsync_every = fsync_every
+        self.fsync_interval = fsync_interval
+        self.records_written = 0
+
+        self._lock = threading.Lock()
+        self._pending = 0
+        self._last_sync = time.monotonic()
+        self._raw = None
+        self._stream = None
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        existing = segment_paths(path)
+        self._seq = 0
+        if existing and resume:
+            self._seq = int(re.search(r"\.(\d{5})", os.path.basename(existing[-1])).group(1))
+        elif existing and overwrite:
+            for segment in existing:
+                os.remove(segment)
+        elif existing:
+            moved_to = self._move_aside(existing)
+            logger.warning(f"Moved the previous run's {len(existing)} segment(s) of {path} to {moved_to}")
+        self._open_segment()
+
+    def _move_aside(self, segments: List[str]) -> str:
+        """Rename `segments` to the segments of a timestamped sibling path and return that path."""
+        stem, suffix = os.path.splitext(self.path)
+        stamp = time.strftime("%Y%m%d_%H%M%S", time.localtime(os.path.getmtime(segments[-1])))
+        target, n = f"{stem}.{stamp}{suffix}", 1
+        while segment_paths(target):
+            n += 1
+            target = f"{stem}.{stamp}_{n}{suffix}"
+        for segment in segments:
+            # "<stem>.00003.jsonl.gz" -> "<stem>.<stamp>.00003.jsonl.gz"
+            os.rename(segment, os.path.splitext(target)[0] + segment[len(stem):])
+        return target
+
+    def _segment_path(self, seq: int) -> str:
+        stem, suffix = os.path.splitext(self.path)
+        return f"{stem}.{seq:05d}{suffix}{COMPRESSION_EXTENSIONS[self.compression]}"
+
+    def _open_segment(self):
+        self._raw = open(self._segment_path(self._seq), "ab")
+        if self.compression == "gzip":
+            self._stream = gzip.GzipFile(fileobj=self._raw, mode="ab")
+        elif self.compression == "zstd":
+            self._stream = _zstandard().ZstdCompressor().stream_writer(self._raw, closefd=False)
+        else:
+            self._stream = self._raw
+
+    def _close_segment(self):
+        self._sync()
+        if self._stream is not self._raw:
+            self._stream.close()
+        self._raw.close()
+
+    def _sync(self):
+        if self.compression == "zstd":
+            self._stream.flush(_zstandard().FLUSH_FRAME)
+        else:
+            self._stream.flush()
+        self._raw.flush()
+        os.fsync(self._raw.fileno())
+        self._pending = 0
+        self._last_sync = time.monotonic()
+
+    def write(self, record: Any):
+        """Append one record."""
+        line = (json.dumps(record, ensure_ascii=False, separators=(",", ":")) + "\n").encode("utf-8")
+        with self._lock:
+            if self._raw.closed:
+                logger.warning(f"Dropping record written to {self.path} after close")
+                return
+            self._stream.write(line)
+            if self._stream is self._raw:
+                self._raw.flush()
+            self.records_written += 1
+            self._pending += 1
+
+            if self._pending >= self.fsync_every or time.monotonic() - self._last_sync >= self.fsync_interval:
+                self._sync()
+
+            if self.rotate_bytes and self._raw.tell() >= self.rotate_bytes:
+                self._close_segment()
+                self._seq += 1
+                self._open_segment()
+
+    def append(self, document: str, path: List[Any], value: Any):
+        """Record `value` being appended to the list at `path` inside `document`."""
+        self.write({"doc": document, "op": "append", "path": path, "value": value})
+
+    def set(self, document: str, path: List[Any], value: Any):
+        """Record `value` being stored at `path` inside `document`."""
+        self.write({"doc": document, "op": "set", "path": path, "value": value})
+
+    def flush(self):
+        """Force every record written so far to disk, e.g. before checkpointing past it."""
+        with self._lock:
+            if self._raw is not None and not self._raw.closed:
+                self._sync()
+
+    def close(self):
+        with self._lock:
+            if self._raw is not None and not self._raw.closed:
+                self._close_segment()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+
+def _open_segment_for_read(segment: str):
+    if segment.endswith(".gz"):
+        return gzip.open(segment, "rt", encoding="utf-8")
+    if segment.endswith(".zst"):
+        reader = _zstandard().ZstdDecompressor().stream_reader(open(segment, "rb"), read_across_frames=True)
+        return io.TextIOWrapper(reader, encoding="utf-8")
+    return open(segment, encoding="utf-8")
+
+
+def read_records(path: str) -> Iterator[Any]:
+    """Yield every record written for `path`, skipping a torn final line."""
+    for segment in segment_paths(path):
+        with _open_segment_for_read(segment) as f:
+            try:
+                for line in f:
+                    line = line.strip()
+                    if not line:
+                        continue
+                    try:
+                        yield json.loads(line)
+                    except json.JSONDecodeError:
+                        logger.warning(f"Skipping truncated record in {segment}")
+            except EOFError:
+                # Compressed segment cut off by a crash; keep what was readable
+                logger.warning(f"Segment {segment} ends mid-stream")
+
+
+def reconstruct_documents(path: str) -> Dict[str, Any]:
+    """Replay `append`/`set` records into the documents they describe."""
+    documents: Dict[str, Any] = {}
+    for record in read_records(path):
+        if not isinstance(record, dict) or "doc" not in record:
+            continue
+        name, op, keys, value = record["doc"], record["op"], record["path"], record["value"]
+
+        if not keys:
+            if op == "append":
+                documents.setdefault(name, []).append(value)
+            else:
+                documents[name] = value
+            continue
+
+        node = documents.setdefault(name, {})
+        for key in keys[:-1]:
+            node = node.setdefault(key, {})
+        if op == "append":
+            node.setdefault(keys[-1], []).append(value)
+        else:
+            node[keys[-1]] = value
+    return documents
+
+
+def write_documents(path: str, output_dir: str = ".", indent: int = 4) -> List[str]:
+    """Rebuild the pretty-printed JSON files from a sink and return their paths."""
+    written = []
+    for name, document in reconstruct_documents(path).items():
+        filename = os.path.join(output_dir, name)
+        directory = os.path.dirname(filename)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(filename, "w", encoding="utf-8") as f:
+            json.dump(document, f, indent=indent, ensure_ascii=False)
+        written.append(filename)
+    return written
@@ -6,28 +6,44 @@ from selenium.webdriver.common.keys import Keys
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 import chromedriver_autoinstaller
+import argparse
+import hashlib
 import json
 import os
+import re
 import sys
 import time
 import traceback
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from contextlib import contextmanager
+
+from driver_pool import DriverPool
+from jsonl_sink import JsonlSink, segment_paths
+from readiness import wait_for_page
+from serp_cache import SerpCache, make_key
+
+def build_chrome_options():
+    chrome_options = Options()
+    chrome_options.add_argument('--headless=new')
+    chrome_options.add_argument('--no-sandbox')
+    chrome_options.add_argument('--disable-dev-shm-usage')
+    chrome_options.add_argument('--disable-gpu')
+    chrome_options.add_argument('--log-level=3')  # Suppress logging
+    chrome_options.add_experimental_option('excludeSwitches', ['enable-logging'])
+    return chrome_options
+
+def create_driver_pool(size=1, **kwargs):
+    """Create a pool of warm drivers to reuse across queries."""
+    chromedriver_autoinstaller.install()
+    return DriverPool(size=size, options_factory=build_chrome_options, **kwargs)
 
 def setup_chrome_driver():
     try:
         # Auto-install the correct chromedriver version
         chromedriver_autoinstaller.install()
         
-        # Set up Chrome options
-        chrome_options = Options()
-        chrome_options.add_argument('--headless=new')
-        chrome_options.add_argument('--no-sandbox')
-        chrome_options.add_argument('--disable-dev-shm-usage')
-        chrome_options.add_argument('--disable-gpu')
-        chrome_options.add_argument('--log-level=3')  # Suppress logging
-        chrome_options.add_experimental_option('excludeSwitches', ['enable-logging'])
-        
         # Initialize the driver without explicit service
-        driver = webdriver.Chrome(options=chrome_options)
+        driver = webdriver.Chrome(options=build_chrome_options())
         return driver
     except Exception as e:
         print(f"\nError setting up Chrome driver: {str(e)}")
@@ -35,24 +51,49 @@ def setup_chrome_driver():
         print(traceback.format_exc())
         return None
 
-def scrape_knowledge_graph(query):
-    driver = None
+@contextmanager
+def _one_shot_driver():
+    driver = setup_chrome_driver()
+    try:
+        yield driver
+    finally:
+        if driver:
+            try:
+                driver.quit()
+            except:
+                pass
+
+def scrape_knowledge_graph(query, pool=None, cache=None):
+    key = make_key("knowledge_graph", query)
+    if cache is not None:
+        result = cache.get(key)
+        if result is not None:
+            return result
+    
+    try:
+        with (pool.lease() if pool else _one_shot_driver()) as driver:
+            if not driver:
+                return {"error": "Failed to initialize Chrome driver"}
+            result = _scrape_knowledge_graph(driver, query)
+    except Exception as e:
+        return {"error": f"Scraping failed: {str(e)}"}
+    
+    if cache is not None and "error" not in result:
+        cache.set(key, result, "knowledge_graph")
+    return result
+
+def _scrape_knowledge_graph(driver, query):
     try:
-        # Setup driver
-        driver = setup_chrome_driver()
-        if not driver:
-            return {"error": "Failed to initialize Chrome driver"}
-        
         # Navigate to Google
         driver.get("https://www.google.com")
-        time.sleep(2)
+        wait_for_page(driver, "google_home")
         
         # Find and interact with search box
         search_box = driver.find_element(By.NAME, "q")
         search_box.clear()
         search_box.send_keys(query)
         search_box.send_keys(Keys.RETURN)
-        time.sleep(3)
+        wait_for_page(driver, "google_serp", previous=search_box)
         
         # Initialize result
         result = {
@@ -102,12 +143,6 @@ def scrape_knowledge_graph(query):
         
     except Exception as e:
         return {"error": f"Scraping failed: {str(e)}"}
-    finally:
-        if driver:
-            try:
-                driver.quit()
-            except:
-                pass
 
 def safe_extract(driver, css_selector):
     try:
@@ -123,7 +158,118 @@ def safe_extract_attribute(driver, css_selector, attribute):
     except:
         return None
 
-def main():
+def result_filename(output_dir, query):
+    """Per-query path inside `output_dir`. Keeps the historical `<query>_info.json` name when the
+    query is a plain word/number phrase; anything else (slashes, '..', very long text) gets a short
+    slug of the query plus a hash so it still maps to one distinct file."""
+    name = query.replace(' ', '_').lower()
+    if len(name) <= 100 and re.fullmatch(r'[\w-]+(\.[\w-]+)*', name):
+        return os.path.join(output_dir, f"{name}_info.json")
+    slug = re.sub(r'[^a-z0-9]+', '_', query.lower()).strip('_')[:60] or "query"
+    digest = hashlib.sha1(query.encode('utf-8')).hexdigest()[:8]
+    return os.path.join(output_dir, f"{slug}_{digest}_info.json")
+
+def read_queries(path):
+    """Yield non-empty queries from a file, one per line ('-' reads stdin)."""
+    f = sys.stdin if path == '-' else open(path, encoding='utf-8')
+    try:
+        for line in f:
+            query = line.strip()
+            if query:
+                yield query
+    finally:
+        if f is not sys.stdin:
+            f.close()
+
+def percentile(sorted_values, fraction):
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(round(fraction * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+def run_batch(queries, workers=4, output_dir="search_results", jsonl_path=None, cache=None, pool=None):
+    """Scrape many queries through a pool of long-lived drivers.
+
+    Results go to `<output_dir>/<query>_info.json` (see `result_filename`), or to one
+    JSONL file when `jsonl_path` is given; the sink names it `<stem>.00000<suffix>` and
+    the report's "output" lists the actual path. A query whose result cannot be written
+    counts as an error instead of stopping the batch. At most `workers * 2` queries are in flight, so
+    the input can be arbitrarily long. Returns a throughput/latency report.
+    """
+    own_pool = pool is None
+    pool = pool or create_driver_pool(size=workers)
+    sink = JsonlSink(jsonl_path, rotate_bytes=None) if jsonl_path else None
+    if sink is None:
+        os.makedirs(output_dir, exist_ok=True)
+
+    latencies = []
+    counts = {"total": 0, "errors": 0, "no_knowledge_graph": 0}
+
+    def work(query):
+        start = time.monotonic()
+        try:
+            result = scrape_knowledge_graph(query, pool=pool, cache=cache)
+        except Exception as e:
+            result = {"error": f"Scraping failed: {str(e)}"}
+        return query, result, time.monotonic() - start
+
+    def record(future):
+        query, result, elapsed = future.result()
+        latencies.append(elapsed)
+        counts["total"] += 1
+        failed = "knowledgeGraph" not in result and "searchParameters" not in result
+        if failed:
+            counts["errors"] += 1
+        elif "knowledgeGraph" not in result:
+            counts["no_knowledge_graph"] += 1
+
+        try:
+            if sink is not None:
+                sink.write({"query": query, "result": result})
+            else:
+                with open(result_filename(output_dir, query), 'w', encoding='utf-8') as f:
+                    json.dump(result, f, indent=4, ensure_ascii=False)
+        except (OSError, TypeError, ValueError) as e:
+            if not failed:
+                counts["errors"] += 1
+            print(f"Could not save result for {query!r}: {e}")
+
+        if counts["total"] % 100 == 0:
+            print(f"Processed {counts['total']} queries...")
+
+    started = time.monotonic()
+    try:
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            in_flight = set()
+            for query in queries:
+                if len(in_flight) >= workers * 2:
+                    done, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        record(future)
+                in_flight.add(executor.submit(work, query))
+            for future in wait(in_flight).done:
+                record(future)
+    finally:
+        if sink is not None:
+            sink.close()
+        if own_pool:
+            pool.close()
+
+    elapsed = time.monotonic() - started
+    latencies.sort()
+    return {
+        "queries": counts["total"],
+        "errors": counts["errors"],
+        "no_knowledge_graph": counts["no_knowledge_graph"],
+        "error_rate": round(counts["errors"] / counts["total"], 4) if counts["total"] else 0.0,
+        "elapsed_s": round(elapsed, 2),
+        "throughput_qps": round(counts["total"] / elapsed, 3) if elapsed else 0.0,
+        "p50_latency_s": round(percentile(latencies, 0.50), 3),
+        "p95_latency_s": round(percentile(latencies, 0.95), 3),
+        "output": segment_paths(jsonl_path) if sink is not None else output_dir
+    }
+
+def interactive():
     # Ensure output directory exists
     output_dir = "search_results"
     os.makedirs(output_dir, exist_ok=True)
@@ -135,6 +281,10 @@ def main():
     # Check Python version
     print(f"Python Version: {sys.version}")
     
+    # Keep one warm browser for the whole session instead of one per query
+    pool = create_driver_pool()
+    cache = SerpCache()
+    
     while True:
         try:
             # Get query
@@ -149,11 +299,10 @@ def main():
             
             # Execute search
             print("\nSearching...")
-            result = scrape_knowledge_graph(query)
+            result = scrape_knowledge_graph(query, pool=pool, cache=cache)
             
             # Save results
-            filename = os.path.join(output_dir, 
-                                  f"{query.replace(' ', '_').lower()}_info.json")
+            filename = result_filename(output_dir, query)
             
             with open(filename, 'w', encoding='utf-8') as f:
                 json.dump(result, f, indent=4, ensure_ascii=False)
@@ -167,6 +316,30 @@ def main():
             print(f"\nAn error occurred: {str(e)}")
             print("\nDetailed error information:")
             print(traceback.format_exc())
+    
+    pool.close()
+    print(f"Cache: {cache.stats()}")
+    cache.close()
+
+def main():
+    parser = argparse.ArgumentParser(description="Google Knowledge Graph Scraper")
+    parser.add_argument("--batch", metavar="FILE", help="Read queries from FILE, one per line ('-' for stdin)")
+    parser.add_argument("--workers", type=int, default=4, help="Number of browser workers in batch mode")
+    parser.add_argument("--output-dir", default="search_results", help="Directory for per-query JSON files")
+    parser.add_argument("--jsonl", metavar="PATH", help="Write all batch results to one JSONL file instead "
+                        "(saved as PATH's first segment, e.g. out.00000.jsonl)")
+    args = parser.parse_args()
+
+    if not args.batch:
+        interactive()
+        return
+
+    cache = SerpCache()
+    report = run_batch(read_queries(args.batch), workers=args.workers, output_dir=args.output_dir,
+                       jsonl_path=args.jsonl, cache=cache)
+    report["cache"] = cache.stats()
+    cache.close()
+    print(json.dumps(report, indent=4))
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -1,21 +1,32 @@
-import json
-import time
 from selenium import webdriver
 from selenium.webdriver.common.by import By
 from selenium.webdriver.common.keys import Keys
-from bs4 import BeautifulSoup
+from driver_pool import get_default_pool
+from fanout import TaskDrivers, run_concurrently
+from html_parsing import page_soup
+from jsonl_sink import JsonlSink, write_documents
+from readiness import wait_for_page
+from related_collector import RelatedCollector
+from resource_blocking import apply_blocking
+from selector_registry import get_default_registry
+from sub_sitelinks import fetch_sub_sitelinks
 from selenium.webdriver.common.action_chains import ActionChains
 
 
 
-def setup_driver():
-    """Sets up the Selenium WebDriver."""
+def chrome_options():
+    """Builds the Chrome options used by this scraper."""
     options = webdriver.ChromeOptions()
     options.add_argument("--headless")  # Run in headless mode
     options.add_argument("--no-sandbox")
     options.add_argument("--disable-dev-shm-usage")
-    driver = webdriver.Chrome(options=options)
-    return driver
+    return options
+
+
+def setup_driver(blocking="serp"):
+    """Sets up the Selenium WebDriver with a resource blocking profile."""
+    driver = webdriver.Chrome(options=chrome_options())
+    return apply_blocking(driver, blocking)
 
 def debug_screenshot(driver, filename):
     """Takes a screenshot for debugging purposes."""
@@ -23,22 +34,22 @@ def debug_screenshot(driver, filename):
     print(f"Saved screenshot: {filename}")
 
 
-def extract_google_related_searches(driver):
-    """Extract related searches from Google search results page."""
-    related_searches = []
+def extract_google_related_searches(driver, soup=None):
+    """Extract related searches from Google search results page, reusing `soup` if it is already parsed."""
+    related_searches = RelatedCollector()
     try:
-        # Wait for related searches to load
-        time.sleep(2)
-        
-        # Get page source after JavaScript execution
-        soup = BeautifulSoup(driver.page_source, "html.parser")
+        if soup is None:
+            # Wait for related searches to load
+            wait_for_page(driver, "google_serp", timeout=5)
+            # Get page source after JavaScript execution
+            soup = page_soup(driver)
         
-        # Look for related searches in multiple possible locations
-        related_search_divs = soup.select("div.BNeawe.s3v9rd.AP7Wnd")  # Main related searches
-        if not related_search_divs:
-            related_search_divs = soup.select("div.brs_col")  # Alternative location
-        if not related_search_divs:
-            related_search_divs = soup.select("div[jsname='Cpkphb']")  # Another alternative
+        # Look for related searches in multiple possible locations, trying the one that worked lately first
+        block_selector, related_search_divs = get_default_registry().first("google.related_blocks", [
+            "div.BNeawe.s3v9rd.AP7Wnd",  # Main related searches
+            "div.brs_col",  # Alternative location
+            "div[jsname='Cpkphb']",  # Another alternative
+        ], soup.select)
             
         for div in related_search_divs:
             links = div.select("a")
@@ -52,27 +63,20 @@ def extract_google_related_searches(driver):
                 else:
                     continue
                     
-                if title and not any(r['title'] == title for r in related_searches):
-                    related_searches.append({
-                        "title": title,
-                        "link": full_link
-                    })
+                related_searches.add(title, block_selector, field="title", link=full_link)
                     
         # Also check for "People also search for" section
         people_also_search = soup.select("div.g-blk")
         for item in people_also_search:
             title = item.text.strip()
-            if title and not any(r['title'] == title for r in related_searches):
-                related_searches.append({
-                    "title": title,
-                    "link": f"https://www.google.com/search?q={title.replace(' ', '+')}"
-                })
+            related_searches.add(title, "people_also_search", field="title",
+                                 link=f"https://www.google.com/search?q={title.replace(' ', '+')}")
                 
     except Exception as e:
         print(f"Error extracting Google related searches: {e}")
         debug_screenshot(driver, "google_related_error.png")
         
-    return related_searches
+    return related_searches.items()
 
 
 
@@ -82,8 +86,8 @@ def extract_sub_sitelinks(driver, sitelink_url):
     sub_sitelinks = []
     try:
         driver.get(sitelink_url)
-        time.sleep(2)  # Allow the page to load
-        soup = BeautifulSoup(driver.page_source, "html.parser")
+        wait_for_page(driver, "document")  # Allow the page to load
+        soup = page_soup(driver)
 
         # Extract links from the page
         for link in soup.select("a[href]"):  # Select all anchor tags with href
@@ -102,10 +106,10 @@ def google_search_with_related_and_sub_sitelinks(driver, query):
     search_box = driver.find_element(By.NAME, "q")
     search_box.send_keys(query)
     search_box.send_keys(Keys.RETURN)
-    time.sleep(2)
+    wait_for_page(driver, "google_serp", previous=search_box)
 
     # Get the initial results
-    soup = BeautifulSoup(driver.page_source, "html.parser")
+    soup = page_soup(driver)
     results = []
 
     # Parse organic results
@@ -117,16 +121,10 @@ def google_search_with_related_and_sub_sitelinks(driver, query):
         # Parse sitelinks
         sitelinks = []
         for sitelink in result.select(".HiHjCd a"):
-            sitelink_title = sitelink.text.strip()
-            sitelink_link = sitelink["href"]
-
-            # Extract sub-sitelinks
-            sub_sitelinks = extract_sub_sitelinks(driver, sitelink_link)
-
             sitelinks.append({
-                "title": sitelink_title,
-                "link": sitelink_link,
-                "sub_sitelinks": sub_sitelinks
+                "title": sitelink.text.strip(),
+                "link": sitelink["href"],
+                "sub_sitelinks": []
             })
 
         results.append({
@@ -137,29 +135,37 @@ def google_search_with_related_and_sub_sitelinks(driver, query):
             "position": idx,
         })
 
-    # Extract related searches
-    related_searches = extract_google_related_searches(driver)
+    # Extract related searches while the driver is still on the results page, from the same parse
+    related_searches = extract_google_related_searches(driver, soup)
+
+    # Fetch every sub-sitelink page concurrently over HTTP; the browser is only
+    # used for pages that need JavaScript
+    sitelink_urls = [s["link"] for r in results for s in r["sitelinks"]]
+    sub_sitelinks = fetch_sub_sitelinks(sitelink_urls, browser_fallback=lambda url: extract_sub_sitelinks(driver, url))
+    for result in results:
+        for sitelink in result["sitelinks"]:
+            sitelink["sub_sitelinks"] = sub_sitelinks.get(sitelink["link"], [])
 
     return results, related_searches
 
 
 def extract_youtube_related_searches(driver, query):
     """Extract related searches and suggestions from YouTube."""
-    suggestions = []
+    suggestions = RelatedCollector()
     try:
         # Navigate to YouTube search
         if not driver.current_url.startswith('https://www.youtube.com'):
             driver.get('https://www.youtube.com')
-            time.sleep(2)
+            wait_for_page(driver, "youtube_home")
             
         # Find and click search box
         search_box = driver.find_element(By.NAME, "search_query")
         search_box.clear()
         search_box.send_keys(query)
-        time.sleep(2)  # Wait for suggestions to load
+        wait_for_page(driver, "youtube_suggestions", timeout=3)  # Wait for suggestions to load
         
         # Get autocomplete suggestions
-        soup = BeautifulSoup(driver.page_source, "html.parser")
+        soup = page_soup(driver)
         
         # Try multiple possible selectors for suggestions
         suggestion_elements = soup.select("ytd-video-suggestion-renderer")
@@ -169,36 +175,26 @@ def extract_youtube_related_searches(driver, query):
             suggestion_elements = soup.select("[role='option']")
             
         for element in suggestion_elements:
-            title = element.text.strip()
-            if title and not any(s['title'] == title for s in suggestions):
-                suggestions.append({
-                    "title": title,
-                    "type": "autocomplete"
-                })
+            suggestions.add(element.text, "autocomplete", field="title", type="autocomplete")
                 
         # Now get related searches from search results page
         search_box.send_keys(Keys.RETURN)
-        time.sleep(3)
+        wait_for_page(driver, "youtube_results")
         
-        soup = BeautifulSoup(driver.page_source, "html.parser")
+        soup = page_soup(driver)
         
         # Look for related searches in search results page
         related_sections = soup.select("ytd-horizontal-card-list-renderer")
         for section in related_sections:
             items = section.select("ytd-search-refinement-card-renderer")
             for item in items:
-                title = item.text.strip()
-                if title and not any(s['title'] == title for s in suggestions):
-                    suggestions.append({
-                        "title": title,
-                        "type": "related"
-                    })
+                suggestions.add(item.text, "related", field="title", type="related")
                     
     except Exception as e:
         print(f"Error extracting YouTube related searches: {e}")
         debug_screenshot(driver, "youtube_related_error.png")
         
-    return suggestions
+    return suggestions.items()
 
 
 def youtube_search(driver, query):
@@ -207,9 +203,9 @@ def youtube_search(driver, query):
     search_box = driver.find_element(By.NAME, "search_query")
     search_box.send_keys(query)
     search_box.send_keys(Keys.RETURN)
-    time.sleep(2)
+    wait_for_page(driver, "youtube_results")
 
-    soup = BeautifulSoup(driver.page_source, "html.parser")
+    soup = page_soup(driver)
     results = []
     for idx, result in enumerate(soup.select("ytd-video-renderer"), start=1):
         title_tag = result.select_one("#video-title")
@@ -233,9 +229,9 @@ def bing_search(driver, query):
     search_box = driver.find_element(By.NAME, "q")
     search_box.send_keys(query)
     search_box.send_keys(Keys.RETURN)
-    time.sleep(2)
+    wait_for_page(driver, "bing_serp", previous=search_box)
 
-    soup = BeautifulSoup(driver.page_source, "html.parser")
+    soup = page_soup(driver)
     results = []
     for idx, result in enumerate(soup.select(".b_algo"), start=1):
         title = result.select_one("h2").text
@@ -251,40 +247,97 @@ def bing_search(driver, query):
     return results
 
 
-def main():
+# Output keys filled by each engine, in the order its search function returns them
+ENGINE_OUTPUT_KEYS = {
+    "google": ("googleResults", "googleRelatedSearches"),
+    "bing": ("bingResults",),
+    "youtube": ("youtubeResults", "youtubeRelatedSearches"),
+}
+
+
+def search_all(query, pool=None, timeout=120, sink=None, document="main.json"):
+    """Run the Google, Bing and YouTube searches concurrently and merge the output.
+
+    With a sink, each engine's output keys are streamed to it as soon as that engine finishes.
+    """
+    pool = pool or get_default_pool(size=3, options_factory=chrome_options)
+    search_parameters = {
+        "q": query,
+        "gl": "us",
+        "hl": "en",
+        "autocorrect": True,
+        "page": 1,
+        "type": "search"
+    }
+    if sink is not None:
+        sink.set(document, ["searchParameters"], search_parameters)
+    drivers = TaskDrivers(pool)
+
+    def engine(name, search):
+        def task():
+            with pool.lease() as driver:
+                drivers.track(name, driver)
+                try:
+                    apply_blocking(driver, "serp")
+                    result = search(driver, query)
+                finally:
+                    drivers.untrack(name)
+            if drivers.abandoned(name):
+                return result
+            if sink is not None:
+                keys = ENGINE_OUTPUT_KEYS[name]
+                for key, value in zip(keys, result if len(keys) > 1 else (result,)):
+                    sink.set(document, [key], value)
+            return result
+        return task
+
+    empty = {"google": ([], []), "bing": [], "youtube": ([], [])}
+
+    def timed_out(name):
+        drivers.abandon(name)
+        return failed(name, f"{name} timed out")
+
+    def failed(name, reason):
+        # Record the failure explicitly so the rebuilt document never shows stale or missing keys
+        if sink is not None:
+            keys = ENGINE_OUTPUT_KEYS[name]
+            for key, value in zip(keys, empty[name] if len(keys) > 1 else (empty[name],)):
+                sink.set(document, [key], value)
+            sink.set(document, ["errors", name], reason)
+        return empty[name]
+
+    results = run_concurrently({
+        "google": engine("google", google_search_with_related_and_sub_sitelinks),
+        "bing": engine("bing", bing_search),
+        "youtube": engine("youtube", youtube_search),
+    }, timeout=timeout,
+        on_timeout=timed_out,
+        on_error=lambda name, e: failed(name, str(e)))
+
+    google_results, google_related = results["google"]
+    youtube_results, youtube_related = results["youtube"]
+
+    return {
+        "searchParameters": search_parameters,
+        "googleResults": google_results,
+        "googleRelatedSearches": google_related,
+        "bingResults": results["bing"],
+        "youtubeResults": youtube_results,
+        "youtubeRelatedSearches": youtube_related,
+    }
+
+
+def main(pool=None):
     query = "apple inc"
-    driver = setup_driver()
 
-    try:
-        # Perform searches
-        google_results, google_related = google_search_with_related_and_sub_sitelinks(driver, query)
-        bing_results = bing_search(driver, query)
-        youtube_results, youtube_related = youtube_search(driver, query)
-
-        # Construct final output
-        output = {
-            "searchParameters": {
-                "q": query,
-                "gl": "us",
-                "hl": "en",
-                "autocorrect": True,
-                "page": 1,
-                "type": "search"
-            },
-            "googleResults": google_results,
-            "googleRelatedSearches": google_related,
-            "bingResults": bing_results,
-            "youtubeResults": youtube_results,
-            "youtubeRelatedSearches": youtube_related,
-        }
-
-        # Save to JSON file
-        with open("main.json", "w") as f:
-            json.dump(output, f, indent=4)
-
-        print("Search results saved to 'search_results.json'")
-    finally:
-        driver.quit()
+    # Perform searches, streaming each engine's results as it finishes
+    with JsonlSink("main.jsonl") as sink:
+        search_all(query, pool=pool, sink=sink)
+
+    # Rebuild main.json from the streamed records
+    write_documents("main.jsonl")
+
+    print("Search results saved to 'search_results.json'")
 
 
 if __name__ == "__main__":
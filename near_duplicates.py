@@ -0,0 +1,221 @@
+import argparse
+import glob
+import json
+import logging
+import os
+import re
+import unicodedata
+import zlib
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+
+logger = logging.getLogger(__name__)
+
+MERSENNE_PRIME = (1 << 31) - 1
+AD_BLOCK_RE = re.compile(r"^Ad \d+:\s*$", re.M)
+
+
+def normalize(text: str) -> str:
+    """Case-fold, drop emoji and punctuation, and collapse whitespace so cosmetic edits don't matter."""
+    text = unicodedata.normalize("NFKC", text or "").lower()
+    text = "".join(ch if ch.isalnum() or ch.isspace() else " " for ch in text)
+    return " ".join(text.split())
+
+
+def shingles(text: str, k: int = 5) -> np.ndarray:
+    """CRC32 hashes of the distinct k-character shingles of normalized `text`."""
+    text = normalize(text)
+    if not text:
+        return np.empty(0, dtype=np.uint64)
+    if len(text) <= k:
+        grams = {text}
+    else:
+        grams = {text[i:i + k] for i in range(len(text) - k + 1)}
+    return np.fromiter((zlib.crc32(gram.encode("utf-8")) for gram in grams), dtype=np.uint64, count=len(grams))
+
+
+class MinHasher:
+    """MinHash signatures from `num_perm` universal hash functions (a*x + b) mod p."""
+
+    def __init__(self, num_perm: int = 128, seed: int = 1):
+        rng = np.random.default_rng(seed)
+        self.num_perm = num_perm
+        self.a = rng.integers(1, MERSENNE_PRIME, num_perm, dtype=np.uint64)
+        self.b = rng.integers(0, MERSENNE_PRIME, num_perm, dtype=np.uint64)
+
+    def signature(self, shingle_hashes: np.ndarray) -> np.ndarray:
+        if not len(shingle_hashes):
+            return np.full(self.num_perm, MERSENNE_PRIME, dtype=np.uint64)
+        # a < 2^31 and x < 2^32, so a * x fits in uint64
+        values = (self.a[:, None] * (shingle_hashes[None, :] % MERSENNE_PRIME) + self.b[:, None]) % MERSENNE_PRIME
+        return values.min(axis=1)
+
+
+def similarity(a: np.ndarray, b: np.ndarray) -> float:
+    """Estimated Jaccard similarity of two MinHash signatures."""
+    return float(np.mean(a == b))
+
+
+class NearDuplicateIndex:
+    """Collapse ad texts that differ only by small edits, in O(1) amortized per ad.
+
+    Each text is shingled, MinHashed and split into `bands` bands of rows.
+    Two texts share a bucket in some band with high probability once their
+    Jaccard similarity passes about (1/bands)^(1/rows). Only texts in the
+    same buckets are compared, and a match needs an estimated similarity of
+    at least `threshold`. The defaults (16 bands of 8 rows) catch ads that
+    are about 80% alike.
+    """
+
+    def __init__(self, threshold: float = 0.8, num_perm: int = 128, bands: int = 16, k: int = 5, seed: int = 1):
+        if num_perm % bands:
+            raise ValueError("num_perm must be a multiple of bands")
+        self.threshold = threshold
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.k = k
+        self.hasher = MinHasher(num_perm, seed)
+        self._buckets: List[Dict[bytes, List[str]]] = [{} for _ in range(bands)]
+        self.signatures: Dict[str, np.ndarray] = {}
+        # key -> key of the first text of its group
+        self.canonical: Dict[str, str] = {}
+
+    def __len__(self):
+        return len(self.canonical)
+
+    def _band_keys(self, signature: np.ndarray) -> List[bytes]:
+        return [signature[i * self.rows:(i + 1) * self.rows].tobytes() for i in range(self.bands)]
+
+    def query(self, text: str) -> Optional[Tuple[str, float]]:
+        """Canonical key and similarity of the closest indexed near-duplicate of `text`, if any."""
+        return self._query(self.hasher.signature(shingles(text, self.k)))
+
+    def _query(self, signature: np.ndarray) -> Optional[Tuple[str, float]]:
+        candidates = set()
+        for bucket, band_key in zip(self._buckets, self._band_keys(signature)):
+            candidates.update(bucket.get(band_key, ()))
+        best = None
+        for candidate in candidates:
+            score = similarity(signature, self.signatures[candidate])
+            if score >= self.threshold and (best is None or score > best[1]):
+                best = (candidate, score)
+        if best is not None:
+            return self.canonical[best[0]], best[1]
+        return None
+
+    def add(self, key: str, text: str) -> Tuple[str, float]:
+        """Index `text` under `key`; returns the canonical key of its group and the similarity to it.
+
+        A text with no near-duplicate starts a new group, so its own key
+        comes back with similarity 1.0. Only group representatives are
+        kept in the buckets, which keeps memory proportional to unique ads.
+        """
+        if key in self.canonical:
+            return self.canonical[key], 1.0
+        signature = self.hasher.signature(shingles(text, self.k))
+        match = self._query(signature)
+        if match is not None:
+            self.canonical[key] = match[0]
+            return match
+        self.canonical[key] = key
+        self.signatures[key] = signature
+        for bucket, band_key in zip(self._buckets, self._band_keys(signature)):
+            bucket.setdefault(band_key, []).append(key)
+        return key, 1.0
+
+    def is_duplicate(self, key: str, text: str) -> bool:
+        """Index `text` and report whether it repeats an ad already seen."""
+        return self.add(key, text)[0] != key
+
+    def groups(self) -> Dict[str, List[str]]:
+        """Canonical key -> every key collapsed into it, for groups with more than one member."""
+        groups: Dict[str, List[str]] = {}
+        for key, canonical in self.canonical.items():
+            groups.setdefault(canonical, []).append(key)
+        return {canonical: keys for canonical, keys in groups.items() if len(keys) > 1}
+
+
+class AdCardFilter:
+    """Decide which scraped ad cards are new, as the feed shows the same ads again on every scroll.
+
+    Cards with text are compared by near-duplicate text. Cards without
+    text can only be told apart by their element id, so those are compared
+    by exact id. A card with neither (or only the scrapers' 'Unknown'
+    placeholder id) is rejected, since it can't be told apart from any other.
+    """
+
+    MISSING_IDS = ("", "Unknown")
+
+    def __init__(self, index: Optional[NearDuplicateIndex] = None):
+        self.index = index or NearDuplicateIndex()
+        self.seen_ids = set()
+
+    def accept(self, text: str, ad_id: Optional[str] = None) -> bool:
+        """Whether the card is worth keeping; accepted cards are remembered."""
+        text = (text or "").strip()
+        ad_id = None if ad_id in self.MISSING_IDS else ad_id
+        if not text and ad_id is None:
+            return False
+        if text:
+            if self.index.is_duplicate(str(len(self.index)), text):
+                return False
+        elif ad_id in self.seen_ids:
+            return False
+        if ad_id is not None:
+            self.seen_ids.add(ad_id)
+        return True
+
+
+def iter_saved_ads(data_dir: str) -> Iterator[Tuple[str, str]]:
+    """Yield `(source, ad_text)` for every ad in a scraper output tree's ads_text/*.txt and ads_info/*.json."""
+    for path in sorted(glob.glob(os.path.join(data_dir, "ads_info", "*.json"))):
+        try:
+            with open(path, encoding="utf-8") as f:
+                ads = json.load(f)
+        except (OSError, ValueError) as e:
+            logger.warning(f"Skipping {path}: {str(e)}")
+            continue
+        for i, ad in enumerate(ads if isinstance(ads, list) else []):
+            if isinstance(ad, dict) and ad.get("ad_text"):
+                yield f"{os.path.basename(path)}#{i + 1}", ad["ad_text"]
+
+    for path in sorted(glob.glob(os.path.join(data_dir, "ads_text", "*.txt"))):
+        with open(path, encoding="utf-8", errors="replace") as f:
+            blocks = AD_BLOCK_RE.split(f.read())
+        for i, block in enumerate(block for block in blocks if block.strip()):
+            yield f"{os.path.basename(path)}#{i + 1}", block.strip()
+
+
+def dedupe(ads: Iterable[Tuple[str, str]], **kwargs) -> NearDuplicateIndex:
+    index = NearDuplicateIndex(**kwargs)
+    for key, text in ads:
+        index.add(key, text)
+    return index
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Group near-duplicate ad texts across saved scraper output.")
+    parser.add_argument("data_dir", nargs="?", default="facebook_ads_data")
+    parser.add_argument("--threshold", type=float, default=0.8)
+    parser.add_argument("--show", type=int, default=10, help="largest groups to print")
+    args = parser.parse_args()
+
+    ads = list(iter_saved_ads(args.data_dir))
+    index = dedupe(ads, threshold=args.threshold)
+    texts = dict(ads)
+    groups = sorted(index.groups().items(), key=lambda item: len(item[1]), reverse=True)
+    print(json.dumps({
+        "ads": len(ads),
+        "unique": len(index.signatures),
+        "duplicate_groups": len(groups),
+        "largest_groups": [
+            {"size": len(keys), "text": texts[canonical][:120], "sources": keys}
+            for canonical, keys in groups[:args.show]
+        ],
+    }, indent=4, ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,309 @@
+import argparse
+import itertools
+import json
+import logging
+import os
+import tempfile
+from contextlib import contextmanager
+from functools import lru_cache
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+
+logger = logging.getLogger(__name__)
+
+IMAGE_EXTENSIONS = (".jpg", ".jpeg", ".png", ".webp", ".gif", ".bmp")
+_POPCOUNT_TABLE = np.array([bin(i).count("1") for i in range(256)], dtype=np.uint8)
+
+
+@contextmanager
+def index_lock(path: str):
+    """Hold an exclusive lock on the index at `path` across processes (via `<path>.lock`).
+
+    Wrap every load-merge-save of a shared index in it, or concurrent
+    writers each replace the file with only their own hashes.
+    """
+    with open(f"{path}.lock", "a+b") as f:
+        if os.name == "nt":
+            import msvcrt
+            f.seek(0)
+            while True:
+                try:
+                    # LK_LOCK gives up after ten one-second retries; keep waiting
+                    msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+                    break
+                except OSError:
+                    continue
+            try:
+                yield
+            finally:
+                f.seek(0)
+                msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+        else:
+            import fcntl
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+
+
+def _image_module():
+    try:
+        from PIL import Image
+    except ImportError:
+        raise ImportError("Perceptual hashing requires the 'Pillow' package")
+    return Image
+
+
+def _grayscale(image, width: int, height: int) -> np.ndarray:
+    """`image` (a path, bytes-like file or PIL image) as a width x height float grayscale array."""
+    Image = _image_module()
+    if not isinstance(image, Image.Image):
+        with Image.open(image) as opened:
+            return _grayscale(opened, width, height)
+    small = image.convert("L").resize((width, height), Image.LANCZOS)
+    return np.asarray(small, dtype=np.float64)
+
+
+def _bits_to_int(bits: np.ndarray) -> int:
+    return int.from_bytes(np.packbits(bits.astype(np.uint8).ravel()).tobytes(), "big")
+
+
+def dhash(image) -> int:
+    """64-bit difference hash: whether each pixel is brighter than its right neighbour."""
+    pixels = _grayscale(image, 9, 8)
+    return _bits_to_int(pixels[:, 1:] > pixels[:, :-1])
+
+
+@lru_cache(maxsize=4)
+def _dct_matrix(n: int) -> np.ndarray:
+    k = np.arange(n)
+    matrix = np.cos(np.pi * (2 * k[None, :] + 1) * k[:, None] / (2 * n))
+    matrix[0] *= 1 / np.sqrt(2)
+    return matrix * np.sqrt(2 / n)
+
+
+def phash(image) -> int:
+    """64-bit DCT hash: which of the 8x8 lowest frequencies of a 32x32 thumbnail exceed their median."""
+    pixels = _grayscale(image, 32, 32)
+    dct = _dct_matrix(32)
+    low = (dct @ pixels @ dct.T)[:8, :8]
+    # The DC term only encodes overall brightness
+    median = np.median(low.ravel()[1:])
+    return _bits_to_int(low > median)
+
+
+def popcount(values: np.ndarray) -> np.ndarray:
+    """Set bits per element of a uint64 array."""
+    values = np.ascontiguousarray(values, dtype=np.uint64)
+    if hasattr(np, "bitwise_count"):
+        return np.bitwise_count(values)
+    return _POPCOUNT_TABLE[values.view(np.uint8)].reshape(-1, 8).sum(axis=1)
+
+
+def hamming(a: int, hashes: np.ndarray) -> np.ndarray:
+    """Hamming distance from hash `a` to every hash in `hashes`."""
+    return popcount(np.bitwise_xor(hashes, np.uint64(a)))
+
+
+@lru_cache(maxsize=16)
+def _flip_masks(bits: int, radius: int) -> np.ndarray:
+    """Every mask of at most `radius` set bits within a `bits`-wide chunk."""
+    masks = [0]
+    for flips in range(1, radius + 1):
+        for positions in itertools.combinations(range(bits), flips):
+            masks.append(sum(1 << p for p in positions))
+    return np.array(masks, dtype=np.uint64)
+
+
+class HashIndex:
+    """In-memory index of 64-bit perceptual hashes with multi-index hashing search.
+
+    Hashes are kept in one uint64 array next to a list of keys (e.g. blob
+    SHA-256s). Each hash is split into `chunks` substrings, and one sorted
+    table per substring is built. Two hashes within distance r must agree
+    to within r // chunks bits on at least one substring, so a search only
+    probes those table neighbourhoods and checks the few candidates with a
+    vectorized popcount. Hashes added since the last `build` are scanned
+    linearly until the tail grows large enough to rebuild. A million
+    hashes take roughly 40 MB.
+    """
+
+    def __init__(self, chunks: int = 4):
+        if 64 % chunks:
+            raise ValueError("chunks must divide 64")
+        self.chunks = chunks
+        self.chunk_bits = 64 // chunks
+        self.keys: List[str] = []
+        self.hashes = np.empty(0, dtype=np.uint64)
+        self._tail: List[int] = []
+        self._tables: List[Tuple[np.ndarray, np.ndarray]] = []
+
+    def __len__(self):
+        return len(self.hashes) + len(self._tail)
+
+    def add(self, key: str, value: int):
+        self.keys.append(key)
+        self._tail.append(value)
+        if len(self._tail) >= max(4096, len(self.hashes) // 8):
+            self.build()
+
+    def add_many(self, keys: Iterable[str], values: Iterable[int]):
+        self.keys.extend(keys)
+        self._tail.extend(values)
+        self.build()
+
+    def _chunk(self, values: np.ndarray, i: int) -> np.ndarray:
+        mask = np.uint64((1 << self.chunk_bits) - 1)
+        return (values >> np.uint64(i * self.chunk_bits)) & mask
+
+    def build(self):
+        """Fold the tail into the sorted substring tables."""
+        if self._tail:
+            self.hashes = np.concatenate([self.hashes, np.array(self._tail, dtype=np.uint64)])
+            self._tail = []
+        order_type = np.uint32 if len(self.hashes) < 2 ** 32 else np.uint64
+        self._tables = []
+        for i in range(self.chunks):
+            values = self._chunk(self.hashes, i)
+            order = np.argsort(values, kind="stable").astype(order_type)
+            self._tables.append((values[order], order))
+
+    def search(self, value: int, max_distance: int = 6) -> List[Tuple[str, int]]:
+        """`(key, distance)` of every indexed hash within `max_distance` of `value`, nearest first."""
+        query = np.uint64(value)
+        radius = max_distance // self.chunks
+        masks = _flip_masks(self.chunk_bits, radius)
+
+        candidates = []
+        for i, (sorted_values, order) in enumerate(self._tables):
+            probes = self._chunk(np.array([query]), i)[0] ^ masks
+            starts = np.searchsorted(sorted_values, probes, side="left")
+            ends = np.searchsorted(sorted_values, probes, side="right")
+            for start, end in zip(starts[starts < ends], ends[starts < ends]):
+                candidates.append(order[start:end])
+
+        matches = []
+        if candidates:
+            rows = np.unique(np.concatenate(candidates)).astype(np.int64)
+            distances = hamming(value, self.hashes[rows])
+            hits = distances <= max_distance
+            matches.extend(zip(rows[hits].tolist(), distances[hits].tolist()))
+        if self._tail:
+            distances = hamming(value, np.array(self._tail, dtype=np.uint64))
+            offset = len(self.hashes)
+            matches.extend((offset + row, int(distances[row])) for row in np.flatnonzero(distances <= max_distance))
+
+        matches.sort(key=lambda match: match[1])
+        return [(self.keys[row], distance) for row, distance in matches]
+
+    def nearest(self, value: int, max_distance: int = 6) -> Optional[Tuple[str, int]]:
+        matches = self.search(value, max_distance)
+        return matches[0] if matches else None
+
+    def groups(self, max_distance: int = 6) -> List[List[str]]:
+        """Clusters of keys linked by hashes within `max_distance` of each other (single linkage)."""
+        self.build()
+        parent = list(range(len(self.keys)))
+
+        def find(row):
+            while parent[row] != row:
+                parent[row] = parent[parent[row]]
+                row = parent[row]
+            return row
+
+        row_of = {key: row for row, key in enumerate(self.keys)}
+        for row, value in enumerate(self.hashes.tolist()):
+            for key, _ in self.search(value, max_distance):
+                a, b = find(row), find(row_of[key])
+                if a != b:
+                    parent[b] = a
+
+        clusters: Dict[int, List[str]] = {}
+        for row, key in enumerate(self.keys):
+            clusters.setdefault(find(row), []).append(key)
+        return sorted((keys for keys in clusters.values() if len(keys) > 1), key=len, reverse=True)
+
+    def save(self, path: str):
+        """Write the index atomically as a compressed .npz, through a temp file of this writer's own."""
+        self.build()
+        directory = os.path.dirname(os.path.abspath(path))
+        fd, tmp_path = tempfile.mkstemp(prefix=f".{os.path.basename(path)}.", suffix=".tmp", dir=directory)
+        try:
+            with os.fdopen(fd, "wb") as f:
+                np.savez_compressed(f, hashes=self.hashes, keys=np.array(self.keys, dtype="S"))
+            os.replace(tmp_path, path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+    @classmethod
+    def load(cls, path: str, chunks: int = 4) -> "HashIndex":
+        index = cls(chunks)
+        if os.path.exists(path):
+            with np.load(path) as data:
+                index.hashes = data["hashes"].astype(np.uint64)
+                index.keys = [key.decode("ascii") for key in data["keys"].tolist()]
+        index.build()
+        return index
+
+
+def index_blobs(index: HashIndex, blobs_dir: str, hash_function=phash) -> int:
+    """Hash every image blob under a CreativeStore's blobs/ not yet in `index`; returns how many were added."""
+    known = set(index.keys)
+    keys, values = [], []
+    for directory, _, files in os.walk(blobs_dir):
+        for name in files:
+            key, extension = os.path.splitext(name)
+            if extension.lower() not in IMAGE_EXTENSIONS or key in known:
+                continue
+            try:
+                values.append(hash_function(os.path.join(directory, name)))
+            except (OSError, ValueError) as e:
+                logger.warning(f"Could not hash {name}: {str(e)}")
+                continue
+            keys.append(key)
+            known.add(key)
+    index.add_many(keys, values)
+    return len(keys)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Perceptual-hash index of downloaded ad creatives.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    index_parser = subparsers.add_parser("index", help="hash new blobs of a creative store into its index")
+    index_parser.add_argument("store_root")
+
+    groups_parser = subparsers.add_parser("groups", help="print groups of near-identical creatives")
+    groups_parser.add_argument("store_root")
+    groups_parser.add_argument("--max-distance", type=int, default=6)
+
+    query_parser = subparsers.add_parser("query", help="find indexed creatives near an image")
+    query_parser.add_argument("store_root")
+    query_parser.add_argument("image")
+    query_parser.add_argument("--max-distance", type=int, default=6)
+    args = parser.parse_args()
+
+    index_path = os.path.join(args.store_root, "phash_index.npz")
+    if args.command == "index":
+        with index_lock(index_path):
+            index = HashIndex.load(index_path)
+            added = index_blobs(index, os.path.join(args.store_root, "blobs"))
+            index.save(index_path)
+        print(json.dumps({"added": added, "indexed": len(index)}, indent=4))
+        return
+
+    index = HashIndex.load(index_path)
+    if args.command == "groups":
+        print(json.dumps(index.groups(args.max_distance), indent=4))
+    else:
+        matches = index.search(phash(args.image), args.max_distance)
+        print(json.dumps([{"sha256": key, "distance": distance} for key, distance in matches], indent=4))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,197 @@
+import json
+import logging
+import time
+from collections import deque
+from dataclasses import dataclass, asdict
+from typing import Callable, Dict, List, Optional
+
+from selenium.webdriver.common.by import By
+from selenium.webdriver.support import expected_conditions as EC
+from selenium.webdriver.support.ui import WebDriverWait
+from selenium.common.exceptions import TimeoutException, WebDriverException
+
+
+logger = logging.getLogger(__name__)
+
+
+# CSS selectors whose presence means the interesting content has rendered
+PAGE_CONDITIONS: Dict[str, Optional[str]] = {
+    "document": None,
+    "google_home": "textarea[name='q'], input[name='q']",
+    "google_serp": "#search, #rso, #botstuff",
+    "bing_home": "input[name='q'], textarea[name='q']",
+    "bing_serp": "#b_results",
+    "youtube_home": "input[name='search_query']",
+    "youtube_results": "ytd-video-renderer, ytd-item-section-renderer",
+    "youtube_suggestions": "[role='listbox'] [role='option'], ytd-searchbox-suggestion-renderer",
+    "fb_home": "#email, div[role='navigation'], div[aria-label='Facebook']",
+    "fb_logged_in": "div[role='navigation'], div[aria-label='Facebook']",
+    "fb_ad_library": "[role='main']",
+    "fb_ad_results": "[data-testid='ad_library_preview'], div[role='article'], .x1dr75xp.xh8yej3.x16md763",
+}
+
+DOM_OBSERVER_SCRIPT = """
+if (!window.__readinessObserver) {
+    window.__lastMutation = Date.now();
+    window.__readinessObserver = new MutationObserver(function () {
+        window.__lastMutation = Date.now();
+    });
+    window.__readinessObserver.observe(document, {childList: true, subtree: true, attributes: true, characterData: true});
+}
+return Date.now() - window.__lastMutation;
+"""
+
+# Every wait across all drivers, newest last, for quick latency reports
+recent_waits: deque = deque(maxlen=1000)
+
+
+@dataclass
+class WaitRecord:
+    name: str
+    seconds: float
+    satisfied: bool
+
+
+class Readiness:
+    """Condition-driven replacements for fixed sleeps.
+
+    Each wait returns as soon as its condition holds (or the timeout passes)
+    and is recorded with its actual duration.
+    """
+
+    def __init__(self, driver, timeout: float = 10, poll: float = 0.1):
+        self.driver = driver
+        self.timeout = timeout
+        self.poll = poll
+        self.records: List[WaitRecord] = []
+
+    def _record(self, name: str, start: float, satisfied: bool) -> bool:
+        record = WaitRecord(name=name, seconds=round(time.monotonic() - start, 3), satisfied=satisfied)
+        self.records.append(record)
+        recent_waits.append(record)
+        if not satisfied:
+            logger.debug(f"Wait '{name}' timed out after {record.seconds}s")
+        return satisfied
+
+    def wait_for(self, name: str, condition: Callable, timeout: Optional[float] = None) -> bool:
+        """Wait until `condition(driver)` is truthy. Returns False on timeout."""
+        start = time.monotonic()
+        try:
+            WebDriverWait(self.driver, timeout or self.timeout, poll_frequency=self.poll).until(condition)
+            return self._record(name, start, True)
+        except TimeoutException:
+            return self._record(name, start, False)
+
+    def document_complete(self, timeout: Optional[float] = None) -> bool:
+        return self.wait_for(
+            "document_complete",
+            lambda d: d.execute_script("return document.readyState") == "complete",
+            timeout
+        )
+
+    def navigated_away(self, element, timeout: Optional[float] = None) -> bool:
+        """Wait until `element`, taken from the page being left, is detached by the next document."""
+        return self.wait_for("navigated_away", EC.staleness_of(element), timeout)
+
+    def element_present(self, css_selector: str, timeout: Optional[float] = None, name: Optional[str] = None) -> bool:
+        return self.wait_for(
+            name or f"present:{css_selector}",
+            lambda d: len(d.find_elements(By.CSS_SELECTOR, css_selector)) > 0,
+            timeout
+        )
+
+    def dom_quiet(self, quiet_ms: int = 300, timeout: Optional[float] = None) -> bool:
+        """Wait until no DOM mutation has happened for `quiet_ms`."""
+        def quiet(driver):
+            try:
+                return driver.execute_script(DOM_OBSERVER_SCRIPT) >= quiet_ms
+            except WebDriverException:
+                return False
+        return self.wait_for("dom_quiet", quiet, timeout)
+
+    def network_idle(self, idle_ms: int = 500, timeout: Optional[float] = None) -> bool:
+        """Wait until no request has been in flight for `idle_ms`.
+
+        Uses the CDP network events from Chrome's performance log when the
+        driver was started with `enable_network_tracking`; otherwise falls back
+        to watching the Resource Timing entry count.
+        """
+        in_flight = set()
+        state = {"idle_since": time.monotonic(), "resources": -1, "cdp": True}
+
+        def idle(driver):
+            now = time.monotonic()
+            if state["cdp"]:
+                try:
+                    for entry in driver.get_log("performance"):
+                        message = json.loads(entry["message"])["message"]
+                        method = message.get("method")
+                        request_id = message.get("params", {}).get("requestId")
+                        if method == "Network.requestWillBeSent":
+                            in_flight.add(request_id)
+                        elif method in ("Network.loadingFinished", "Network.loadingFailed"):
+                            in_flight.discard(request_id)
+                    if in_flight:
+                        state["idle_since"] = now
+                except (WebDriverException, KeyError, ValueError):
+                    state["cdp"] = False
+            if not state["cdp"]:
+                count = driver.execute_script("return performance.getEntriesByType('resource').length")
+                if count != state["resources"]:
+                    state["resources"] = count
+                    state["idle_since"] = now
+            return (now - state["idle_since"]) * 1000 >= idle_ms
+
+        return self.wait_for("network_idle", idle, timeout)
+
+    def page_ready(self, page_type: str, timeout: Optional[float] = None, quiet_ms: int = 300,
+                   previous=None) -> bool:
+        """Wait for a known page type: document loaded, content present, DOM settled.
+
+        Right after a submit, readyState still describes the old document; pass
+        an element of that document as `previous` to wait for it to go stale first.
+        """
+        start = time.monotonic()
+        budget = timeout or self.timeout
+        selector = PAGE_CONDITIONS[page_type]
+
+        ready = True
+        if previous is not None:
+            ready = self.navigated_away(previous, budget)
+        if ready:
+            ready = self.document_complete(max(budget - (time.monotonic() - start), self.poll))
+        if ready and selector:
+            ready = self.element_present(selector, max(budget - (time.monotonic() - start), self.poll),
+                                         name=f"present:{page_type}")
+        if ready and quiet_ms:
+            ready = self.dom_quiet(quiet_ms, max(budget - (time.monotonic() - start), self.poll))
+        return self._record(f"page:{page_type}", start, ready)
+
+    def report(self) -> List[Dict]:
+        return [asdict(record) for record in self.records]
+
+
+def enable_network_tracking(options):
+    """Turn on Chrome's performance log so `network_idle` can read CDP network events."""
+    options.set_capability("goog:loggingPrefs", {"performance": "ALL"})
+    return options
+
+
+def wait_for_page(driver, page_type: str, timeout: float = 10, quiet_ms: int = 300, previous=None) -> bool:
+    """Shortcut for `Readiness(driver).page_ready(...)` used by the function-style scrapers."""
+    return Readiness(driver, timeout=timeout).page_ready(page_type, quiet_ms=quiet_ms, previous=previous)
+
+
+def summarize_waits(records=None) -> Dict[str, Dict]:
+    """Count, mean and max duration per wait name."""
+    summary = {}
+    for record in records if records is not None else recent_waits:
+        stats = summary.setdefault(record.name, {"count": 0, "timeouts": 0, "total_s": 0.0, "max_s": 0.0})
+        stats["count"] += 1
+        stats["timeouts"] += 0 if record.satisfied else 1
+        stats["total_s"] += record.seconds
+        stats["max_s"] = max(stats["max_s"], record.seconds)
+    for stats in summary.values():
+        stats["mean_s"] = round(stats["total_s"] / stats["count"], 3)
+        stats["total_s"] = round(stats["total_s"], 3)
+    return summary
@@ -0,0 +1,54 @@
+import unicodedata
+from typing import Dict, Iterable, List
+
+
+def normalize_key(text: str) -> str:
+    """Case-fold and collapse whitespace so "Apple  Inc" and "apple inc" dedupe together."""
+    return " ".join(unicodedata.normalize("NFKC", text or "").casefold().split())
+
+
+class RelatedCollector:
+    """Insertion-ordered, de-duplicated related searches and suggestions.
+
+    Entries are keyed by their normalized text whichever field holds it
+    ("query" or "title"), so a suggestion seen in several places is kept
+    once, in the position it was first found, and each add is O(1). The
+    names of every source that produced an entry are kept as provenance.
+    """
+
+    def __init__(self):
+        self._entries: Dict[str, Dict] = {}
+        self._sources: Dict[str, List[str]] = {}
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, text: str) -> bool:
+        return normalize_key(text) in self._entries
+
+    def add(self, text: str, source: str, field: str = "query", **extra) -> bool:
+        """Add `{field: text, **extra}` unless its text was already collected; returns whether it was new."""
+        text = (text or "").strip()
+        key = normalize_key(text)
+        if not key:
+            return False
+        sources = self._sources.setdefault(key, [])
+        if source not in sources:
+            sources.append(source)
+        if key in self._entries:
+            return False
+        self._entries[key] = {field: text, **extra}
+        return True
+
+    def extend(self, texts: Iterable[str], source: str, field: str = "query") -> int:
+        """Add each of `texts`; returns how many were new."""
+        return sum(self.add(text, source, field) for text in texts)
+
+    def sources(self, text: str) -> List[str]:
+        return list(self._sources.get(normalize_key(text), []))
+
+    def items(self, provenance: bool = False) -> List[Dict]:
+        """Collected entries in first-seen order, each with a "sources" list if `provenance` is set."""
+        if not provenance:
+            return [dict(entry) for entry in self._entries.values()]
+        return [dict(entry, sources=list(self._sources[key])) for key, entry in self._entries.items()]
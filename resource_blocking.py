@@ -0,0 +1,133 @@
+import argparse
+import json
+import logging
+from typing import Callable, Dict, List, Optional
+
+from selenium import webdriver
+from selenium.common.exceptions import WebDriverException
+
+from driver_pool import default_chrome_options
+from readiness import enable_network_tracking, wait_for_page
+
+
+logger = logging.getLogger(__name__)
+
+RASTER_IMAGE_PATTERNS = ["*.png*", "*.jpg*", "*.jpeg*", "*.gif*", "*.webp*", "*.avif*"]
+IMAGE_PATTERNS = RASTER_IMAGE_PATTERNS + ["*.svg*", "*.ico*"]
+FONT_PATTERNS = ["*.woff*", "*.ttf*", "*.otf*", "*.eot*", "*fonts.gstatic.com*"]
+MEDIA_PATTERNS = ["*.mp4*", "*.webm*", "*.m4a*", "*.mp3*", "*.m3u8*", "*googlevideo.com/videoplayback*"]
+TRACKER_PATTERNS = [
+    "*google-analytics.com*",
+    "*googletagmanager.com*",
+    "*doubleclick.net*",
+    "*googlesyndication.com*",
+    "*googleadservices.com*",
+    "*connect.facebook.net*",
+    "*facebook.com/tr?*",
+    "*bat.bing.com*",
+    "*clarity.ms*",
+]
+
+# URL patterns blocked by each profile. Blocking only stops the download:
+# img/video `src` attributes stay in the DOM, so `extract_ad_data` still reads
+# creative URLs under the ad_library profile. That profile keeps SVG icons,
+# which the Ad Library uses for its platform and menu controls.
+BLOCKING_PROFILES: Dict[str, List[str]] = {
+    "none": [],
+    "trackers": TRACKER_PATTERNS,
+    "serp": IMAGE_PATTERNS + FONT_PATTERNS + MEDIA_PATTERNS + TRACKER_PATTERNS,
+    "ad_library": RASTER_IMAGE_PATTERNS + FONT_PATTERNS + MEDIA_PATTERNS + TRACKER_PATTERNS,
+}
+
+
+def apply_blocking(driver, profile: Optional[str]):
+    """Block the profile's URL patterns for every request `driver` makes from now on.
+
+    `None` leaves the driver untouched; "none" clears a previously applied profile.
+    """
+    if profile is None:
+        return driver
+    if profile not in BLOCKING_PROFILES:
+        raise ValueError(f"Unknown blocking profile: {profile}")
+    try:
+        driver.execute_cdp_cmd("Network.enable", {})
+        driver.execute_cdp_cmd("Network.setBlockedURLs", {"urls": BLOCKING_PROFILES[profile]})
+    except WebDriverException as e:
+        logger.warning(f"Could not apply blocking profile {profile}: {str(e)}")
+    return driver
+
+
+def measure_page_load(driver) -> Dict:
+    """Page-load time and network usage of the page `driver` just loaded.
+
+    Byte counts come from the CDP events in Chrome's performance log
+    (see `enable_network_tracking`), falling back to Resource Timing, which
+    reports 0 bytes for cross-origin responses without Timing-Allow-Origin.
+    """
+    stats = {"requests": 0, "blocked": 0, "transfer_bytes": 0}
+    try:
+        for entry in driver.get_log("performance"):
+            message = json.loads(entry["message"])["message"]
+            method, params = message.get("method"), message.get("params", {})
+            if method == "Network.requestWillBeSent":
+                stats["requests"] += 1
+            elif method == "Network.loadingFinished":
+                stats["transfer_bytes"] += int(params.get("encodedDataLength", 0))
+            elif method == "Network.loadingFailed" and params.get("blockedReason"):
+                stats["blocked"] += 1
+    except (WebDriverException, KeyError, ValueError):
+        resources = driver.execute_script(
+            "return performance.getEntriesByType('resource').map(function (r) { return r.transferSize || 0; });"
+        )
+        stats["requests"] = len(resources)
+        stats["transfer_bytes"] = sum(resources)
+
+    stats["load_ms"] = driver.execute_script(
+        "var n = performance.getEntriesByType('navigation')[0];"
+        "return n ? Math.round(n.loadEventEnd - n.startTime) : null;"
+    )
+    return stats
+
+
+def compare_profiles(
+    url: str,
+    profiles: List[str],
+    options_factory: Callable[[], webdriver.ChromeOptions] = default_chrome_options,
+    page_type: str = "document",
+    repeat: int = 1,
+) -> List[Dict]:
+    """Load `url` under each profile in a fresh browser and report bytes saved against "none"."""
+    rows = []
+    for profile in profiles:
+        for _ in range(repeat):
+            driver = webdriver.Chrome(options=enable_network_tracking(options_factory()))
+            try:
+                apply_blocking(driver, profile)
+                driver.get(url)
+                wait_for_page(driver, page_type)
+                rows.append({"profile": profile, **measure_page_load(driver)})
+            finally:
+                driver.quit()
+
+    baseline = [row for row in rows if row["profile"] == "none"]
+    if baseline:
+        baseline_bytes = sum(row["transfer_bytes"] for row in baseline) / len(baseline)
+        for row in rows:
+            row["bytes_saved"] = round(baseline_bytes - row["transfer_bytes"])
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare page weight and load time across blocking profiles.")
+    parser.add_argument("url")
+    parser.add_argument("--profiles", nargs="+", default=["none", "serp"], choices=list(BLOCKING_PROFILES))
+    parser.add_argument("--page-type", default="document", help="readiness.PAGE_CONDITIONS key to wait for")
+    parser.add_argument("--repeat", type=int, default=1)
+    args = parser.parse_args()
+
+    profiles = args.profiles if "none" in args.profiles else ["none"] + args.profiles
+    print(json.dumps(compare_profiles(args.url, profiles, page_type=args.page_type, repeat=args.repeat), indent=4))
+
+
+if __name__ == "__main__":
+    main()
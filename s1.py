@@ -5,24 +5,35 @@ from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.common.exceptions import TimeoutException, NoSuchElementException
 import json
-import time
+
+from driver_pool import DriverPool
+from readiness import Readiness
+
+def chrome_options():
+    options = webdriver.ChromeOptions()
+    options.add_argument('--headless')
+    options.add_argument('--no-sandbox')
+    options.add_argument('--disable-dev-shm-usage')
+    options.add_argument('--lang=en-US')
+    options.add_argument('--user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36')
+    return options
 
 class SearchScraper:
-    def __init__(self):
-        self.options = webdriver.ChromeOptions()
-        self.options.add_argument('--headless')
-        self.options.add_argument('--no-sandbox')
-        self.options.add_argument('--disable-dev-shm-usage')
-        self.options.add_argument('--lang=en-US')
-        self.options.add_argument('--user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36')
-        self.driver = webdriver.Chrome(options=self.options)
+    def __init__(self, pool=None):
+        self.pool = pool
+        if pool is not None:
+            self.driver = pool.acquire()
+        else:
+            self.options = chrome_options()
+            self.driver = webdriver.Chrome(options=self.options)
         self.wait = WebDriverWait(self.driver, 10)
+        self.readiness = Readiness(self.driver)
 
     def google_search(self, query):
         try:
             # Go directly to search results to avoid cookie popup
             self.driver.get(f'https://www.google.com/search?q={query}')
-            time.sleep(3)  # Wait for dynamic content
+            self.readiness.page_ready("google_serp")  # Wait for dynamic content
 
             results = {
                 "searchParameters": {
@@ -97,17 +108,21 @@ class SearchScraper:
             return ""
 
     def close(self):
-        self.driver.quit()
+        if self.pool is not None:
+            self.pool.release(self.driver)
+        else:
+            self.driver.quit()
 
 def main():
-    scraper = SearchScraper()
-    try:
-        results = scraper.google_search("apple inc")
-        with open('search2.json', 'w', encoding='utf-8') as f:
-            json.dump(results, f, ensure_ascii=False, indent=4)
-        print("Results saved to search_results.json")
-    finally:
-        scraper.close()
+    with DriverPool(size=1, options_factory=chrome_options) as pool:
+        scraper = SearchScraper(pool=pool)
+        try:
+            results = scraper.google_search("apple inc")
+            with open('search2.json', 'w', encoding='utf-8') as f:
+                json.dump(results, f, ensure_ascii=False, indent=4)
+            print("Results saved to search_results.json")
+        finally:
+            scraper.close()
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
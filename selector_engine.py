@@ -0,0 +1,266 @@
+import logging
+import re
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Dict, List, Optional, Sequence
+
+from selector_registry import SelectorRegistry
+
+
+logger = logging.getLogger(__name__)
+
+_EXTENSION_RE = re.compile(r":(contains|has)\(")
+_PSEUDO_RE = re.compile(r":(contains|has|not)\(")
+
+# Client-side matcher for compiled selectors. A compiled selector is either
+# {css} for plain CSS, {any: [...]} for a selector list, or {css, chain} where
+# chain holds one compound per step, each with its own CSS, the combinator
+# linking it to the previous step and its text/has/not predicates. The
+# stripped `css` of the whole chain preselects candidates natively; the chain
+# is then checked right to left, as browsers match CSS.
+MATCHER_JS = """
+function __matchCompound(el, step) {
+    if (step.css !== '*' && !el.matches(step.css)) return false;
+    for (var i = 0; i < step.preds.length; i++) {
+        var pred = step.preds[i];
+        if ('contains' in pred) {
+            if ((el.textContent || '').indexOf(pred.contains) < 0) return false;
+        } else if ('has' in pred) {
+            if (!__select(el, pred.has, el).length) return false;
+        } else if (__matches(el, pred.not, null)) {
+            return false;
+        }
+    }
+    return true;
+}
+function __matchChain(el, chain, i, bound) {
+    if (!__matchCompound(el, chain[i])) return false;
+    if (i === 0) return true;
+    for (var a = el.parentElement; a && a !== bound; a = a.parentElement) {
+        if (__matchChain(a, chain, i - 1, bound)) return true;
+        if (chain[i].combinator === '>') break;
+    }
+    return false;
+}
+function __matches(el, compiled, bound) {
+    if (compiled.any) return compiled.any.some(function (c) { return __matches(el, c, bound); });
+    if (!compiled.chain) return el.matches(compiled.css);
+    return __matchChain(el, compiled.chain, compiled.chain.length - 1, bound);
+}
+function __select(scope, compiled, bound) {
+    if (compiled.any) {
+        var seen = new Set();
+        compiled.any.forEach(function (c) { __select(scope, c, bound).forEach(function (el) { seen.add(el); }); });
+        return Array.from(seen).sort(function (a, b) {
+            return a.compareDocumentPosition(b) & Node.DOCUMENT_POSITION_FOLLOWING ? -1 : 1;
+        });
+    }
+    var found;
+    try { found = Array.prototype.slice.call(scope.querySelectorAll(compiled.css)); } catch (e) { return []; }
+    if (!compiled.chain) return found;
+    var chain = compiled.chain;
+    return found.filter(function (el) { return __matchChain(el, chain, chain.length - 1, bound || null); });
+}
+function __read(el, value) {
+    if (value === 'text') return (el.innerText || el.textContent || '').trim();
+    var v = el[value];
+    if (typeof v !== 'string' || !v) v = el.getAttribute(value) || '';
+    return v.trim();
+}
+"""
+
+# Tries a field's compiled fallbacks in order inside `scope` and returns the
+# index of the first one with a usable value (-1 if none), its values and
+# the milliseconds each tried selector took
+FIRST_MATCH_SCRIPT = MATCHER_JS + """
+var scope = arguments[0], compiled = arguments[1], value = arguments[2], pattern = arguments[3];
+var accept = pattern ? new RegExp(pattern, 'i') : null;
+var timings = [];
+for (var i = 0; i < compiled.length; i++) {
+    var started = performance.now(), values = [];
+    __select(scope, compiled[i]).forEach(function (el) {
+        var v = __read(el, value);
+        if (v && (!accept || accept.test(v))) values.push(v);
+    });
+    timings.push(performance.now() - started);
+    if (values.length) return [i, values, timings];
+}
+return [-1, [], timings];
+"""
+
+
+def _split_top_level(text: str, separators: str) -> List[tuple]:
+    """Split `text` on `separators` outside brackets, parentheses and quotes; yields (part, separator) pairs."""
+    parts = []
+    depth = 0
+    quote = None
+    start = 0
+    i = 0
+    while i < len(text):
+        ch = text[i]
+        if quote:
+            if ch == "\\":
+                i += 1
+            elif ch == quote:
+                quote = None
+        elif ch in "\"'":
+            quote = ch
+        elif ch in "([":
+            depth += 1
+        elif ch in ")]":
+            depth -= 1
+        elif depth == 0 and ch in separators:
+            parts.append((text[start:i], ch))
+            start = i + 1
+        i += 1
+    if depth or quote:
+        raise ValueError(f"Unbalanced selector: {text!r}")
+    parts.append((text[start:], None))
+    return parts
+
+
+def _closing_paren(text: str, open_index: int) -> int:
+    depth = 0
+    quote = None
+    i = open_index
+    while i < len(text):
+        ch = text[i]
+        if quote:
+            if ch == "\\":
+                i += 1
+            elif ch == quote:
+                quote = None
+        elif ch in "\"'":
+            quote = ch
+        elif ch == "(":
+            depth += 1
+        elif ch == ")":
+            depth -= 1
+            if depth == 0:
+                return i
+        i += 1
+    raise ValueError(f"Unbalanced parentheses in selector: {text!r}")
+
+
+def _unquote(text: str) -> str:
+    text = text.strip()
+    if len(text) >= 2 and text[0] == text[-1] and text[0] in "\"'":
+        text = text[1:-1]
+    return re.sub(r"\\(.)", r"\1", text)
+
+
+def is_extended(selector: str) -> bool:
+    """Whether `selector` uses :contains/:has, which Selenium's CSS lookup rejects."""
+    return bool(_EXTENSION_RE.search(selector))
+
+
+def _compile_compound(compound: str, combinator: str) -> dict:
+    css = []
+    preds = []
+    position = 0
+    for match in _PSEUDO_RE.finditer(compound):
+        if match.start() < position:
+            continue
+        close = _closing_paren(compound, match.end() - 1)
+        name, argument = match.group(1), compound[match.end():close]
+        css.append(compound[position:match.start()])
+        if name == "contains":
+            preds.append({"contains": _unquote(argument)})
+        elif name == "has":
+            if argument.strip()[:1] in ">+~":
+                raise ValueError(f"Relative combinators inside :has are not supported: {compound!r}")
+            preds.append({"has": compile_selector(argument)})
+        elif is_extended(argument):
+            preds.append({"not": compile_selector(argument)})
+        else:
+            css.append(compound[match.start():close + 1])
+        position = close + 1
+    css.append(compound[position:])
+    css = "".join(css).strip() or "*"
+    return {"css": css, "combinator": combinator, "preds": preds}
+
+
+@lru_cache(maxsize=512)
+def _compile(selector: str) -> dict:
+    groups = [part.strip() for part, _ in _split_top_level(selector, ",")]
+    if len(groups) > 1:
+        return {"any": [_compile(group) for group in groups]}
+    if not is_extended(selector):
+        return {"css": selector.strip()}
+
+    chain = []
+    combinator = " "
+    # Whitespace and '>' both end a compound; '>' overrides the descendant combinator
+    for part, separator in _split_top_level(selector.strip(), " \t\n>+~"):
+        if part.strip():
+            chain.append(_compile_compound(part.strip(), combinator if chain else " "))
+            combinator = " "
+        if separator is not None and separator in "+~":
+            raise ValueError(f"Sibling combinators are not supported in text-aware selectors: {selector!r}")
+        if separator == ">":
+            combinator = ">"
+    stripped = chain[0]["css"]
+    for step in chain[1:]:
+        stripped += (" > " if step["combinator"] == ">" else " ") + step["css"]
+    return {"css": stripped, "chain": chain}
+
+
+def compile_selector(selector: str) -> dict:
+    """Compile a CSS selector with jQuery-style :contains("text") and :has(...) into a matcher spec.
+
+    Plain CSS compiles to itself and is handed straight to querySelectorAll.
+    Raises ValueError for selectors the matcher cannot express.
+    """
+    return _compile(selector)
+
+
+@dataclass
+class SelectorMatch:
+    field: str
+    selector: str
+    values: List[str]
+
+    @property
+    def value(self) -> str:
+        return self.values[0]
+
+
+class SelectorEngine:
+    """Evaluate a field's fallback selectors, text-aware ones included, in one script call.
+
+    Each call tries the fallbacks in order inside the browser and returns
+    the values of the first selector that yields any, so a miss costs no
+    extra round trips. Hits, misses and timings go to `registry`, whose
+    learned order decides which fallback is tried first next time.
+    """
+
+    def __init__(self, registry: Optional[SelectorRegistry] = None):
+        self.registry = registry or SelectorRegistry()
+
+    def ordered(self, field: str, selectors: Sequence[str]) -> List[str]:
+        return self.registry.ordered(field, selectors)
+
+    def query(
+        self,
+        scope,
+        field: str,
+        selectors: Sequence[str],
+        value: str = "text",
+        pattern: Optional[str] = None,
+    ) -> Optional[SelectorMatch]:
+        """First selector under the WebElement `scope` with a non-empty `value` ("text" or an attribute name).
+
+        `pattern` is a case-insensitive JavaScript regex every returned value must match.
+        """
+        ordered = self.ordered(field, selectors)
+        result = scope.parent.execute_script(
+            FIRST_MATCH_SCRIPT, scope, [compile_selector(selector) for selector in ordered], value, pattern
+        )
+        index, values, timings = result
+        self.registry.record_fallbacks(field, ordered, index if index >= 0 else None, [ms / 1000 for ms in timings])
+        if index < 0:
+            return None
+        return SelectorMatch(field, ordered[index], values)
+
+    def summary(self) -> Dict[str, Dict[str, Dict]]:
+        return self.registry.summary()
@@ -0,0 +1,265 @@
+import atexit
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+from dataclasses import asdict, dataclass, replace
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_STATS_PATH = "selector_stats.json"
+
+
+@dataclass
+class SelectorStats:
+    attempts: int = 0
+    hits: int = 0
+    seconds: float = 0.0
+    # Exponentially weighted hit rate; starts neutral so untried fallbacks still get a turn
+    recent: float = 0.5
+    misses_in_row: int = 0
+
+    @property
+    def hit_rate(self) -> float:
+        return self.hits / self.attempts if self.attempts else 0.0
+
+    @property
+    def prior_hit_rate(self) -> float:
+        """Hit rate before the current run of misses."""
+        attempts = self.attempts - self.misses_in_row
+        return self.hits / attempts if attempts else 0.0
+
+    @property
+    def mean_ms(self) -> float:
+        return 1000 * self.seconds / self.attempts if self.attempts else 0.0
+
+
+class SelectorRegistry:
+    """Per-field selector hit rates and latency, persisted between runs as JSON.
+
+    `ordered` puts the selectors that have been working lately first, so a
+    fallback chain usually stops at its first try. The recent hit rate is
+    an exponentially weighted average (weight `alpha` per attempt), so a
+    layout change re-ranks the chain within a few pages. A demoted selector
+    is rarely tried again, so collapse is judged on consecutive misses
+    instead: a selector that hit at least `reliable_rate` of its first
+    `min_attempts` or more tries and then misses `collapse_misses` times
+    in a row is logged once per run as collapsed.
+
+    Several processes may share one stats file, so `save` re-reads it and
+    adds only this process's new attempts, hits and time to what is there.
+    """
+
+    def __init__(
+        self,
+        path: Optional[str] = None,
+        alpha: float = 0.1,
+        collapse_misses: int = 3,
+        reliable_rate: float = 0.9,
+        min_attempts: int = 20,
+    ):
+        self.path = path
+        self.alpha = alpha
+        self.collapse_misses = collapse_misses
+        self.reliable_rate = reliable_rate
+        self.min_attempts = min_attempts
+        self.fields: Dict[str, Dict[str, SelectorStats]] = {}
+        # What the file held when loaded, or at the last save: the part of `fields` already on disk
+        self._saved: Dict[str, Dict[str, SelectorStats]] = {}
+        self._alerted = set()
+        self._lock = threading.Lock()
+        if path and os.path.exists(path):
+            self.load(path)
+
+    @staticmethod
+    def _read(path: str) -> Dict[str, Dict[str, SelectorStats]]:
+        if not os.path.exists(path):
+            return {}
+        try:
+            with open(path, encoding="utf-8") as f:
+                data = json.load(f)
+            return {
+                field: {selector: SelectorStats(**stats) for selector, stats in selectors.items()}
+                for field, selectors in data.get("fields", {}).items()
+            }
+        except (OSError, ValueError, TypeError) as e:
+            logger.warning(f"Ignoring unreadable selector stats {path}: {str(e)}")
+            return {}
+
+    @staticmethod
+    def _copy(fields: Dict[str, Dict[str, SelectorStats]]) -> Dict[str, Dict[str, SelectorStats]]:
+        return {field: {selector: replace(stats) for selector, stats in selectors.items()} for field, selectors in fields.items()}
+
+    def load(self, path: str):
+        loaded = self._read(path)
+        with self._lock:
+            self.fields.update(loaded)
+            self._saved = self._copy(self.fields)
+
+    @staticmethod
+    def _merge(on_disk: SelectorStats, saved: SelectorStats, current: SelectorStats) -> SelectorStats:
+        """`on_disk` plus what `current` gained since `saved`; the recent rate and streak are this run's."""
+        if current.attempts <= saved.attempts:
+            return on_disk
+        return SelectorStats(
+            attempts=on_disk.attempts + current.attempts - saved.attempts,
+            hits=on_disk.hits + current.hits - saved.hits,
+            seconds=on_disk.seconds + current.seconds - saved.seconds,
+            recent=current.recent,
+            misses_in_row=current.misses_in_row,
+        )
+
+    def save(self, path: Optional[str] = None):
+        """Merge the stats into `path` (default: the path they were loaded from) and replace it atomically."""
+        path = path or self.path
+        if not path:
+            return
+        with self._lock:
+            current = self._copy(self.fields)
+            saved = self._saved
+
+        merged = self._read(path)
+        for field, selectors in current.items():
+            disk_field = merged.setdefault(field, {})
+            for selector, stats in selectors.items():
+                disk_field[selector] = self._merge(
+                    disk_field.get(selector, SelectorStats(recent=stats.recent)),
+                    saved.get(field, {}).get(selector, SelectorStats()),
+                    stats,
+                )
+        data = {
+            "updated_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "fields": {
+                field: {selector: asdict(stats) for selector, stats in selectors.items()}
+                for field, selectors in merged.items()
+            },
+        }
+
+        # A temp file per writer, so concurrent saves never write into the same file
+        directory = os.path.dirname(os.path.abspath(path))
+        fd, tmp_path = tempfile.mkstemp(prefix=f".{os.path.basename(path)}.", suffix=".tmp", dir=directory)
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(data, f, indent=4)
+            os.replace(tmp_path, path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        with self._lock:
+            self._saved = current
+
+    def stats(self, field: str, selector: str) -> SelectorStats:
+        with self._lock:
+            return self.fields.setdefault(field, {}).setdefault(selector, SelectorStats())
+
+    def ordered(self, field: str, selectors: Sequence[str]) -> List[str]:
+        """`selectors` by recent hit rate, best first; ties keep their given order."""
+        with self._lock:
+            known = self.fields.get(field, {})
+            return sorted(selectors, key=lambda selector: -known[selector].recent if selector in known else -0.5)
+
+    def record(self, field: str, selector: str, hit: bool, seconds: float = 0.0):
+        with self._lock:
+            stats = self.fields.setdefault(field, {}).setdefault(selector, SelectorStats())
+            stats.attempts += 1
+            stats.hits += bool(hit)
+            stats.seconds += seconds
+            stats.recent += self.alpha * (float(bool(hit)) - stats.recent)
+            stats.misses_in_row = 0 if hit else stats.misses_in_row + 1
+            collapsed = self._is_collapsed(stats) and (field, selector) not in self._alerted
+            if collapsed:
+                self._alerted.add((field, selector))
+        if collapsed:
+            logger.warning(
+                f"Selector {selector!r} for {field} collapsed: {stats.misses_in_row} misses in a row after a "
+                f"{stats.prior_hit_rate:.0%} hit rate; the page layout may have changed"
+            )
+
+    def _is_collapsed(self, stats: SelectorStats) -> bool:
+        return (
+            stats.misses_in_row >= self.collapse_misses
+            and stats.attempts - stats.misses_in_row >= self.min_attempts
+            and stats.prior_hit_rate >= self.reliable_rate
+        )
+
+    def record_fallbacks(
+        self,
+        field: str,
+        tried: Sequence[str],
+        winner: Optional[int],
+        seconds: Optional[Sequence[float]] = None,
+    ):
+        """Record one pass over a fallback chain: misses up to `winner` (its index in `tried`, or None), then the hit."""
+        last = len(tried) - 1 if winner is None else winner
+        for i in range(last + 1):
+            self.record(field, tried[i], i == winner, seconds[i] if seconds and i < len(seconds) else 0.0)
+
+    def first(self, field: str, selectors: Sequence[str], select: Callable[[str], Sequence]) -> Tuple[Optional[str], Sequence]:
+        """Run `select` over `selectors` in learned order and return the first selector with results, and its results."""
+        tried = self.ordered(field, selectors)
+        for selector in tried:
+            start = time.perf_counter()
+            results = select(selector)
+            self.record(field, selector, bool(results), time.perf_counter() - start)
+            if results:
+                return selector, results
+        return None, []
+
+    def each(self, field: str, selectors: Sequence[str], select: Callable[[str], Sequence]) -> List[Tuple[str, Sequence]]:
+        """Run `select` over every selector in the given order, recording each, for extractors that merge all results."""
+        matches = []
+        for selector in selectors:
+            start = time.perf_counter()
+            results = select(selector)
+            self.record(field, selector, bool(results), time.perf_counter() - start)
+            matches.append((selector, results))
+        return matches
+
+    def collapsed(self) -> List[Dict]:
+        """Reliable selectors that have stopped matching."""
+        with self._lock:
+            return [
+                {
+                    "field": field,
+                    "selector": selector,
+                    "misses_in_row": stats.misses_in_row,
+                    "prior_hit_rate": round(stats.prior_hit_rate, 3),
+                }
+                for field, selectors in self.fields.items()
+                for selector, stats in selectors.items()
+                if self._is_collapsed(stats)
+            ]
+
+    def summary(self) -> Dict[str, Dict[str, Dict]]:
+        with self._lock:
+            return {
+                field: {
+                    selector: {
+                        "attempts": stats.attempts,
+                        "hit_rate": round(stats.hit_rate, 3),
+                        "recent": round(stats.recent, 3),
+                        "mean_ms": round(stats.mean_ms, 3),
+                    }
+                    for selector, stats in selectors.items()
+                }
+                for field, selectors in self.fields.items()
+            }
+
+
+_default_registry: Optional[SelectorRegistry] = None
+_default_registry_lock = threading.Lock()
+
+
+def get_default_registry(path: str = DEFAULT_STATS_PATH) -> SelectorRegistry:
+    """Return the process-wide registry, loading it from `path` on first use and saving it at exit."""
+    global _default_registry
+    with _default_registry_lock:
+        if _default_registry is None:
+            _default_registry = SelectorRegistry(path)
+            atexit.register(_default_registry.save)
+        return _default_registry
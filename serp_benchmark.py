@@ -0,0 +1,224 @@
+import argparse
+import glob
+import json
+import logging
+import os
+import sys
+import time
+import tracemalloc
+from typing import Callable, Dict, List
+
+from selenium import webdriver
+from selenium.webdriver.common.by import By
+
+from ad_card_extractor import extract_ad_cards
+from driver_pool import DriverPool, default_chrome_options
+from fixture_server import FixtureServer, install_replay
+from serp_fixtures import ADS_INFO_GLOB, FIXTURES_DIR, GOLDEN_GOOGLE, GOLDEN_MAIN, build_fixtures, load_golden
+
+
+logger = logging.getLogger(__name__)
+
+def localize(value, server: FixtureServer):
+    """Turn fixture-server URLs back into the live URLs the goldens were recorded with."""
+    if isinstance(value, str):
+        return value.replace(server.base_url + "/", "https://")
+    if isinstance(value, list):
+        return [localize(v, server) for v in value]
+    if isinstance(value, dict):
+        return {k: localize(v, server) for k, v in value.items()}
+    return value
+
+
+def _titles(items: List[Dict]) -> List[str]:
+    return [item.get("title", "").strip() for item in items]
+
+
+def compare_results(actual: List[Dict], expected: List[Dict]) -> Dict:
+    """Check titles, links and sitelink sub-sitelink counts against a golden list."""
+    mismatches = []
+    if _titles(actual) != _titles(expected):
+        mismatches.append("titles")
+    if [a.get("link") for a in actual] != [e.get("link") for e in expected]:
+        mismatches.append("links")
+    sub_counts = lambda items: [[len(s.get("sub_sitelinks", [])) for s in i.get("sitelinks", [])] for i in items]
+    if any("sitelinks" in e for e in expected) and sub_counts(actual) != sub_counts(expected):
+        mismatches.append("sub_sitelinks")
+    return {"match": not mismatches, "mismatches": mismatches, "count": len(actual)}
+
+
+class _LeasedDriver:
+    """Pool stand-in that hands a scraper the driver already leased for the scenario."""
+
+    def __init__(self, driver):
+        self.driver = driver
+
+    def acquire(self, timeout=None):
+        return self.driver
+
+    def release(self, driver):
+        pass
+
+
+def scenario_app_google(driver, server, pool):
+    from app import SearchScraper
+
+    golden = load_golden(GOLDEN_MAIN)
+    scraper = SearchScraper(pool=_LeasedDriver(driver))
+    result = localize(scraper.google_search(golden["searchParameters"]["q"]), server)
+    expected = [{"title": r["title"], "link": r["link"]} for r in golden["googleResults"]]
+    return compare_results(result.get("organic", []), expected)
+
+
+def scenario_main_google(driver, server, pool):
+    import main
+
+    golden = load_golden(GOLDEN_MAIN)
+    results, _ = main.google_search_with_related_and_sub_sitelinks(driver, golden["searchParameters"]["q"])
+    return compare_results(localize(results, server), golden["googleResults"])
+
+
+def scenario_main_youtube(driver, server, pool):
+    import main
+
+    golden = load_golden(GOLDEN_MAIN)
+    results, related = main.youtube_search(driver, golden["searchParameters"]["q"])
+    comparison = compare_results(localize(results, server), golden["youtubeResults"])
+    if _titles(related) != _titles(golden["youtubeRelatedSearches"]):
+        comparison["match"] = False
+        comparison["mismatches"].append("related")
+    return comparison
+
+
+def scenario_main_bing(driver, server, pool):
+    import main
+
+    golden = load_golden(GOLDEN_MAIN)
+    # serp_fixtures renders the Bing page from the Google results when the golden has no Bing results
+    expected = [{"title": r["title"], "link": r["link"]} for r in golden["bingResults"] or golden["googleResults"]]
+    results = main.bing_search(driver, golden["searchParameters"]["q"])
+    return compare_results(localize(results, server), expected)
+
+
+def scenario_serp_result(driver, server, pool):
+    from google_search_serp_result import GoogleSearchScraper, SearchParameters
+
+    class ReplayScraper(GoogleSearchScraper):
+        def _setup_driver(self, headless):
+            return driver
+
+    golden = load_golden(GOLDEN_GOOGLE)
+    scraper = ReplayScraper()
+    result = localize(scraper.search(SearchParameters(query=golden["searchParameters"]["q"])), server)
+    return compare_results(result["googleResults"], golden["googleResults"])
+
+
+def scenario_fb_extract(driver, server, pool, limit: int = 5):
+    # The card extractor main_final.py uses, without building the scraper (session store, warehouse, ...)
+    driver.get("https://www.facebook.com/ads/library/")
+    containers = driver.find_elements(By.CSS_SELECTOR, ".x1dr75xp.xh8yej3.x16md763")[:limit]
+    ads = extract_ad_cards(driver, containers) or []
+    texts = [ad["ad_text"].strip() for ad in ads if ad]
+
+    golden_texts = set()
+    for path in glob.glob(os.path.join(os.path.dirname(os.path.abspath(__file__)), ADS_INFO_GLOB)):
+        golden_texts.update(ad.get("ad_text", "").strip() for ad in load_golden(path))
+    missing = [text for text in texts if text not in golden_texts]
+    return {"match": bool(texts) and not missing, "mismatches": ["ad_text"] if missing else [], "count": len(texts)}
+
+
+SCENARIOS: Dict[str, Callable] = {
+    "app_google": scenario_app_google,
+    "main_google": scenario_main_google,
+    "main_youtube": scenario_main_youtube,
+    "main_bing": scenario_main_bing,
+    "serp_result": scenario_serp_result,
+    "fb_extract": scenario_fb_extract,
+}
+
+
+def _js_heap_mb(driver):
+    try:
+        metrics = driver.execute_cdp_cmd("Performance.getMetrics", {})["metrics"]
+        for metric in metrics:
+            if metric["name"] == "JSHeapUsedSize":
+                return round(metric["value"] / (1024 * 1024), 2)
+    except Exception as e:
+        logger.debug(f"Could not read JS heap: {str(e)}")
+    return None
+
+
+def run_scenario(name: str, pool: DriverPool, server: FixtureServer) -> Dict:
+    """Run one scenario on a fresh lease and measure it."""
+    with pool.lease() as driver:
+        driver.execute_cdp_cmd("Performance.enable", {})
+        commands_before = driver.command_count
+        tracemalloc.start()
+        start = time.perf_counter()
+        try:
+            outcome = SCENARIOS[name](driver, server, pool)
+        except Exception as e:
+            logger.error(f"Scenario {name} failed: {str(e)}")
+            outcome = {"match": False, "mismatches": [f"error: {e}"], "count": 0}
+        elapsed = time.perf_counter() - start
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        commands = driver.command_count - commands_before
+        js_heap = _js_heap_mb(driver)
+
+    return {
+        "scenario": name,
+        "wall_s": round(elapsed, 3),
+        "webdriver_commands": commands,
+        "python_peak_kb": round(peak / 1024, 1),
+        "js_heap_mb": js_heap,
+        **outcome,
+    }
+
+
+def run_benchmark(scenarios: List[str], repeat: int = 1, fixtures_dir: str = FIXTURES_DIR, headless: bool = True) -> List[Dict]:
+    """Replay every scenario against the fixtures and return one report row per run."""
+    if not os.path.exists(os.path.join(fixtures_dir, "routes.json")):
+        build_fixtures(fixtures_dir)
+
+    rows = []
+    with FixtureServer(fixtures_dir) as server:
+        def replay_driver(options):
+            return install_replay(webdriver.Chrome(options=options), server)
+
+        with DriverPool(size=1, options_factory=lambda: default_chrome_options(headless), driver_factory=replay_driver) as pool:
+            for _ in range(repeat):
+                for name in scenarios:
+                    row = run_scenario(name, pool, server)
+                    logger.info(f"{name}: {row['wall_s']}s, {row['webdriver_commands']} commands, match={row['match']}")
+                    rows.append(row)
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay the scrapers against offline SERP fixtures and benchmark them.")
+    parser.add_argument("scenarios", nargs="*", default=list(SCENARIOS), help=f"Any of: {', '.join(SCENARIOS)}")
+    parser.add_argument("--repeat", type=int, default=1)
+    parser.add_argument("--fixtures-dir", default=FIXTURES_DIR)
+    parser.add_argument("--rebuild", action="store_true", help="Regenerate the fixtures from the golden outputs first")
+    parser.add_argument("--headed", action="store_true", help="Show the browser")
+    parser.add_argument("--output", help="Also write the report to this JSON file")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+    unknown = [name for name in args.scenarios if name not in SCENARIOS]
+    if unknown:
+        parser.error(f"Unknown scenarios: {', '.join(unknown)}")
+    if args.rebuild:
+        build_fixtures(args.fixtures_dir)
+
+    rows = run_benchmark(args.scenarios, args.repeat, args.fixtures_dir, headless=not args.headed)
+    print(json.dumps(rows, indent=4))
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(rows, f, indent=4)
+    sys.exit(0 if all(row["match"] for row in rows) else 1)
+
+
+if __name__ == "__main__":
+    main()
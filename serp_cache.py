@@ -0,0 +1,194 @@
+import functools
+import hashlib
+import json
+import logging
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import asdict, is_dataclass
+from typing import Any, Dict, Optional
+
+
+logger = logging.getLogger(__name__)
+
+
+def make_key(namespace: str, query: Any) -> str:
+    """Build a cache key from a query string or a `SearchParameters` instance."""
+    params = asdict(query) if is_dataclass(query) else {"query": query}
+    fields = {
+        "query": params.get("query", ""),
+        "language": params.get("language", "en"),
+        "country": params.get("country", "us"),
+        "page": params.get("page", 1),
+        "type": params.get("search_type", "search"),
+    }
+    raw = json.dumps([namespace, fields], sort_keys=True, ensure_ascii=False)
+    return hashlib.sha1(raw.encode("utf-8")).hexdigest()
+
+
+class SerpCache:
+    """TTL + LRU cache of search results backed by SQLite.
+
+    A small in-memory LRU sits in front of the database so repeated hits
+    skip SQLite entirely. Those hits still count for LRU eviction: their
+    access times are buffered and written in batches of `touch_batch`, and
+    always before an eviction. Results are stored as JSON and decoded on
+    every hit, so callers always get their own copy.
+    """
+
+    def __init__(
+        self,
+        path: str = "serp_cache.sqlite3",
+        ttl: float = 24 * 3600,
+        max_entries: int = 10000,
+        memory_entries: int = 256,
+        touch_batch: int = 64,
+    ):
+        self.path = path
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.memory_entries = memory_entries
+        self.touch_batch = touch_batch
+        self.hits = 0
+        self.misses = 0
+
+        self._memory: "OrderedDict[str, tuple]" = OrderedDict()
+        self._touched: Dict[str, float] = {}
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS serp_cache ("
+            " key TEXT PRIMARY KEY,"
+            " namespace TEXT,"
+            " value TEXT NOT NULL,"
+            " created_at REAL NOT NULL,"
+            " accessed_at REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_serp_cache_accessed ON serp_cache (accessed_at)")
+        self._conn.commit()
+
+    def _remember(self, key: str, value: str, created_at: float):
+        self._memory[key] = (value, created_at)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_entries:
+            self._memory.popitem(last=False)
+
+    def _flush_touches(self):
+        """Write the buffered access times of memory-layer hits."""
+        if not self._touched:
+            return
+        self._conn.executemany(
+            "UPDATE serp_cache SET accessed_at = ? WHERE key = ?",
+            [(accessed_at, key) for key, accessed_at in self._touched.items()]
+        )
+        self._touched.clear()
+        self._conn.commit()
+
+    def get(self, key: str) -> Optional[Any]:
+        """Return the cached value, or None on a miss or expired entry."""
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is None:
+                row = self._conn.execute(
+                    "SELECT value, created_at FROM serp_cache WHERE key = ?", (key,)
+                ).fetchone()
+                if row is not None:
+                    entry = (row[0], row[1])
+                    self._conn.execute("UPDATE serp_cache SET accessed_at = ? WHERE key = ?", (now, key))
+                    self._conn.commit()
+            elif now - entry[1] <= self.ttl:
+                self._touched[key] = now
+                if len(self._touched) >= self.touch_batch:
+                    self._flush_touches()
+
+            if entry is None or now - entry[1] > self.ttl:
+                if entry is not None:
+                    self._delete(key)
+                self.misses += 1
+                return None
+
+            self._remember(key, *entry)
+            self.hits += 1
+        return json.loads(entry[0])
+
+    def set(self, key: str, value: Any, namespace: str = ""):
+        now = time.time()
+        encoded = json.dumps(value, ensure_ascii=False)
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO serp_cache (key, namespace, value, created_at, accessed_at)"
+                " VALUES (?, ?, ?, ?, ?)",
+                (key, namespace, encoded, now, now)
+            )
+            self._evict()
+            self._conn.commit()
+            self._remember(key, encoded, now)
+
+    def _delete(self, key: str):
+        self._memory.pop(key, None)
+        self._touched.pop(key, None)
+        self._conn.execute("DELETE FROM serp_cache WHERE key = ?", (key,))
+        self._conn.commit()
+
+    def _evict(self):
+        """Drop expired rows, then the least recently used ones beyond max_entries."""
+        self._flush_touches()
+        self._conn.execute("DELETE FROM serp_cache WHERE created_at < ?", (time.time() - self.ttl,))
+        count = self._conn.execute("SELECT COUNT(*) FROM serp_cache").fetchone()[0]
+        if count > self.max_entries:
+            self._conn.execute(
+                "DELETE FROM serp_cache WHERE key IN ("
+                " SELECT key FROM serp_cache ORDER BY accessed_at ASC LIMIT ?)",
+                (count - self.max_entries,)
+            )
+
+    def clear(self):
+        with self._lock:
+            self._memory.clear()
+            self._touched.clear()
+            self._conn.execute("DELETE FROM serp_cache")
+            self._conn.commit()
+
+    def stats(self) -> Dict[str, Any]:
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / total, 3) if total else 0.0,
+            "entries": self._conn.execute("SELECT COUNT(*) FROM serp_cache").fetchone()[0]
+        }
+
+    def close(self):
+        with self._lock:
+            self._flush_touches()
+            self._conn.close()
+
+
+def cached(namespace: str):
+    """Cache a scraper method keyed on its first argument (query or SearchParameters).
+
+    The instance opts in by setting `self.cache` to a SerpCache; results
+    containing an "error" key are never stored.
+    """
+    def decorator(method):
+        @functools.wraps(method)
+        def wrapper(self, query, *args, **kwargs):
+            cache = getattr(self, "cache", None)
+            if cache is None:
+                return method(self, query, *args, **kwargs)
+
+            key = make_key(namespace, query)
+            result = cache.get(key)
+            if result is not None:
+                logger.debug(f"Cache hit for {namespace}")
+                return result
+
+            result = method(self, query, *args, **kwargs)
+            if isinstance(result, dict) and "error" not in result:
+                cache.set(key, result, namespace)
+            return result
+        return wrapper
+    return decorator
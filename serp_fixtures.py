@@ -0,0 +1,282 @@
+import argparse
+import glob
+import hashlib
+import html
+import json
+import os
+import re
+from typing import Dict, List
+from urllib.parse import urlparse
+
+
+FIXTURES_DIR = "fixtures"
+BASE = "{{BASE}}"
+
+# Golden outputs the fixtures are rendered from
+GOLDEN_MAIN = "main.json"
+GOLDEN_GOOGLE = "google_with_sitelinks.json"
+ADS_INFO_GLOB = os.path.join("Fb Ads Scraper", "facebook_ads_data", "ads_info", "*.json")
+
+
+def load_golden(path: str):
+    """Load a saved output, tolerating the trailing commas some of them contain."""
+    with open(path, encoding="utf-8") as f:
+        text = f.read()
+    return json.loads(re.sub(r",(\s*[\]}])", r"\1", text))
+
+
+def local_url(url: str) -> str:
+    """Point an absolute URL at the fixture server."""
+    parsed = urlparse(url)
+    rest = parsed.path or "/"
+    if parsed.query:
+        rest += "?" + parsed.query
+    return f"{BASE}/{parsed.netloc}{rest}"
+
+
+def route_key(url: str) -> str:
+    parsed = urlparse(url)
+    return f"{parsed.netloc}{parsed.path or '/'}"
+
+
+def _e(text) -> str:
+    return html.escape(str(text or ""), quote=True)
+
+
+def _page(title: str, body: str, script: str = "") -> str:
+    if script:
+        script = f"<script>{script}</script>"
+    return (
+        "<!DOCTYPE html>\n<html><head><meta charset=\"utf-8\">"
+        f"<title>{_e(title)}</title></head>\n<body>\n{body}\n"
+        f"{script}\n</body></html>\n"
+    )
+
+
+COOKIE_BUTTON = "<button type=\"button\">Accept all</button>"
+
+
+def render_search_home(host: str, field: str, action: str) -> str:
+    body = (
+        f"{COOKIE_BUTTON}\n"
+        f"<form action=\"{BASE}/{host}{action}\" method=\"get\">"
+        f"<input name=\"{field}\" type=\"text\"></form>"
+    )
+    return _page(host, body)
+
+
+def render_google_serp(query: str, results: List[Dict], related: List[Dict], knowledge_graph: Dict = None) -> str:
+    """Render organic results in the markup every Google scraper in the repo expects."""
+    blocks = []
+    for result in results:
+        sitelinks = "".join(
+            f"<a href=\"{local_url(s['link'])}\">{_e(s['title'])}</a>"
+            for s in result.get("sitelinks", [])
+        )
+        if sitelinks:
+            sitelinks = f"<div class=\"HiHjCd PAYrJc\">{sitelinks}</div>"
+        blocks.append(
+            "<div class=\"g\"><div class=\"tF2Cxc\">"
+            f"<div class=\"yuRUbf\"><a href=\"{_e(result['link'])}\"><h3 class=\"DKV0Md\">{_e(result['title'])}</h3></a></div>"
+            f"<div class=\"VwiC3b\">{_e(result.get('snippet', ''))}</div>"
+            f"{sitelinks}"
+            "</div></div>"
+        )
+
+    related_blocks = []
+    for item in related:
+        if "query" in item:
+            related_blocks.append(f"<p><a href=\"/search?q={_e(item['query'])}\">{_e(item['query'])}</a></p>")
+    people_also_search = "".join(
+        f"<div class=\"g-blk\">{_e(item['title'])}</div>" for item in related if "title" in item and "query" not in item
+    )
+
+    kg = ""
+    if knowledge_graph:
+        attributes = "".join(
+            f"<div class=\"rVusze\"><span class=\"w8qArf\">{_e(k)}</span><span class=\"LrzXr\">{_e(v)}</span></div>"
+            for k, v in knowledge_graph.get("attributes", {}).items()
+        )
+        kg = (
+            "<div class=\"kp-wholepage\"><div id=\"kp-wp-tab-overview\">"
+            f"<h2 class=\"qrShPb\" data-attrid=\"title\">{_e(knowledge_graph['title'])}</h2>"
+            f"<div class=\"wwUB2c\">{_e(knowledge_graph.get('type'))}</div>"
+            f"<div class=\"kno-rdesc\"><span>{_e(knowledge_graph.get('description'))}</span>"
+            f"<a href=\"{_e(knowledge_graph.get('descriptionLink'))}\">{_e(knowledge_graph.get('descriptionSource'))}</a></div>"
+            f"{attributes}</div></div>"
+        )
+
+    body = (
+        f"<form action=\"{BASE}/www.google.com/search\" method=\"get\"><textarea name=\"q\">{_e(query)}</textarea></form>\n"
+        "<ul role=\"listbox\"><li></li></ul>\n"
+        f"{kg}\n<div id=\"search\"><div id=\"rso\">\n" + "\n".join(blocks) + "\n</div></div>\n"
+        f"<div id=\"botstuff\"><div class=\"brs_col\">{''.join(related_blocks)}</div>{people_also_search}</div>"
+    )
+    return _page(f"{query} - Google Search", body)
+
+
+def render_sitelink_page(title: str, sub_sitelinks: List[Dict]) -> str:
+    links = "\n".join(f"<a href=\"{_e(s['link'])}\">{_e(s['title'])}</a>" for s in sub_sitelinks)
+    return _page(title, f"<nav>\n{links}\n</nav>")
+
+
+def render_bing_serp(query: str, results: List[Dict]) -> str:
+    blocks = "\n".join(
+        f"<li class=\"b_algo\"><h2><a href=\"{_e(r['link'])}\">{_e(r['title'])}</a></h2>"
+        f"<div class=\"b_caption\"><p>{_e(r.get('snippet', ''))}</p></div></li>"
+        for r in results
+    )
+    body = (
+        f"<form action=\"{BASE}/www.bing.com/search\" method=\"get\"><input name=\"q\" value=\"{_e(query)}\"></form>\n"
+        f"<ol id=\"b_results\">\n{blocks}\n</ol>"
+    )
+    return _page(f"{query} - Search", body)
+
+
+def render_youtube_home(suggestions: List[str]) -> str:
+    body = (
+        f"{COOKIE_BUTTON}\n"
+        f"<form action=\"{BASE}/www.youtube.com/results\" method=\"get\">"
+        "<input name=\"search_query\" type=\"text\" autocomplete=\"off\"></form>\n"
+        "<div role=\"listbox\" id=\"suggestions\"></div>"
+    )
+    # Mimic the autocomplete dropdown that appears while typing
+    script = (
+        f"var SUGGESTIONS = {json.dumps(suggestions)};"
+        "document.querySelector('input[name=search_query]').addEventListener('input', function () {"
+        "  var box = document.getElementById('suggestions'); box.innerHTML = '';"
+        "  SUGGESTIONS.forEach(function (s) { var o = document.createElement('div');"
+        "    o.setAttribute('role', 'option'); o.textContent = s; box.appendChild(o); });"
+        "});"
+    )
+    return _page("YouTube", body, script)
+
+
+def render_youtube_results(query: str, videos: List[Dict], related: List[str]) -> str:
+    blocks = []
+    for video in videos:
+        parsed = urlparse(video["link"])
+        href = parsed.path + ("?" + parsed.query if parsed.query else "")
+        blocks.append(
+            "<ytd-video-renderer>"
+            f"<a id=\"video-title\" href=\"{_e(href)}\" title=\"{_e(video['title'])}\">{_e(video['title'])}</a>"
+            f"<div class=\"ytd-channel-name\">{_e(video.get('channel', ''))}</div>"
+            "</ytd-video-renderer>"
+        )
+    refinements = "".join(f"<ytd-search-refinement-card-renderer>{_e(r)}</ytd-search-refinement-card-renderer>" for r in related)
+    body = (
+        f"<form action=\"{BASE}/www.youtube.com/results\" method=\"get\">"
+        f"<input name=\"search_query\" value=\"{_e(query)}\"></form>\n"
+        "<ytd-item-section-renderer>\n" + "\n".join(blocks) + "\n</ytd-item-section-renderer>\n"
+        f"<ytd-horizontal-card-list-renderer>{refinements}</ytd-horizontal-card-list-renderer>"
+    )
+    return _page(f"{query} - YouTube", body)
+
+
+def render_ad_library(ads: List[Dict]) -> str:
+    """Render ad cards carrying every field FacebookAdsScraper.extract_ad_data looks for."""
+    cards = []
+    for i, ad in enumerate(ads):
+        ad_id = ad.get("id") or str(100000000000000 + i)
+        start_date = ad.get("start_date") or "Jan 1, 2025"
+        image = f"<img data-testid=\"ad_image\" src=\"{_e(ad['image_url'])}\">" if ad.get("image_url") else ""
+        cards.append(
+            "<div class=\"x1dr75xp xh8yej3 x16md763\" data-testid=\"ad_library_preview\" role=\"article\">"
+            f"<div role=\"row\"><span data-testid=\"ad_id\">Library ID: {_e(ad_id)}</span></div>"
+            f"<div role=\"row\"><span data-testid=\"ad_date\">Started running on {_e(start_date)}</span></div>"
+            f"<div data-testid=\"ad_platforms\"><span>Platforms {_e(ad.get('platform') or 'Facebook')}</span></div>"
+            f"<a role=\"link\" href=\"#\"><span dir=\"auto\">{_e(ad.get('company_name') or 'Advertiser')}</span></a>"
+            f"<div data-testid=\"ad_text\">{_e(ad.get('ad_text'))}</div>"
+            f"<div data-testid=\"ad_metadata\">{_e(ad.get('metadata') or 'Sponsored')}</div>"
+            f"{image}</div>"
+        )
+    body = "<div role=\"main\"><div>Ad Library</div>\n" + "\n".join(cards) + "\n</div>"
+    return _page("Ad Library", body)
+
+
+def _write(fixtures_dir: str, name: str, content: str):
+    path = os.path.join(fixtures_dir, name)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(content)
+
+
+def build_fixtures(fixtures_dir: str = FIXTURES_DIR) -> Dict:
+    """Render every fixture page from the golden outputs and write the route table."""
+    main_golden = load_golden(GOLDEN_MAIN)
+    google_golden = load_golden(GOLDEN_GOOGLE)
+    routes: Dict[str, object] = {}
+
+    def add_sitelink_pages(results):
+        for result in results:
+            for sitelink in result.get("sitelinks", []):
+                name = f"sitelinks/{hashlib.sha1(sitelink['link'].encode()).hexdigest()[:16]}.html"
+                _write(fixtures_dir, name, render_sitelink_page(sitelink["title"], sitelink.get("sub_sitelinks", [])))
+                routes[route_key(sitelink["link"])] = name
+
+    main_query = main_golden["searchParameters"]["q"]
+    google_query = google_golden["searchParameters"]["q"]
+
+    _write(fixtures_dir, "google_home.html", render_search_home("www.google.com", "q", "/search"))
+    _write(fixtures_dir, "google_serp_main.html",
+           render_google_serp(main_query, main_golden["googleResults"], main_golden["googleRelatedSearches"]))
+    _write(fixtures_dir, "google_serp_sitelinks.html",
+           render_google_serp(google_query, google_golden["googleResults"], google_golden.get("relatedSearches", [])))
+    add_sitelink_pages(main_golden["googleResults"])
+    add_sitelink_pages(google_golden["googleResults"])
+
+    # main.json has no Bing results, so reuse the Google ones as stand-in content
+    bing_results = main_golden["bingResults"] or main_golden["googleResults"]
+    _write(fixtures_dir, "bing_home.html", render_search_home("www.bing.com", "q", "/search"))
+    _write(fixtures_dir, "bing_serp.html", render_bing_serp(main_query, bing_results))
+
+    youtube_related = main_golden["youtubeRelatedSearches"]
+    _write(fixtures_dir, "youtube_home.html",
+           render_youtube_home([s["title"] for s in youtube_related if s.get("type") == "autocomplete"]))
+    _write(fixtures_dir, "youtube_results.html",
+           render_youtube_results(main_query, main_golden["youtubeResults"],
+                                  [s["title"] for s in youtube_related if s.get("type") == "related"]))
+
+    ads, seen = [], set()
+    for path in sorted(glob.glob(ADS_INFO_GLOB)):
+        for ad in load_golden(path):
+            if ad.get("ad_text") and ad["ad_text"] not in seen:
+                seen.add(ad["ad_text"])
+                ads.append(ad)
+    _write(fixtures_dir, "fb_ad_library.html", render_ad_library(ads))
+
+    routes.update({
+        "www.google.com/": "google_home.html",
+        "www.google.com/search": {main_query.lower(): "google_serp_main.html",
+                                  google_query.lower(): "google_serp_sitelinks.html",
+                                  "*": "google_serp_main.html"},
+        "www.bing.com/": "bing_home.html",
+        "www.bing.com/search": "bing_serp.html",
+        "www.youtube.com/": "youtube_home.html",
+        "www.youtube.com/results": "youtube_results.html",
+        "www.facebook.com/ads/library/": "fb_ad_library.html",
+    })
+    _write(fixtures_dir, "routes.json", json.dumps(routes, indent=4, ensure_ascii=False, sort_keys=True))
+    return routes
+
+
+def capture(driver, url: str, name: str, fixtures_dir: str = FIXTURES_DIR):
+    """Save a live page as a fixture and route its URL to it."""
+    driver.get(url)
+    _write(fixtures_dir, name, driver.page_source)
+    routes_path = os.path.join(fixtures_dir, "routes.json")
+    routes = load_golden(routes_path) if os.path.exists(routes_path) else {}
+    routes[route_key(url)] = name
+    _write(fixtures_dir, "routes.json", json.dumps(routes, indent=4, ensure_ascii=False, sort_keys=True))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build offline SERP fixtures from the golden outputs.")
+    parser.add_argument("--fixtures-dir", default=FIXTURES_DIR)
+    args = parser.parse_args()
+    routes = build_fixtures(args.fixtures_dir)
+    print(f"Wrote {len(routes)} routes to {args.fixtures_dir}")
+
+
+if __name__ == "__main__":
+    main()
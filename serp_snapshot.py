@@ -0,0 +1,187 @@
+import argparse
+import json
+import re
+import time
+from contextlib import nullcontext
+from typing import Callable, ContextManager, Dict, List, Optional
+from urllib.parse import urljoin
+
+from bs4 import BeautifulSoup
+
+from html_parsing import default_parser, parse_html
+
+
+GOOGLE_BASE_URL = "https://www.google.com"
+
+
+def _text(element) -> str:
+    """Approximate Selenium's rendered `.text` for a parsed element."""
+    if element is None:
+        return ""
+    return re.sub(r"\s+", " ", element.get_text(" ", strip=True)).strip()
+
+
+def _href(element, base_url: str = GOOGLE_BASE_URL) -> str:
+    """Resolve an href the way `get_attribute('href')` does in the browser."""
+    if element is None or not element.get("href"):
+        return ""
+    return urljoin(base_url, element["href"])
+
+
+def _search_parameters(query: str) -> Dict:
+    return {
+        "q": query,
+        "gl": "us",
+        "hl": "en",
+        "autocorrect": True,
+        "page": 1,
+        "type": "search"
+    }
+
+
+def parse_knowledge_graph(soup: BeautifulSoup) -> Optional[Dict]:
+    """Extract the knowledge panel, or None when the page has none."""
+    kg_div = soup.select_one("#kp-wp-tab-overview")
+    if kg_div is None:
+        return None
+
+    title_element = kg_div.find("h2")
+    if title_element is None:
+        return None
+
+    image_element = kg_div.select_one(".kc-vh")
+
+    description = desc_source = desc_link = ""
+    desc_element = kg_div.select_one(".kno-rdesc")
+    if desc_element is not None:
+        span = desc_element.find("span")
+        anchor = desc_element.find("a")
+        if span is not None and anchor is not None:
+            description = _text(span)
+            desc_source = _text(anchor)
+            desc_link = _href(anchor)
+
+    knowledge_graph = {
+        "title": _text(title_element),
+        "type": _text(kg_div.select_one(".wwUB2c")),
+        "imageUrl": image_element.get("src", "") if image_element is not None else "",
+        "description": description,
+        "descriptionSource": desc_source,
+        "descriptionLink": desc_link,
+        "attributes": {}
+    }
+
+    website_element = kg_div.select_one("a[data-attrid='kc:/common/topic:official website']")
+    if website_element is not None:
+        knowledge_graph["website"] = _href(website_element)
+
+    for attr in kg_div.select(".rVusze"):
+        key_element = attr.select_one(".w8qArf")
+        value_element = attr.select_one(".LrzXr")
+        if key_element is None or value_element is None:
+            continue
+        knowledge_graph["attributes"][_text(key_element)] = _text(value_element)
+
+    return knowledge_graph
+
+
+def parse_organic_results(soup: BeautifulSoup) -> List[Dict]:
+    """Extract organic results and their sitelinks from `div.g` blocks."""
+    organic = []
+    for position, result in enumerate(soup.select(".g"), 1):
+        title_element = result.find("h3")
+        link_element = result.find("a")
+        snippet_element = result.select_one(".VwiC3b")
+        if title_element is None or link_element is None or snippet_element is None:
+            continue
+
+        organic_result = {
+            "title": _text(title_element),
+            "link": _href(link_element),
+            "snippet": _text(snippet_element),
+            "position": position
+        }
+
+        sitelinks_table = result.select_one(".PAYrJc")
+        if sitelinks_table is not None:
+            sitelink_elements = sitelinks_table.find_all("a")
+            if sitelink_elements:
+                organic_result["sitelinks"] = [
+                    {"title": _text(sitelink), "link": _href(sitelink)}
+                    for sitelink in sitelink_elements
+                ]
+
+        organic.append(organic_result)
+    return organic
+
+
+def parse_google_serp(
+    html: str,
+    query: str,
+    phase: Optional[Callable[[str], ContextManager]] = None,
+    parser: Optional[str] = None
+) -> Dict:
+    """Parse a Google results page into the `SearchScraper.google_search` schema.
+
+    `phase`, e.g. `ScrapeMetrics.phase`, times the knowledge-graph and
+    organic extraction separately. `parser` picks the html_parsing backend.
+    """
+    phase = phase or (lambda name: nullcontext())
+    soup = parse_html(html, parser)
+    results = {
+        "searchParameters": _search_parameters(query),
+        "organic": []
+    }
+
+    with phase("extract_kg"):
+        knowledge_graph = parse_knowledge_graph(soup)
+    if knowledge_graph is not None:
+        results["knowledgeGraph"] = knowledge_graph
+
+    with phase("extract_organic"):
+        results["organic"] = parse_organic_results(soup)
+    return results
+
+
+def benchmark(html_path: str, query: str = "", repeat: int = 20, parser: Optional[str] = None) -> Dict:
+    """Time offline parsing and extraction of a saved SERP."""
+    with open(html_path, encoding="utf-8") as f:
+        html = f.read()
+
+    timings = []
+    results = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        results = parse_google_serp(html, query, parser=parser)
+        timings.append((time.perf_counter() - start) * 1000)
+
+    timings.sort()
+    return {
+        "file": html_path,
+        "parser": parser or default_parser(),
+        "runs": repeat,
+        "organic": len(results["organic"]),
+        "knowledgeGraph": "knowledgeGraph" in results,
+        "min_ms": round(timings[0], 3),
+        "median_ms": round(timings[len(timings) // 2], 3),
+        "max_ms": round(timings[-1], 3)
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Parse or benchmark a saved Google SERP.")
+    parser.add_argument("html", help="Path to a saved Google results page")
+    parser.add_argument("--query", default="", help="Query to record in searchParameters")
+    parser.add_argument("--repeat", type=int, default=0, help="Benchmark with this many runs")
+    parser.add_argument("--parser", help="html_parsing backend, e.g. lxml or html.parser")
+    args = parser.parse_args()
+
+    if args.repeat:
+        print(json.dumps(benchmark(args.html, args.query, args.repeat, args.parser), indent=4))
+    else:
+        with open(args.html, encoding="utf-8") as f:
+            print(json.dumps(parse_google_serp(f.read(), args.query, parser=args.parser), indent=4, ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,198 @@
+import json
+import logging
+import os
+import tempfile
+import time
+from typing import Callable, Dict, Optional
+
+from selenium.common.exceptions import WebDriverException
+from selenium.webdriver.common.by import By
+
+
+logger = logging.getLogger(__name__)
+
+FACEBOOK_ORIGIN = "https://www.facebook.com"
+# Cookies Facebook needs for an authenticated session
+AUTH_COOKIES = ("c_user", "xs")
+
+
+def _fernet_class():
+    try:
+        from cryptography.fernet import Fernet
+    except ImportError:
+        raise ImportError("Encrypted session storage requires the 'cryptography' package")
+    return Fernet
+
+
+def _write_private(path: str, data: bytes):
+    """Atomically write `data` readable by the owner only.
+
+    Each writer gets its own temp file (mkstemp creates it 0600), so
+    concurrent processes never write into each other's half-written file.
+    """
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(prefix=f".{os.path.basename(path)}.", suffix=".tmp", dir=directory)
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def _create_key(path: str, generate: Callable[[], bytes]) -> Optional[bytes]:
+    """Create the key file with `generate()` unless it already exists; returns None if another process won."""
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    key = generate()
+    try:
+        fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+    except FileExistsError:
+        return None
+    with os.fdopen(fd, "wb") as f:
+        f.write(key)
+        f.flush()
+        os.fsync(f.fileno())
+    return key
+
+
+class SessionStore:
+    """Encrypted on-disk Facebook session (cookies + localStorage) reused across runs.
+
+    The Fernet key comes from the FB_SESSION_KEY environment variable or a
+    key file created next to the session on first use. A stored session is
+    trusted while it is younger than `max_age` and its auth cookies have not
+    expired; `ensure` only runs the full login when that check fails.
+    """
+
+    def __init__(
+        self,
+        path: str = "fb_session.bin",
+        key: Optional[bytes] = None,
+        key_path: Optional[str] = None,
+        max_age: float = 7 * 24 * 3600,
+        origin: str = FACEBOOK_ORIGIN,
+    ):
+        self.path = path
+        self.key_path = key_path or f"{path}.key"
+        self.max_age = max_age
+        self.origin = origin
+        self._fernet = _fernet_class()(key or self._load_key())
+
+    def _load_key(self) -> bytes:
+        env_key = os.environ.get("FB_SESSION_KEY")
+        if env_key:
+            return env_key.encode()
+        key = _create_key(self.key_path, _fernet_class().generate_key)
+        if key is not None:
+            logger.info(f"Created session key {self.key_path}")
+            return key
+        # Created by an earlier run, or by a concurrent worker that may still be writing it
+        for _ in range(50):
+            with open(self.key_path, "rb") as f:
+                key = f.read().strip()
+            if key:
+                return key
+            time.sleep(0.1)
+        raise ValueError(f"Session key file {self.key_path} is empty")
+
+    def save(self, driver, account: str):
+        """Capture the driver's cookies and localStorage for `account`."""
+        try:
+            local_storage = driver.execute_script(
+                "var items = {};"
+                "for (var i = 0; i < localStorage.length; i++) {"
+                "  var k = localStorage.key(i); items[k] = localStorage.getItem(k); }"
+                "return items;"
+            )
+        except WebDriverException:
+            local_storage = {}
+        payload = {
+            "account": account,
+            "saved_at": time.time(),
+            "cookies": driver.get_cookies(),
+            "local_storage": local_storage or {},
+        }
+        _write_private(self.path, self._fernet.encrypt(json.dumps(payload).encode("utf-8")))
+        logger.info(f"Saved session for {account} ({len(payload['cookies'])} cookies)")
+
+    def load(self, account: str) -> Optional[Dict]:
+        """Return the stored session for `account` if it is still usable."""
+        if not os.path.exists(self.path):
+            return None
+        try:
+            with open(self.path, "rb") as f:
+                payload = json.loads(self._fernet.decrypt(f.read()))
+        except Exception as e:
+            logger.warning(f"Discarding unreadable session file: {str(e)}")
+            return None
+
+        if payload.get("account") != account:
+            return None
+        if time.time() - payload.get("saved_at", 0) > self.max_age:
+            logger.info("Stored session is older than max_age")
+            return None
+        if not self._auth_cookies_valid(payload["cookies"]):
+            logger.info("Stored session cookies have expired")
+            return None
+        return payload
+
+    @staticmethod
+    def _auth_cookies_valid(cookies) -> bool:
+        now = time.time()
+        by_name = {cookie["name"]: cookie for cookie in cookies}
+        return all(
+            name in by_name and by_name[name].get("expiry", now + 1) > now
+            for name in AUTH_COOKIES
+        )
+
+    def restore(self, driver, payload: Dict):
+        """Load a stored session into the driver."""
+        # Cookies can only be set for the current domain; robots.txt is the cheapest page there
+        driver.get(f"{self.origin}/robots.txt")
+        driver.delete_all_cookies()
+        for cookie in payload["cookies"]:
+            cookie = {k: v for k, v in cookie.items() if k in ("name", "value", "path", "domain", "secure", "httpOnly", "expiry", "sameSite")}
+            try:
+                driver.add_cookie(cookie)
+            except WebDriverException as e:
+                logger.debug(f"Skipping cookie {cookie.get('name')}: {str(e)}")
+        if payload.get("local_storage"):
+            driver.execute_script(
+                "var items = arguments[0]; for (var k in items) { localStorage.setItem(k, items[k]); }",
+                payload["local_storage"]
+            )
+
+    def is_logged_in(self, driver) -> bool:
+        """One page load: logged-in Facebook shows no login form."""
+        driver.get(self.origin)
+        return "login" not in driver.current_url.lower() and not driver.find_elements(By.ID, "email")
+
+    def ensure(self, driver, login: Callable[[object], bool], account: str, verify: bool = False) -> bool:
+        """Reuse the stored session, or log in with `login(driver)` and store the new one.
+
+        With `verify=True` a restored session is also checked against the
+        server before it is trusted.
+        """
+        payload = self.load(account)
+        if payload is not None:
+            self.restore(driver, payload)
+            if not verify or self.is_logged_in(driver):
+                logger.info(f"Reusing stored session for {account}")
+                return True
+            logger.info("Stored session was rejected, logging in again")
+
+        if not login(driver):
+            return False
+        self.save(driver, account)
+        return True
+
+    def invalidate(self):
+        """Forget the stored session, e.g. after Facebook redirected to login."""
+        if os.path.exists(self.path):
+            os.remove(self.path)
@@ -0,0 +1,101 @@
+import asyncio
+import logging
+from collections import defaultdict
+from typing import Callable, Dict, Iterable, List, Optional
+from urllib.parse import urlparse
+
+import aiohttp
+import lxml.html
+
+
+logger = logging.getLogger(__name__)
+
+USER_AGENT = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36"
+
+# Markers of pages that render their links client-side
+JS_APP_MARKERS = ("id=\"root\"", "id=\"app\"", "id=\"__next\"", "enable javascript", "requires javascript")
+
+
+def parse_sub_sitelinks(html: str) -> List[Dict[str, str]]:
+    """Collect `{title, link}` for every absolute `a[href]` with text."""
+    try:
+        tree = lxml.html.fromstring(html)
+    except (lxml.etree.ParserError, ValueError):
+        return []
+
+    sub_sitelinks = []
+    for link in tree.iter("a"):
+        url = link.get("href")
+        if not url:
+            continue
+        title = link.text_content().strip()
+        if title and url.startswith("http"):
+            sub_sitelinks.append({"title": title, "link": url})
+    return sub_sitelinks
+
+
+def needs_browser(html: str, sub_sitelinks: List[Dict[str, str]]) -> bool:
+    """Guess whether a page only produces its links after running JavaScript."""
+    if sub_sitelinks:
+        return False
+    lowered = html[:20000].lower()
+    return "<noscript" in lowered or any(marker in lowered for marker in JS_APP_MARKERS)
+
+
+async def _fetch_one(session, url, host_limits, timeout):
+    async with host_limits[urlparse(url).netloc]:
+        try:
+            async with session.get(url, timeout=aiohttp.ClientTimeout(total=timeout)) as response:
+                content_type = response.headers.get("Content-Type", "")
+                if response.status >= 400 or "html" not in content_type:
+                    logger.warning(f"Skipping {url}: HTTP {response.status} {content_type}")
+                    return url, None
+                html = await response.text(errors="replace")
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            logger.warning(f"Error fetching sub-sitelinks from {url}: {str(e)}")
+            return url, None
+
+    sub_sitelinks = parse_sub_sitelinks(html)
+    if needs_browser(html, sub_sitelinks):
+        return url, None
+    return url, sub_sitelinks
+
+
+async def fetch_sub_sitelinks_async(
+    urls: Iterable[str],
+    per_host: int = 2,
+    max_connections: int = 16,
+    timeout: float = 10,
+) -> Dict[str, Optional[List[Dict[str, str]]]]:
+    """Fetch sitelink pages concurrently over one pooled session.
+
+    Returns a mapping of url to its sub-sitelinks, or None where the page
+    could not be fetched over plain HTTP.
+    """
+    urls = list(dict.fromkeys(urls))
+    if not urls:
+        return {}
+
+    host_limits = defaultdict(lambda: asyncio.Semaphore(per_host))
+    connector = aiohttp.TCPConnector(limit=max_connections, limit_per_host=per_host)
+    async with aiohttp.ClientSession(connector=connector, headers={"User-Agent": USER_AGENT}) as session:
+        pages = await asyncio.gather(*(_fetch_one(session, url, host_limits, timeout) for url in urls))
+    return dict(pages)
+
+
+def fetch_sub_sitelinks(
+    urls: Iterable[str],
+    browser_fallback: Optional[Callable[[str], List[Dict[str, str]]]] = None,
+    **kwargs,
+) -> Dict[str, List[Dict[str, str]]]:
+    """Fetch sub-sitelinks for many URLs, using the browser only for pages that need JS."""
+    results = asyncio.run(fetch_sub_sitelinks_async(urls, **kwargs))
+
+    for url, sub_sitelinks in results.items():
+        if sub_sitelinks is None:
+            if browser_fallback is not None:
+                logger.info(f"Falling back to the browser for {url}")
+                results[url] = browser_fallback(url)
+            else:
+                results[url] = []
+    return results
@@ -0,0 +1,69 @@
+import pytest
+
+from ads_warehouse import AdsWarehouse, parse_start_date, to_row
+
+
+@pytest.fixture
+def warehouse(tmp_path):
+    warehouse = AdsWarehouse(str(tmp_path / "ads.db"))
+    yield warehouse
+    warehouse.close()
+
+
+def ad(**fields):
+    record = {
+        "ad_id": "Library ID: 123456789",
+        "ad_text": "Summer sale on running shoes",
+        "company_name": "Acme",
+        "start_date": "Started running on Jun 3, 2024",
+    }
+    record.update(fields)
+    return record
+
+
+def count(warehouse, table):
+    return warehouse.connection.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+
+
+def test_rows_are_keyed_by_library_id_or_content():
+    assert to_row(ad(), "2024-06-10 12:00:00")["ad_key"] == "id:123456789"
+    without_id = to_row(ad(ad_id="Unknown"), "2024-06-10 12:00:00")
+    assert without_id["ad_key"].startswith("sha:")
+    # Cosmetic edits keep the same content key
+    assert to_row(ad(ad_id="Unknown", ad_text="SUMMER sale on running shoes!"), "x")["ad_key"] == without_id["ad_key"]
+    assert parse_start_date("Started running on Jun 3, 2024") == "2024-06-03"
+
+
+def test_repeat_imports_change_nothing(warehouse):
+    for _ in range(2):
+        warehouse.upsert([ad(), ad(ad_id="Unknown", ad_text="Another ad")], search_term="acme.com",
+                         seen_at="2024-06-10 12:00:00")
+    assert count(warehouse, "ads") == 2
+    assert count(warehouse, "sightings") == 2
+
+
+def test_resightings_widen_first_and_last_seen(warehouse):
+    warehouse.upsert([ad()], search_term="acme.com", seen_at="2024-06-10 12:00:00")
+    warehouse.upsert([ad()], search_term="acme.com", seen_at="2024-06-20 08:00:00")
+    # An older file imported late only moves first_seen back
+    warehouse.upsert([ad(company_name="")], search_term="shoes", seen_at="2024-06-01 09:00:00")
+    warehouse.upsert([ad()], search_term="acme.com", seen_at="2024-06-15 10:00:00")
+
+    [row] = warehouse.query()
+    assert row["first_seen"] == "2024-06-01 09:00:00"
+    assert row["last_seen"] == "2024-06-20 08:00:00"
+    assert row["days_seen"] == 4
+    # Empty fields in a later sighting don't erase known ones
+    assert row["advertiser"] == "Acme"
+    assert row["start_date"] == "2024-06-03"
+
+
+def test_query_filters(warehouse):
+    warehouse.upsert([ad()], search_term="acme.com", seen_at="2024-06-10 12:00:00")
+    warehouse.upsert([ad(ad_id="987654321", company_name="Other")], search_term="other.com",
+                     seen_at="2024-07-01 12:00:00")
+
+    assert [row["ad_id"] for row in warehouse.query(advertiser="acme")] == ["123456789"]
+    assert [row["ad_id"] for row in warehouse.query(search_term="OTHER.COM")] == ["987654321"]
+    assert [row["ad_id"] for row in warehouse.query(since="2024-06-15")] == ["987654321"]
+    assert [row["ad_id"] for row in warehouse.query(until="2024-06-15")] == ["123456789"]
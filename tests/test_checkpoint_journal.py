@@ -0,0 +1,21 @@
+from checkpoint_journal import DONE, IN_PROGRESS, CrawlJournal
+
+
+def test_torn_final_line_does_not_swallow_next_record(tmp_path):
+    path = str(tmp_path / "crawl_journal.jsonl")
+    with CrawlJournal(path) as journal:
+        journal.mark("a.com", DONE)
+        journal.mark("b.com", IN_PROGRESS)
+    # Crash mid-write
+    with open(path, "a", encoding="utf-8") as f:
+        f.write('{"ts": 1, "domain": "c.co')
+
+    with CrawlJournal(path) as journal:
+        journal.mark("d.com", DONE)
+
+    journal = CrawlJournal(path)
+    journal.close()
+    assert journal.state("a.com") == DONE
+    assert journal.state("b.com") == IN_PROGRESS
+    assert journal.state("d.com") == DONE
+    assert "c.co" not in journal.states
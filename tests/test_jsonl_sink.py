@@ -0,0 +1,68 @@
+import json
+import os
+
+from jsonl_sink import JsonlSink, reconstruct_documents, write_documents
+
+
+def test_new_run_does_not_replay_previous_run(tmp_path):
+    path = str(tmp_path / "main.jsonl")
+    with JsonlSink(path) as sink:
+        sink.set("main.json", ["searchParameters"], {"q": "old"})
+        sink.set("main.json", ["bingResults"], ["OLD bing result"])
+
+    # The second run's Bing engine fails before writing anything
+    with JsonlSink(path) as sink:
+        sink.set("main.json", ["searchParameters"], {"q": "new"})
+
+    written = write_documents(path, output_dir=str(tmp_path))
+    with open(written[0], encoding="utf-8") as f:
+        document = json.load(f)
+    assert document == {"searchParameters": {"q": "new"}}
+
+
+def test_resume_keeps_appending(tmp_path):
+    path = str(tmp_path / "results.jsonl")
+    with JsonlSink(path) as sink:
+        sink.append("results.json", [], {"id": 1})
+    with JsonlSink(path, resume=True) as sink:
+        sink.append("results.json", [], {"id": 2})
+
+    assert reconstruct_documents(path) == {"results.json": [{"id": 1}, {"id": 2}]}
+
+
+def test_write_after_close_is_dropped(tmp_path):
+    path = str(tmp_path / "app.jsonl")
+    sink = JsonlSink(path)
+    sink.set("app.json", ["google"], [])
+    sink.close()
+
+    sink.set("app.json", ["bing"], ["late straggler"])
+
+    assert reconstruct_documents(path) == {"app.json": {"google": []}}
+    assert sink.records_written == 1
+
+
+def test_previous_run_is_moved_aside_not_deleted(tmp_path):
+    path = str(tmp_path / "ads.jsonl")
+    with JsonlSink(path) as sink:
+        sink.append("ads.json", [], {"id": 1})
+
+    with JsonlSink(path) as sink:
+        sink.append("ads.json", [], {"id": 2})
+
+    assert reconstruct_documents(path) == {"ads.json": [{"id": 2}]}
+    moved = [name for name in os.listdir(tmp_path) if name != "ads.00000.jsonl"]
+    assert len(moved) == 1
+    old_run = str(tmp_path / moved[0].replace(".00000", ""))
+    assert reconstruct_documents(old_run) == {"ads.json": [{"id": 1}]}
+
+
+def test_overwrite_deletes_previous_run(tmp_path):
+    path = str(tmp_path / "ads.jsonl")
+    with JsonlSink(path) as sink:
+        sink.append("ads.json", [], {"id": 1})
+    with JsonlSink(path, overwrite=True) as sink:
+        sink.append("ads.json", [], {"id": 2})
+
+    assert os.listdir(tmp_path) == ["ads.00000.jsonl"]
+    assert reconstruct_documents(path) == {"ads.json": [{"id": 2}]}
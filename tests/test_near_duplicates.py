@@ -0,0 +1,44 @@
+from near_duplicates import AdCardFilter, NearDuplicateIndex
+
+AD = "Summer sale! Get 30% off every pair of running shoes this week only, free shipping on orders over $50."
+
+
+def test_small_edits_collapse_into_first_ad():
+    index = NearDuplicateIndex()
+    assert index.add("a", AD) == ("a", 1.0)
+    # Emoji, case and punctuation changes normalize away; a small wording edit stays above the threshold
+    assert index.is_duplicate("b", "🔥 SUMMER SALE!! " + AD[13:])
+    assert index.is_duplicate("c", AD.replace("this week only", "this week"))
+    assert not index.is_duplicate("d", "Introducing our new espresso machine, brewing barista-quality coffee at home.")
+
+    assert index.groups() == {"a": ["a", "b", "c"]}
+    assert index.canonical["c"] == "a"
+    assert len(index.signatures) == 2
+
+
+def test_re_adding_a_key_is_stable():
+    index = NearDuplicateIndex()
+    index.add("a", AD)
+    assert index.add("a", "completely different text") == ("a", 1.0)
+
+
+def test_filter_rejects_cards_without_text_or_id():
+    cards = AdCardFilter()
+    assert not cards.accept("", "Unknown")
+    assert not cards.accept("   ", None)
+    assert not cards.accept("", "")
+
+
+def test_filter_keeps_distinct_text_less_cards():
+    # Regression: the 'Unknown' placeholder used to stand in for missing text, collapsing every such card
+    cards = AdCardFilter()
+    assert cards.accept("", "card-1")
+    assert cards.accept("", "card-2")
+    assert not cards.accept("", "card-1")
+
+
+def test_filter_dedupes_text_cards_by_text():
+    cards = AdCardFilter()
+    assert cards.accept(AD, "Unknown")
+    assert not cards.accept(AD + " ", "Unknown")
+    assert cards.accept("A different ad about garden furniture and outdoor lighting for patios.", "Unknown")
@@ -0,0 +1,59 @@
+import random
+
+import numpy as np
+import pytest
+
+from perceptual_hash import HashIndex, hamming, popcount
+
+
+def brute_force(keys, values, query, max_distance):
+    matches = [(key, bin(value ^ query).count("1")) for key, value in zip(keys, values)]
+    return sorted((match for match in matches if match[1] <= max_distance), key=lambda match: (match[1], match[0]))
+
+
+def near(value, flips, rng):
+    for bit in rng.sample(range(64), flips):
+        value ^= 1 << bit
+    return value
+
+
+def test_popcount_and_hamming():
+    values = np.array([0, 1, 0xFF, 2 ** 64 - 1], dtype=np.uint64)
+    assert popcount(values).tolist() == [0, 1, 8, 64]
+    assert hamming(0b1010, np.array([0b1010, 0b0101], dtype=np.uint64)).tolist() == [0, 4]
+
+
+@pytest.mark.parametrize("max_distance", [0, 3, 6, 10])
+def test_search_matches_brute_force(max_distance):
+    rng = random.Random(7)
+    bases = [rng.getrandbits(64) for _ in range(50)]
+    values = bases + [near(rng.choice(bases), rng.randint(0, 12), rng) for _ in range(450)]
+    keys = [f"k{i}" for i in range(len(values))]
+
+    index = HashIndex()
+    index.add_many(keys[:400], values[:400])
+    for key, value in zip(keys[400:], values[400:]):
+        index.add(key, value)  # unbuilt tail, scanned linearly
+
+    for query in values[::25] + [near(bases[0], 4, rng), rng.getrandbits(64)]:
+        expected = brute_force(keys, values, query, max_distance)
+        actual = sorted(index.search(query, max_distance), key=lambda match: (match[1], match[0]))
+        assert actual == expected
+
+
+def test_save_and_load_round_trip(tmp_path):
+    path = str(tmp_path / "phash_index.npz")
+    index = HashIndex()
+    index.add_many(["a", "b"], [1, 2 ** 63 + 5])
+    index.save(path)
+
+    loaded = HashIndex.load(path)
+    assert loaded.keys == ["a", "b"]
+    assert loaded.nearest(2 ** 63 + 4, 2) == ("b", 1)
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["phash_index.npz"]
+
+
+def test_groups_link_near_hashes():
+    index = HashIndex()
+    index.add_many(["a", "b", "c", "d"], [0, 0b1, 0b11, 2 ** 64 - 1])
+    assert index.groups(max_distance=1) == [["a", "b", "c"]]
@@ -0,0 +1,84 @@
+import time
+
+import pytest
+
+from serp_cache import SerpCache, cached, make_key
+
+
+@pytest.fixture
+def cache(tmp_path):
+    cache = SerpCache(str(tmp_path / "serp_cache.sqlite3"), ttl=60, max_entries=3, memory_entries=10)
+    yield cache
+    cache.close()
+
+
+def stored_keys(cache):
+    return {row[0] for row in cache._conn.execute("SELECT key FROM serp_cache")}
+
+
+def test_expired_entries_are_misses(cache, monkeypatch):
+    cache.set("k", {"organic": [1]})
+    assert cache.get("k") == {"organic": [1]}
+
+    later = time.time() + 61
+    monkeypatch.setattr(time, "time", lambda: later)
+    assert cache.get("k") is None
+    assert cache.stats()["entries"] == 0
+    assert (cache.hits, cache.misses) == (1, 1)
+
+
+def test_lru_evicts_least_recently_used(cache):
+    for key in "abc":
+        cache.set(key, key)
+        time.sleep(0.01)
+    cache._memory.clear()  # force the SQLite path
+    cache.get("a")
+    time.sleep(0.01)
+    cache.set("d", "d")
+    assert stored_keys(cache) == {"a", "c", "d"}
+
+
+def test_memory_layer_hits_keep_entries_alive(cache):
+    cache.set("hot", 1)
+    time.sleep(0.01)
+    for key in "abc":
+        # Served from the in-memory layer, never touching SQLite directly
+        assert cache.get("hot") == 1
+        cache.set(key, key)
+        time.sleep(0.01)
+    assert "hot" in stored_keys(cache)
+    assert "a" not in stored_keys(cache)
+
+
+def test_hits_return_independent_copies(cache):
+    cache.set("k", {"organic": []})
+    cache.get("k")["organic"].append("mutated")
+    assert cache.get("k") == {"organic": []}
+
+
+class Scraper:
+    def __init__(self, cache, result):
+        self.cache = cache
+        self.result = result
+        self.calls = 0
+
+    @cached("google")
+    def search(self, query):
+        self.calls += 1
+        return self.result
+
+
+def test_cached_reuses_results(cache):
+    scraper = Scraper(cache, {"organic": ["x"]})
+    assert scraper.search("apple") == {"organic": ["x"]}
+    assert scraper.search("apple") == {"organic": ["x"]}
+    assert scraper.calls == 1
+    assert cache.get(make_key("google", "apple")) == {"organic": ["x"]}
+
+
+def test_cached_never_stores_errors(cache):
+    scraper = Scraper(cache, {"error": "blocked"})
+    scraper.search("apple")
+    scraper.search("apple")
+    assert scraper.calls == 2
+    assert cache.get(make_key("google", "apple")) is None